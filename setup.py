@@ -15,4 +15,7 @@ setup(
         "qrcode == 7.4.2",
         "pyodbc == 4.0.39"
     ],
+    extras_require={
+        "media": ["Pillow >= 9.1.0"],
+    },
 )
@@ -0,0 +1,38 @@
+import threading
+import time
+
+from whatsapp_py.browser import Browser
+from whatsapp_py.browser.browser import DEFAULT_SCRIPT_TIMEOUT
+
+
+class FakeDriver:
+    def __init__(self):
+        self.timeout = DEFAULT_SCRIPT_TIMEOUT
+
+    def set_script_timeout(self, timeout:float):
+        self.timeout = timeout
+
+    def execute_async_script(self, script, *args):
+        time.sleep(0.05)
+        # The timeout the session has when the script ends
+        return self.timeout
+
+
+def test_overlapping_async_scripts_keep_their_timeouts():
+    # No WebDriver session is created
+    browser = Browser.__new__(Browser)
+    browser._Browser__script_lock = threading.Lock()
+    browser._driver = FakeDriver()
+    results = {}
+
+    def run(timeout:float):
+        results[timeout] = browser.execute_async_script('', timeout=timeout)
+
+    threads = [threading.Thread(target=run, args=(timeout,)) for timeout in (5, 60)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {5: 5, 60: 60}
+    assert browser._driver.timeout == DEFAULT_SCRIPT_TIMEOUT
@@ -0,0 +1,34 @@
+from whatsapp_py.cache import LRUCache
+
+
+def test_least_recently_used_item_is_dropped():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_get_counts_hits_and_misses():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b', 'missing') == 'missing'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_pop_and_clear():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+
+    assert cache.pop('a') == 1
+    assert cache.pop('a', 'missing') == 'missing'
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from whatsapp_py.check import CheckCache
+
+
+def test_results_are_cached_until_the_ttl():
+    cache = CheckCache(ttl=1)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+
+    with mock.patch('whatsapp_py.check.time.monotonic', return_value=0):
+        assert cache.get('logged_in', compute) == 1
+        assert cache.get('logged_in', compute) == 1
+    with mock.patch('whatsapp_py.check.time.monotonic', return_value=1):
+        assert cache.get('logged_in', compute) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.hit_ratio == 1 / 3
+
+
+def test_invalidate_drops_the_results():
+    cache = CheckCache(ttl=60)
+    cache.get('logged_in', lambda: True)
+    cache.invalidate()
+
+    assert cache.get('logged_in', lambda: False) is False
+
+
+def test_result_computed_across_an_invalidation_is_not_cached():
+    cache = CheckCache(ttl=60)
+
+    def compute():
+        # e.g. a click while the check was running
+        cache.invalidate()
+        return 'stale'
+
+    assert cache.get('chat_screen', compute) == 'stale'
+    assert cache.get('chat_screen', lambda: 'fresh') == 'fresh'
+
+
+def test_nested_checks_use_the_cache():
+    cache = CheckCache(ttl=60)
+    ready = mock.Mock(return_value=True)
+    is_ready = lambda: cache.get('whatsapp_ready', ready)
+
+    assert cache.get('confirm_popup', lambda: is_ready() and False) is False
+    assert cache.get('qr_ready', lambda: is_ready()) is True
+    assert ready.call_count == 1
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from whatsapp_py.chat import Chat
+from whatsapp_py.check import Check, CheckCache
+from whatsapp_py.client import Client
+from whatsapp_py.const import LOOP_INTERVAL, LOOP_BACKOFF_FACTOR, MAX_LOOP_INTERVAL
+from whatsapp_py.scheduler import Backoff, Scheduler
+from whatsapp_py.message import Message
+from whatsapp_py.task import MessageTask, Task, TaskManager, TaskType
+from whatsapp_py.task_store import TaskState, TaskStore
+
+
+class FakeJob:
+    def __init__(self):
+        self.wakes = []
+
+    def wake(self, delay:float = 0.0):
+        self.wakes.append(delay)
+
+
+class FakeObserver:
+    def __init__(self, states:list[dict], current:dict = None):
+        self.states = states
+        self.current = current
+        self.timeouts = []
+
+    def drain(self, timeout:float) -> list[dict]:
+        self.timeouts.append(timeout)
+        states, self.states = self.states, []
+        return states
+
+
+def new_observing_client(observer:FakeObserver) -> Client:
+    # Not started, so no browser is created
+    client = Client.__new__(Client)
+    client._Client__dom_observer = observer
+    client._Client__update_job = FakeJob()
+    client._Client__is_looping = True
+    client.check_cache = CheckCache()
+    client.task_manager = TaskManager()
+    client.scheduler = Scheduler()
+    return client
+
+
+def observe(client:Client, logged_in:bool = False) -> tuple[float | None, list[str]]:
+    """Runs the observe job once and returns its delay and the urls of the ticked snapshots."""
+    ticked = []
+    tick = lambda self: ticked.append(self._Client__snapshot.url)
+    with mock.patch.object(Check, 'true_once', [Check.LOGGED_IN] if logged_in else []), \
+            mock.patch.object(Client, '_Client__tick', tick):
+        delay = client._Client__observe()
+    return delay, ticked
+
+
+def test_adding_a_task_resets_the_update_loop_backoff():
+    # Not started, so no browser is created
+    client = Client.__new__(Client)
+    backoff = client._Client__idle_backoff = Backoff(LOOP_INTERVAL, MAX_LOOP_INTERVAL, LOOP_BACKOFF_FACTOR)
+    update_job = client._Client__update_job = FakeJob()
+    task_job = client._Client__task_job = FakeJob()
+    while backoff.next() < MAX_LOOP_INTERVAL:
+        pass
+
+    client._Client__on_task_added(Task(client, TaskType.SEND_MESSAGE, 0, datetime.now() + timedelta(seconds=60)))
+
+    assert backoff.next() == LOOP_INTERVAL
+    assert update_job.wakes == [LOOP_INTERVAL]
+    assert len(task_job.wakes) == 1
+
+
+def test_observe_ticks_every_state_in_order_and_runs_again():
+    observer = FakeObserver([{'url': 'loading'}, {'url': 'qr'}], current={'url': 'qr'})
+    client = new_observing_client(observer)
+
+    assert observe(client) == (None, ['loading', 'qr'])
+    assert client._Client__update_job.wakes == [0.0]
+    assert observer.timeouts[0] > 0
+
+
+def test_observe_ticks_the_current_state_if_nothing_changed():
+    client = new_observing_client(FakeObserver([], current={'url': 'qr'}))
+
+    assert observe(client) == (None, ['qr'])
+
+
+def test_observe_does_not_wait_after_login():
+    observer = FakeObserver([{'url': 'chat'}], current={'url': 'chat'})
+    client = new_observing_client(observer)
+
+    assert observe(client, logged_in=True) == (LOOP_INTERVAL, ['chat'])
+    assert observer.timeouts == [0]
+    assert client._Client__update_job.wakes == []
+
+
+def test_observe_does_not_drain_while_a_task_is_sent():
+    observer = FakeObserver([{'url': 'chat'}])
+    client = new_observing_client(observer)
+    client.task_manager.current_task = SimpleNamespace(in_progress=True, is_done=False)
+
+    assert observe(client, logged_in=True) == (LOOP_INTERVAL, [])
+    assert observer.timeouts == []
+
+
+def test_removed_stored_task_is_not_loaded_again(tmp_path):
+    # Not started, so no browser is created
+    client = Client.__new__(Client)
+    client._Client__idle_backoff = Backoff(LOOP_INTERVAL, MAX_LOOP_INTERVAL, LOOP_BACKOFF_FACTOR)
+    client.task_store = TaskStore(str(tmp_path / 'tasks.db'))
+    client.task_manager = TaskManager()
+    client.task_manager.on_task_added = client._Client__on_task_added
+    client.task_manager.on_task_released = client._Client__on_task_released
+    client.new_chat = lambda phone_number: Chat(client, phone_number)
+    message = Message(chat=Chat(client, '905551234567'), content='Hello', nonce='abc')
+    task = MessageTask(client, message, start_date=datetime.now() + timedelta(seconds=60))
+    client.task_manager.add_task(task)
+
+    client.task_manager.remove_task(task)
+    client._Client__sync_task_store()
+
+    assert client.task_manager.get_task_by_nonce('abc') is None
+    assert len(client.task_manager) == 0
+    assert client.task_store.get('abc').state == TaskState.FAILED
+    client.task_store.close()
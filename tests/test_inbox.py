@@ -0,0 +1,89 @@
+from whatsapp_py.client_events import ClientEvents
+from whatsapp_py.const import INBOX_POLL_INTERVAL
+from whatsapp_py.inbox import Inbox, UnreadChat
+
+
+class FakeBrowser:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.limits = []
+
+    def execute_script(self, script, *args):
+        self.limits.append(args[-1])
+        return self.results.pop(0)
+
+
+class FakeClient:
+    is_logged_in = True
+
+    def __init__(self, *results):
+        self.browser = FakeBrowser(*results)
+        self.events = []
+
+    def emit(self, event, *args):
+        self.events.append((event, *args))
+
+    def debug_info(self, *args):
+        pass
+
+
+def message_item(data_id:str, content:str = 'Hello', time:str = '14:05') -> dict:
+    return {'kind': 'message', 'id': data_id, 'content': content, 'time': time}
+
+
+def receive(*items, pending:int = 0) -> list[tuple]:
+    """Polls the items once and returns the emitted events."""
+    client = FakeClient({'items': list(items), 'pending': pending, 'dropped': 0})
+    inbox = Inbox(client)
+    inbox.start()
+    inbox.poll()
+    inbox.stop()
+    return client.events
+
+
+def test_direct_message_is_sent_by_the_chat():
+    [(event, message)] = receive(message_item('conv-msg-false_905551234567@c.us_3EB0C4F2A1'))
+
+    assert event == ClientEvents.MESSAGE_RECEIVED
+    assert message.chat.phone_number == '905551234567'
+    assert message.id == '3EB0C4F2A1'
+    assert message.sender == '905551234567'
+    assert message.data_id == 'conv-msg-false_905551234567@c.us_3EB0C4F2A1'
+    assert message.content == 'Hello'
+    assert (message.time.hour, message.time.minute) == (14, 5)
+
+
+def test_group_message_is_sent_by_the_participant():
+    [(_, message)] = receive(message_item('conv-msg-false_120363041234567890@g.us_3EB0C4F2A1_905559876543@c.us'))
+
+    assert message.chat.phone_number == '120363041234567890'
+    assert message.id == '3EB0C4F2A1'
+    assert message.sender == '905559876543'
+
+
+def test_unread_chats_and_unreadable_items():
+    events = receive(
+        {'kind': 'unread', 'title': 'Alice', 'unread': '3', 'preview': 'Hi'},
+        message_item('conv-msg-false'),
+        message_item('conv-msg-false_905551234567@c.us_3EB0', time='yesterday'),
+    )
+
+    assert events[0] == (ClientEvents.CHAT_UNREAD, UnreadChat('Alice', 3, 'Hi'))
+    assert len(events) == 2
+    assert events[1][1].id == '3EB0'
+
+
+def test_poll_fetches_only_what_the_queue_can_take():
+    items = [message_item(f'conv-msg-false_905551234567@c.us_{index}') for index in range(2)]
+    client = FakeClient({'items': items, 'pending': 5, 'dropped': 1})
+    # The dispatcher is not started, so the queue stays full
+    inbox = Inbox(client, batch_size=50, max_queue_length=2)
+
+    assert inbox.poll() == INBOX_POLL_INTERVAL
+    assert client.browser.limits == [2]
+    assert len(inbox) == 2
+    assert inbox.dropped_count == 1
+
+    # Full: the page is not read and the poll does not block
+    assert inbox.poll() == INBOX_POLL_INTERVAL
+    assert client.browser.limits == [2]
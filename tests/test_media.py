@@ -0,0 +1,55 @@
+import os
+import time
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from whatsapp_py.media import MediaPreprocessor, prepare_image
+
+
+def save_image(path:str, size:tuple[int, int], gps:bool = False) -> str:
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    if gps:
+        exif[0x8825] = {2: (41.0, 0.0, 0.0)}
+    image.save(path, 'JPEG', exif=exif)
+    return path
+
+
+def test_small_image_without_metadata_is_not_processed(tmp_path):
+    path = save_image(str(tmp_path / 'small.jpg'), (100, 100))
+
+    assert prepare_image(path, str(tmp_path / 'cache'), max_dimension=200) == path
+
+
+def test_small_image_with_metadata_is_saved_without_it(tmp_path):
+    path = save_image(str(tmp_path / 'small.jpg'), (100, 100), gps=True)
+    cache_dir = str(tmp_path / 'cache')
+
+    output = prepare_image(path, cache_dir, max_dimension=200)
+    assert output != path
+    with Image.open(output) as image:
+        assert image.size == (100, 100)
+        assert len(image.getexif()) == 0
+    assert prepare_image(path, cache_dir, max_dimension=200) == output
+
+
+def test_large_image_is_downscaled(tmp_path):
+    path = save_image(str(tmp_path / 'large.jpg'), (400, 200))
+
+    with Image.open(prepare_image(path, str(tmp_path / 'cache'), max_dimension=200)) as image:
+        assert image.size == (200, 100)
+
+
+def test_prune_deletes_only_the_old_prepared_images(tmp_path):
+    preprocessor = MediaPreprocessor(cache_dir=str(tmp_path / 'cache'), max_age=60)
+    os.makedirs(preprocessor.cache_dir)
+    old = os.path.join(preprocessor.cache_dir, 'old.jpg')
+    new = os.path.join(preprocessor.cache_dir, 'new.jpg')
+    for path in (old, new):
+        open(path, 'wb').close()
+    os.utime(old, (time.time() - 120, time.time() - 120))
+
+    assert preprocessor.prune() == 1
+    assert os.listdir(preprocessor.cache_dir) == ['new.jpg']
@@ -0,0 +1,49 @@
+import time
+from unittest import mock
+
+from whatsapp_py.number_cache import NumberCache
+
+
+def test_numbers_are_keyed_by_their_digits():
+    cache = NumberCache()
+    cache.put('+90 (555) 123-45-67', False)
+
+    assert cache.is_invalid('905551234567')
+    assert cache.get('90 555 123 45 67') is False
+    assert cache.get('905550000000') is None
+    assert len(cache) == 1
+
+    cache.put('not a number', True)
+    assert len(cache) == 1
+
+
+def test_valid_and_invalid_numbers_expire_after_their_own_ttl():
+    cache = NumberCache(valid_ttl=100, invalid_ttl=10)
+    with mock.patch('whatsapp_py.number_cache.time.time', return_value=0):
+        cache.put('1', True)
+        cache.put('2', False)
+
+    with mock.patch('whatsapp_py.number_cache.time.time', return_value=50):
+        assert cache.get('1') is True
+        assert cache.get('2') is None
+    with mock.patch('whatsapp_py.number_cache.time.time', return_value=100):
+        assert cache.get('1') is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_numbers_survive_a_restart_until_they_expire(tmp_path):
+    path = str(tmp_path / 'numbers.db')
+    cache = NumberCache(path, valid_ttl=100, invalid_ttl=10, batch_size=100)
+    cache.put('1', True)
+    cache.put('2', False)
+    cache.put('3', True)
+    cache.pop('3')
+    cache.close()
+
+    with mock.patch('whatsapp_py.number_cache.time.time', return_value=time.time() + 50):
+        cache = NumberCache(path)
+    assert cache.get('1') is True
+    assert cache.get('2') is None
+    assert cache.get('3') is None
+    assert len(cache) == 1
+    cache.close()
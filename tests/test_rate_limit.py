@@ -0,0 +1,48 @@
+import pytest
+
+from whatsapp_py.rate_limit import RateLimiter, RateLimitScope, TokenBucket
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=2.0, burst=2)
+    now = bucket.updated_at
+    for _ in range(2):
+        assert bucket.wait_time(now) == 0.0
+        bucket.take()
+    assert bucket.wait_time(now) == pytest.approx(0.5)
+    assert bucket.wait_time(now + 0.5) == 0.0
+    assert bucket.wait_time(now + 10) == 0.0
+    assert bucket.tokens == 2
+
+
+def test_token_bucket_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, burst=1)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=0)
+
+
+def test_recipient_limit_ignores_the_number_format():
+    limiter = RateLimiter(global_rate=None, account_rate=None, recipient_rate=0.01, recipient_burst=1)
+
+    assert limiter.acquire(recipient='+90 555 123 45 67') is None
+    throttle = limiter.acquire(recipient='905551234567')
+    assert throttle is not None
+    assert throttle.scope == RateLimitScope.RECIPIENT
+    assert limiter.acquire(recipient='905550000000') is None
+
+
+def test_throttled_send_does_not_take_the_other_tokens():
+    limiter = RateLimiter(global_rate=0.01, global_burst=2, account_rate=None, recipient_rate=0.01, recipient_burst=1)
+
+    assert limiter.acquire(recipient='1') is None
+    assert limiter.acquire(recipient='1').scope == RateLimitScope.RECIPIENT
+    # The global token is still there for another recipient
+    assert limiter.acquire(recipient='2') is None
+    assert limiter.acquire(recipient='3').scope == RateLimitScope.GLOBAL
+    stats = limiter.stats
+    assert stats['acquired_count'] == 2
+    assert stats['throttled_count'] == 2
+    assert stats['throttled_recipient_count'] == 1
+    assert stats['throttled_global_count'] == 1
+
@@ -0,0 +1,76 @@
+import math
+from types import SimpleNamespace
+from unittest import mock
+
+from whatsapp_py.client_events import ClientEvents
+from whatsapp_py.const import RECEIPT_POLL_INTERVAL, RECEIPT_READ_POLL_INTERVAL
+from whatsapp_py.message import MessageSnapshot
+from whatsapp_py.receipts import MessageStatus, ReceiptTracker
+
+
+class FakeClient:
+    browser = None
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, *args):
+        self.events.append((event, *args))
+
+    def debug_info(self, *args):
+        pass
+
+
+def new_message(data_id:str):
+    return SimpleNamespace(data_id=data_id, status=None, set_snapshot=lambda snapshot: snapshot)
+
+
+def poll(tracker:ReceiptTracker, now:float, statuses:dict[str, str]):
+    fetch = lambda browser, data_ids: [MessageSnapshot(statuses.get(data_id)) for data_id in data_ids]
+    with mock.patch('whatsapp_py.receipts.Message.fetch_snapshots', fetch), \
+            mock.patch('whatsapp_py.receipts.time.monotonic', return_value=now):
+        return tracker.poll()
+
+
+def track(tracker:ReceiptTracker, message, now:float = 0):
+    with mock.patch('whatsapp_py.receipts.time.monotonic', return_value=now):
+        tracker.track(message)
+
+
+def test_read_message_fires_delivered_then_read():
+    client = FakeClient()
+    tracker = ReceiptTracker(client)
+    message = new_message('a')
+    track(tracker, message)
+
+    assert poll(tracker, 1, {'a': MessageStatus.READ}) == math.inf
+    assert client.events == [(ClientEvents.MESSAGE_DELIVERED, message), (ClientEvents.MESSAGE_READ, message)]
+    assert len(tracker) == 0
+
+
+def test_only_the_undelivered_messages_time_out():
+    client = FakeClient()
+    tracker = ReceiptTracker(client, timeout=10, read_timeout=100)
+    sending, delivered = new_message('sending'), new_message('delivered')
+    track(tracker, sending)
+    track(tracker, delivered)
+    statuses = {'sending': MessageStatus.SENDING, 'delivered': MessageStatus.DELIVERED}
+
+    assert poll(tracker, 1, statuses) == RECEIPT_POLL_INTERVAL
+    assert poll(tracker, 10, statuses) == RECEIPT_READ_POLL_INTERVAL
+    assert client.events == [(ClientEvents.MESSAGE_DELIVERED, delivered), (ClientEvents.MESSAGE_RECEIPT_TIMEOUT, sending)]
+
+    statuses['delivered'] = MessageStatus.READ
+    assert poll(tracker, 50, statuses) == math.inf
+    assert client.events[-1] == (ClientEvents.MESSAGE_READ, delivered)
+
+
+def test_delivered_message_is_dropped_after_the_read_timeout():
+    client = FakeClient()
+    tracker = ReceiptTracker(client, timeout=10, read_timeout=100)
+    message = new_message('a')
+    track(tracker, message)
+
+    assert poll(tracker, 1, {'a': MessageStatus.DELIVERED}) == RECEIPT_READ_POLL_INTERVAL
+    assert poll(tracker, 100, {}) == math.inf
+    assert client.events == [(ClientEvents.MESSAGE_DELIVERED, message)]
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import pytest
+
+from whatsapp_py.errors import PermanentSendError, TransientSendError
+from whatsapp_py.retry import RetryPolicy
+
+
+def test_delay_grows_exponentially_up_to_the_maximum():
+    policy = RetryPolicy(base_delay=2, max_delay=10, factor=2, jitter=0)
+
+    assert [policy.delay(attempts) for attempts in range(1, 6)] == [2, 4, 8, 10, 10]
+
+
+def test_delay_is_jittered_within_bounds():
+    policy = RetryPolicy(base_delay=10, max_delay=10, jitter=0.5)
+
+    for _ in range(100):
+        assert 5 <= policy.delay(1) <= 10
+
+
+def test_only_transient_errors_are_retried():
+    policy = RetryPolicy(max_attempts=3, base_delay=1, jitter=0)
+
+    assert policy.next_delay(SimpleNamespace(attempts=1), TransientSendError('upload failed')) == pytest.approx(1)
+    assert policy.next_delay(SimpleNamespace(attempts=1), PermanentSendError('invalid number')) is None
+    assert policy.next_delay(SimpleNamespace(attempts=1), ValueError()) is None
+
+
+def test_retries_stop_at_max_attempts():
+    policy = RetryPolicy(max_attempts=3, jitter=0)
+
+    assert policy.next_delay(SimpleNamespace(attempts=2), TransientSendError()) is not None
+    assert policy.next_delay(SimpleNamespace(attempts=3), TransientSendError()) is None
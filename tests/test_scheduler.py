@@ -0,0 +1,74 @@
+import math
+import threading
+
+from whatsapp_py.scheduler import Backoff, Scheduler
+
+
+def test_job_runs_periodically_and_stops():
+    scheduler = Scheduler().start()
+    ran = threading.Event()
+    runs = []
+
+    def job():
+        runs.append(1)
+        if len(runs) == 3:
+            ran.set()
+
+    scheduler.add_job(job, 0.01, delay=0)
+    assert ran.wait(2)
+    scheduler.stop(timeout=2)
+    assert not scheduler.is_running
+    assert scheduler.jobs == []
+
+
+def test_sleeping_job_runs_when_woken():
+    scheduler = Scheduler().start()
+    ran = threading.Event()
+
+    def job():
+        ran.set()
+        return math.inf
+
+    sleeping = scheduler.add_job(job, math.inf)
+    assert not ran.wait(0.1)
+    sleeping.wake()
+    assert ran.wait(2)
+    assert sleeping.run_count == 1
+    scheduler.stop(timeout=2)
+
+
+def test_errors_are_reported_and_the_job_keeps_running():
+    errors = []
+    ran = threading.Event()
+
+    def job():
+        if len(errors) < 2:
+            raise ValueError(len(errors))
+        ran.set()
+        return math.inf
+
+    scheduler = Scheduler(on_error=lambda job, error: errors.append((job.name, error))).start()
+    scheduler.add_job(job, 0.01, delay=0, name='failing')
+    assert ran.wait(2)
+    scheduler.stop(timeout=2)
+    assert [(name, type(error)) for name, error in errors] == [('failing', ValueError)] * 2
+
+
+def test_cancelled_job_does_not_run():
+    scheduler = Scheduler().start()
+    ran = threading.Event()
+    job = scheduler.add_job(ran.set, 0.05)
+    job.cancel()
+
+    assert not ran.wait(0.2)
+    assert job.is_cancelled
+    assert scheduler.next_run_in() == math.inf
+    scheduler.stop(timeout=2)
+
+
+def test_backoff_grows_up_to_the_maximum_until_reset():
+    backoff = Backoff(0.5, 5.0, 2.0)
+
+    assert [backoff.next() for _ in range(6)] == [0.5, 1.0, 2.0, 4.0, 5.0, 5.0]
+    backoff.reset()
+    assert backoff.next() == 0.5
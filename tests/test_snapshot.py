@@ -0,0 +1,76 @@
+from selenium.common.exceptions import TimeoutException
+
+from whatsapp_py.browser import DomObserver
+from whatsapp_py.css import CSS
+from whatsapp_py.snapshot import Snapshot
+
+
+def new_result(url:str = 'https://web.whatsapp.com/', present:tuple[str, ...] = (), progress=None) -> dict:
+    return {
+        'url': url,
+        'elements': [selector in present for selector in Snapshot.SELECTORS],
+        'progress': progress,
+    }
+
+
+class FakeBrowser:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def execute_async_script(self, script, *args, timeout=None):
+        self.calls.append((args, timeout))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_from_result_maps_the_elements_to_the_selectors():
+    snapshot = Snapshot.from_result(new_result(present=(CSS.APP, CSS.QR_CODE), progress=['30', '60']))
+
+    assert snapshot.url == 'https://web.whatsapp.com/'
+    assert snapshot.has_element(CSS.APP)
+    assert snapshot.has_element(CSS.QR_CODE)
+    assert not snapshot.has_element(CSS.LOADING_SCREEN)
+    assert snapshot.progress == ('30', '60')
+    assert snapshot.loading_percent == 50.0
+
+
+def test_from_result_of_an_unreachable_page_is_empty():
+    for result in (None, {}, {'url': None, 'elements': None, 'progress': None}):
+        snapshot = Snapshot.from_result(result)
+        assert snapshot.url == ''
+        assert not snapshot.has_element(CSS.APP)
+        assert snapshot.loading_percent == 0.0
+
+
+def test_loading_percent_ignores_invalid_progress():
+    assert Snapshot(progress=('1', '0')).loading_percent == 0.0
+    assert Snapshot(progress=(None, '10')).loading_percent == 0.0
+    assert Snapshot(progress=('a', '10')).loading_percent == 0.0
+
+
+def test_drain_returns_the_states_in_order_and_counts_the_dropped_ones():
+    first, second = new_result(present=(CSS.LOADING_SCREEN,)), new_result(present=(CSS.APP,))
+    browser = FakeBrowser(
+        {'states': [first, second], 'current': second, 'dropped': 2},
+        {'states': [], 'current': second, 'dropped': 0},
+    )
+    observer = DomObserver(browser, Snapshot.SELECTORS, CSS.LOADING_PROGRESS)
+
+    assert observer.drain(0.5) == [first, second]
+    assert observer.drain(0.5) == []
+    assert observer.current == second
+    assert observer.dropped_count == 2
+    # The timeout of the page script is in milliseconds, the call waits longer
+    assert browser.calls[0][0][-1] == 500
+    assert browser.calls[0][1] > 0.5
+
+
+def test_drain_timeout_returns_nothing():
+    observer = DomObserver(FakeBrowser(TimeoutException(), None), Snapshot.SELECTORS, CSS.LOADING_PROGRESS)
+
+    assert observer.drain(0.5) == []
+    assert observer.drain(0.5) == []
+    assert observer.current is None
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+from whatsapp_py.task import Task, TaskManager, TaskType
+
+
+class FakeClient:
+    def emit(self, *args):
+        pass
+
+
+def new_task(seconds:float = -1, priority:int = 0) -> Task:
+    return Task(FakeClient(), TaskType.SEND_MESSAGE, priority, datetime.now() + timedelta(seconds=seconds))
+
+
+def test_get_task_orders_by_priority_then_start_date():
+    manager = TaskManager()
+    first = new_task(-3)
+    second = new_task(-2)
+    urgent = new_task(-1, priority=5)
+    for task in (second, first, urgent):
+        manager.add_task(task)
+
+    order = []
+    while (task := manager.get_task()) is not None:
+        order.append(task)
+        task.is_done = True
+    assert order == [urgent, first, second]
+    assert len(manager) == 0
+
+
+def test_pending_task_is_not_due():
+    manager = TaskManager()
+    task = new_task(60)
+    manager.add_task(task)
+
+    assert manager.get_task() is None
+    assert not manager.has_due_task
+    assert manager.next_start_date == task.start_date
+    assert len(manager) == 1
+
+
+def test_removed_task_is_not_returned():
+    manager = TaskManager()
+    task = new_task()
+    manager.add_task(task)
+    manager.remove_task(task)
+
+    assert task.is_cancelled
+    assert manager.get_task() is None
+    assert len(manager) == 0
+
+
+def test_remove_and_add_again_keeps_one_entry():
+    manager = TaskManager()
+    task = new_task()
+    other = new_task(60)
+    manager.add_task(task)
+    manager.add_task(other)
+    manager.remove_task(task)
+    manager.add_task(task)
+
+    assert len(manager) == 2
+    assert manager.get_task() is task
+    task.is_done = True
+    # The stale entry of the first add is not returned again
+    assert manager.get_task() is None
+    assert len(manager) == 1
+    assert manager.tasks == [other]
+
+
+def test_add_twice_keeps_one_entry():
+    manager = TaskManager()
+    task = new_task()
+    manager.add_task(task)
+    manager.add_task(task)
+
+    assert len(manager) == 1
+    assert manager.get_task() is task
+    task.is_done = True
+    assert manager.get_task() is None
+
+
+def test_defer_task_moves_it_back_to_pending():
+    manager = TaskManager()
+    task = new_task()
+    manager.add_task(task)
+    assert manager.get_task() is task
+
+    manager.defer_task(task, datetime.now() + timedelta(seconds=60))
+    assert manager.current_task is None
+    assert manager.get_task() is None
+    assert manager.upcoming_tasks(5) == [task]
+    assert len(manager) == 1
+
+
+def test_get_task_by_group():
+    class GroupTask(Task):
+        def __init__(self, group:str, seconds:float):
+            super().__init__(FakeClient(), TaskType.SEND_MESSAGE, 0, datetime.now() + timedelta(seconds=seconds))
+            self.__group = group
+
+        @property
+        def group(self):
+            return self.__group
+
+    manager = TaskManager()
+    a1, b1, a2 = GroupTask('a', -3), GroupTask('b', -2), GroupTask('a', -1)
+    for task in (a1, b1, a2):
+        manager.add_task(task)
+
+    assert manager.get_task() is a1
+    a1.is_done = True
+    assert manager.has_due_task_in('a')
+    assert manager.get_task(group='a') is a2
+    a2.is_done = True
+    assert manager.get_task(group='a') is None
+    assert manager.get_task() is b1
+
+
+def test_tasks_setter_replaces_the_waiting_tasks():
+    manager = TaskManager()
+    old = new_task()
+    manager.add_task(old)
+    new = new_task(-2)
+    manager.tasks = [new]
+
+    assert old.is_cancelled
+    assert manager.tasks == [new]
+    assert manager.get_task() is new
+
+
+def test_removed_and_dead_lettered_tasks_are_released():
+    manager = TaskManager()
+    released = []
+    manager.on_task_released = released.append
+    removed = new_task()
+    failed = new_task()
+    manager.add_task(removed)
+    manager.add_task(failed)
+
+    manager.remove_task(removed)
+    manager.remove_task(removed)
+    manager.dead_letter(failed)
+
+    assert released == [removed, failed]
+    assert list(manager.dead_letters) == [failed]
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from whatsapp_py.task_store import TaskStore, TaskState
+
+
+def new_task(nonce:str, seconds:float = -1, file=None):
+    message = SimpleNamespace(
+        nonce=nonce, chat=SimpleNamespace(phone_number='905551234567'), content='Hello', file=file, media=None,
+        captions=None, id=None, error=None,
+    )
+    return SimpleNamespace(
+        message=message, priority=0, start_date=datetime.now() + timedelta(seconds=seconds), is_done=False, in_progress=False,
+    )
+
+
+def test_saved_tasks_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'tasks.db')
+    store = TaskStore(path, batch_size=100)
+    store.save(new_task('1', file=['/a.txt', '/b.txt']))
+    store.save(new_task('2', seconds=60))
+    store.save(new_task('1'))
+    store.close()
+
+    store = TaskStore(path)
+    pending = store.load(TaskState.PENDING)
+    assert [stored.nonce for stored in pending] == ['1', '2']
+    assert pending[0].file == ['/a.txt', '/b.txt']
+    assert [stored.nonce for stored in store.load(TaskState.PENDING, before=datetime.now())] == ['1']
+    store.close()
+
+
+def test_started_task_is_committed_right_away(tmp_path):
+    path = str(tmp_path / 'tasks.db')
+    store = TaskStore(path, batch_size=100)
+    task = new_task('1')
+    store.save(task)
+    task.in_progress = True
+    store.update(task)
+
+    # Read from another connection, as a restarted process would
+    other = TaskStore(path)
+    assert other.get('1').state == TaskState.STARTED
+    other.close()
+    store.close()
+
+
+def test_compact_deletes_only_old_completed_tasks(tmp_path):
+    store = TaskStore(str(tmp_path / 'tasks.db'))
+    for nonce in ('done', 'failed', 'pending'):
+        store.save(new_task(nonce))
+    done = new_task('done')
+    done.is_done = True
+    with mock.patch('whatsapp_py.task_store.time.time', return_value=0):
+        store.update(done)
+        store.fail('failed', 'error')
+
+    assert store.compact(retention=60) == 2
+    assert store.get('done') is None
+    assert store.get('failed') is None
+    assert store.get('pending').state == TaskState.PENDING
+    assert store.compact(retention=60) == 0
+    store.close()
+
+
+def test_calls_after_close_do_nothing(tmp_path):
+    path = str(tmp_path / 'tasks.db')
+    store = TaskStore(path)
+    task = new_task('1')
+    store.save(task)
+    task.in_progress = True
+    store.update(task)
+    store.close()
+
+    # e.g. a send that finished after the client was stopped
+    task.is_done = True
+    store.update(task)
+    store.save(new_task('2'))
+    store.flush()
+    store.close()
+    assert store.is_closed
+    # e.g. a task store job or a nonce check that overlapped the stop
+    assert store.get('1') is None
+    assert store.load(TaskState.STARTED) == []
+    assert store.compact() == 0
+
+    store = TaskStore(path)
+    assert store.get('1').state == TaskState.STARTED
+    store.close()
@@ -1,7 +1,22 @@
 from .browser import Browser
 from .client import Client, ClientEvents
-from .message import Message
+from .message import Message, MessageSnapshot
 from .chat import Chat
+from .chat_list import ChatListEntry
+from .snapshot import Snapshot
+from .cache import LRUCache
+from .composer import InputMode
+from .timing import StepTimer, TimingStats
+from .media import MediaPreprocessor
+from .upload import ThroughputEstimator, UploadProgress
+from .inbox import Inbox, UnreadChat
+from .number_cache import NumberCache
+from .number_check import NumberCheck, NumberChecker
+from .lookahead import LookAhead
+from .receipts import ReceiptTracker, MessageStatus
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy
+from .errors import SendError, TransientSendError, PermanentSendError
 from .task import Task, TaskType, MessageTask, TaskManager
 from .client_events import ClientEvents
 from .const import *
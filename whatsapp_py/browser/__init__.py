@@ -1 +1,2 @@
-from .browser import *
\ No newline at end of file
+from .browser import *
+from .dom_observer import DomObserver
\ No newline at end of file
@@ -16,8 +16,12 @@ from selenium.webdriver.support.events import EventFiringWebDriver
 #endregion
 
 from .event_listener import EventListener
+from ..scheduler import Scheduler, Job
+from ..const import WAIT_POLL_FREQUENCY
 
 WINDOW_CLOSED_MESSAGE_PREFIX = 'Unable to evaluate script: no such window: target window already closed'
+DEFAULT_SCRIPT_TIMEOUT = 30
+"""The script timeout of the WebDriver sessions in seconds, it applies to `execute_script` too."""
 
 class WebDriver:
     """WebDriver types."""
@@ -36,6 +40,7 @@ class Browser:
         user_data_dir (str): The path to the user data directory.
         starting_url (str): The URL to be opened when the browser is started.
         debug (bool): Whether to run the browser in debug mode.
+        scheduler (Scheduler): The scheduler that runs the screenshot loop. A new one is created when needed if not given.
     """
     __screenshot_path: str = 'screenshot.png'
     """The path to the screenshot file."""
@@ -49,13 +54,20 @@ class Browser:
             user_data_dir:str = None,
             starting_url:str = None,
             debug:bool = False,
+            scheduler:Scheduler = None,
         ) -> None:
         self.__WebDriver = WebDriver
         self.__headless = headless
         self.__user_data_dir = user_data_dir
         self.__starting_url = starting_url
         self.__debug = debug
+        self.__scheduler = scheduler
+        self.__owns_scheduler = False
+        self.__screenshot_job:Job = None
+        self.__script_lock = threading.Lock()
+        """Serializes the asynchronous scripts, the script timeout is shared by the session"""
 
+        self.__event_listener = EventListener()
         self.__webdriver_options:ChromeOptions = None
         self.__webdriver_options_init()
         self.__create_driver()
@@ -94,10 +106,24 @@ class Browser:
 
     def __create_driver(self):
         """Creates the WebDriver instance."""
-        self._driver = EventFiringWebDriver(self.__WebDriver(options=self.__webdriver_options), EventListener())
+        self._driver = EventFiringWebDriver(self.__WebDriver(options=self.__webdriver_options), self.__event_listener)
         if self.__starting_url:
             self._driver.get(self.__starting_url)
 
+
+    def add_interaction_listener(self, listener:Callable[[], None]) -> Self:
+        """Adds a function that is called after a navigation, a click or a value change (`send_keys`, `clear`).
+
+        * Can be used to invalidate the cached page state
+
+        Args:
+            listener (Callable[[], None]): The function to call.
+
+        Returns:
+            browser (Browser): The current browser instance.
+        """
+        self.__event_listener.interaction_listeners.append(listener)
+        return self
         
     def set_network_conditions(self, offline:bool = False, latency:int = 5, throughput:int = 500 * 1024, download_throughput:int = None, upload_throughput:int = None) -> Self:
         """Sets the network conditions.
@@ -129,25 +155,23 @@ class Browser:
         )
         return self
 
-    def __screenshot_loop(self):
-        """The screenshot loop."""
-        self.screenshot()
-        if self.__screenshot_interval > 0.0:
-            self.__screenshot_timer = threading.Timer(self.__screenshot_interval, self.__screenshot_loop)
-            self.__screenshot_timer.start()
-
     def start_screenshot_loop(self, interval:float = 0.5) -> Self:
         """Starts the screenshot loop.
 
+        * Runs as a job of the scheduler, restarts the loop if it is already running
+
         Args:
             interval (float, optional): The interval in seconds. Defaults to 0.5.
         
         Returns:
             browser (Browser): The current browser instance.
         """
-        self.__screenshot_interval = interval
-        self.__screenshot_timer = threading.Timer(self.__screenshot_interval, self.__screenshot_loop)
-        self.__screenshot_timer.start()
+        if self.__scheduler is None:
+            self.__scheduler = Scheduler(name='whatsapp_py-browser').start()
+            self.__owns_scheduler = True
+        if self.__screenshot_job is not None:
+            self.__screenshot_job.cancel()
+        self.__screenshot_job = self.__scheduler.add_job(self.screenshot, interval, name='screenshot')
         return self
     
     def stop_screenshot_loop(self) -> Self:
@@ -156,8 +180,9 @@ class Browser:
         Returns:
             browser (Browser): The current browser instance.
         """
-        self.__screenshot_interval = 0.0
-        self.__screenshot_timer.cancel()
+        if self.__screenshot_job is not None:
+            self.__screenshot_job.cancel()
+            self.__screenshot_job = None
         return self
     
     def screenshot(self, path:str = None) -> bool:
@@ -196,21 +221,27 @@ class Browser:
     def stop(self) -> bool:
         """Stops the browser.
 
+        * Stops the screenshot loop
+
         Returns:
             bool: True if the browser was stopped successfully, False otherwise.
         """
+        self.stop_screenshot_loop()
+        if self.__owns_scheduler:
+            self.__scheduler.stop()
         try:
             self._driver.quit()
             return True
         except:
             return False
 
-    def wait_until(self, method: Callable, timeout:int = 10) -> Any: 
+    def wait_until(self, method: Callable, timeout:int = 10, poll_frequency:float = WAIT_POLL_FREQUENCY) -> Any: 
         """Waits until the specified method returns a truthy value.
 
         Args:
             method (Callable: The method to wait for.
             timeout (int, optional): The timeout in seconds. Defaults to 10.
+            poll_frequency (float, optional): The interval between the calls in seconds. Defaults to [`WAIT_POLL_FREQUENCY`](../constants/#const.WAIT_POLL_FREQUENCY).
 
         Returns:
             result (Any): The result of the method.
@@ -218,14 +249,15 @@ class Browser:
         Raises:
             TimeoutException: If the method did not return a truthy value within the specified timeout.
         """
-        return WebDriverWait(self._driver, timeout).until(lambda _: method())
+        return WebDriverWait(self._driver, timeout, poll_frequency=poll_frequency).until(lambda _: method())
     
-    def wait_until_not(self, method: Callable, timeout:int = 10) -> Any:
+    def wait_until_not(self, method: Callable, timeout:int = 10, poll_frequency:float = WAIT_POLL_FREQUENCY) -> Any:
         """Waits until the specified method returns a falsy value.
 
         Args:
             method (Callable: The method to wait for.
             timeout (int, optional): The timeout in seconds. Defaults to 10.
+            poll_frequency (float, optional): The interval between the calls in seconds. Defaults to [`WAIT_POLL_FREQUENCY`](../constants/#const.WAIT_POLL_FREQUENCY).
 
         Returns:
             result (Any): The result of the method.
@@ -233,7 +265,7 @@ class Browser:
         Raises:
             TimeoutException: If the method did not return a falsy value within the specified timeout.
         """
-        return WebDriverWait(self._driver, timeout).until_not(lambda _: method())
+        return WebDriverWait(self._driver, timeout, poll_frequency=poll_frequency).until_not(lambda _: method())
 
     def find_element(self, css: str, parent:WebElement|Chrome=None) -> WebElement | None:
         """Finds the first element matching the specified CSS selector.
@@ -292,6 +324,45 @@ class Browser:
         """
         return self._driver.execute_script(script, *args)
 
+    def execute_async_script(self, script: str, *args:Any, timeout:float = DEFAULT_SCRIPT_TIMEOUT) -> Any:
+        """Executes the specified asynchronous JavaScript code, it returns by calling its last argument.
+
+        * The script timeout of the session is restored to [`DEFAULT_SCRIPT_TIMEOUT`](./#browser.browser.DEFAULT_SCRIPT_TIMEOUT) after the call
+        * The calls from different threads (e.g. the observer drain and a chat list scan) run one at a time, so one call cannot change the timeout of another
+
+        Args:
+            script (str): The JavaScript code.
+            args (Any): The arguments to pass to the JavaScript code.
+            timeout (float, optional): The maximum time to wait for the result in seconds. Defaults to [`DEFAULT_SCRIPT_TIMEOUT`](./#browser.browser.DEFAULT_SCRIPT_TIMEOUT).
+
+        Returns:
+            result (Any): The result of the JavaScript code.
+        """
+        with self.__script_lock:
+            self._driver.set_script_timeout(timeout)
+            try:
+                return self._driver.execute_async_script(script, *args)
+            finally:
+                if timeout != DEFAULT_SCRIPT_TIMEOUT:
+                    self._driver.set_script_timeout(DEFAULT_SCRIPT_TIMEOUT)
+
+    def insert_text(self, text: str) -> None:
+        """Inserts the text into the focused element with the DevTools `Input.insertText` command.
+
+        * Inserts the whole text at once, like an IME commit. No key events are sent.
+        * Only Chromium based browsers (Chrome, Edge) support it
+
+        Args:
+            text (str): The text to insert.
+
+        Raises:
+            NotImplementedError: If the WebDriver does not support DevTools commands.
+        """
+        driver = getattr(self._driver, 'wrapped_driver', self._driver)
+        if not hasattr(driver, 'execute_cdp_cmd'):
+            raise NotImplementedError(f'{type(driver).__name__} does not support DevTools commands.')
+        driver.execute_cdp_cmd('Input.insertText', {'text': text})
+
 
     @property
     def is_running(self) -> bool:
@@ -0,0 +1,125 @@
+from __future__ import annotations
+from typing import Any
+
+from selenium.common.exceptions import TimeoutException
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .browser import Browser
+
+INSTALL_SCRIPT = """
+const selectors = arguments[0];
+const progressSelector = arguments[1];
+const maxQueueLength = arguments[2];
+if (!window.__wpyDomObserver || window.__wpyDomObserver.key !== selectors.join('\\n')) {
+    if (window.__wpyDomObserver) window.__wpyDomObserver.observer.disconnect();
+    const state = { key: selectors.join('\\n'), queue: [], last: null, waiters: [], scheduled: false, dropped: 0 };
+    const read = () => {
+        const progress = document.querySelector(progressSelector);
+        return {
+            url: location.href,
+            elements: selectors.map(selector => document.querySelector(selector) !== null),
+            progress: progress ? [progress.getAttribute('value'), progress.getAttribute('max')] : null,
+        };
+    };
+    const flush = () => {
+        state.scheduled = false;
+        const current = read();
+        if (state.last !== null && JSON.stringify(current) === JSON.stringify(state.last)) return;
+        state.last = current;
+        state.queue.push(current);
+        if (state.queue.length > maxQueueLength) {
+            state.queue.shift();
+            state.dropped++;
+        }
+        state.waiters.splice(0).forEach(wake => wake());
+    };
+    state.observer = new MutationObserver(() => {
+        if (state.scheduled) return;
+        state.scheduled = true;
+        setTimeout(flush, 0);
+    });
+    state.observer.observe(document.documentElement, {
+        childList: true,
+        subtree: true,
+        attributes: true,
+        attributeFilter: ['value', 'max', 'data-ref', 'data-testid'],
+    });
+    window.__wpyDomObserver = state;
+    flush();
+}
+"""
+"""Installs the `MutationObserver` into the page if it is not installed yet.
+
+* The observer is lost on every navigation, so the drain script installs it again when needed
+"""
+
+DRAIN_SCRIPT = INSTALL_SCRIPT + """
+const timeout = arguments[3];
+const done = arguments[arguments.length - 1];
+const state = window.__wpyDomObserver;
+let finished = false;
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    clearTimeout(timer);
+    const dropped = state.dropped;
+    state.dropped = 0;
+    done({ states: state.queue.splice(0), current: state.last, dropped: dropped });
+};
+const timer = setTimeout(finish, timeout);
+if (state.queue.length > 0) finish();
+else state.waiters.push(finish);
+"""
+"""Waits until the observer queues a state change or the timeout is reached, then returns the queued states."""
+
+class DomObserver:
+    """Watches the presence of elements in the page with an in-page `MutationObserver`.
+
+    * State changes are queued in the page and fetched with a single long-poll script call (see [`drain`](./#browser.dom_observer.DomObserver.drain))
+    * Every queued state contains the url, the presence of each selector and the `value`/`max` attributes of the progress element
+
+    Args:
+        browser (Browser): The browser to observe.
+        selectors (list[str]): The CSS selectors to watch.
+        progress_selector (str): The CSS selector of a progress element whose attributes are reported.
+        max_queue_length (int, optional): The maximum number of states kept in the page. Oldest states are dropped first. Defaults to 100.
+    """
+    def __init__(self, browser:Browser, selectors:list[str], progress_selector:str, max_queue_length:int = 100):
+        self.browser = browser
+        self.selectors = list(selectors)
+        self.progress_selector = progress_selector
+        self.max_queue_length = max_queue_length
+        self.dropped_count = 0
+        """The number of states that were dropped in the page because they were not drained in time."""
+        self.current:dict[str, Any] = None
+        """The last known state of the page. Updated on every drain."""
+
+    def drain(self, timeout:float) -> list[dict[str, Any]]:
+        """Waits for the queued state changes and returns them in order.
+
+        * Installs the observer first if the page does not have it (e.g. after a navigation)
+        * Returns immediately if there are queued states, otherwise waits until a state change or the timeout
+        * WebDriver runs one command at a time, so other browser calls wait while this call is pending
+
+        Args:
+            timeout (float): The maximum time to wait in seconds.
+
+        Returns:
+            states (list[dict[str, Any]]): The queued states. Each state has `url`, `elements` and `progress` keys. Empty if nothing changed.
+
+        Raises:
+            Exception: If the script cannot be executed (e.g. the page is being loaded or the window is closed).
+        """
+        try:
+            result = self.browser.execute_async_script(
+                DRAIN_SCRIPT, self.selectors, self.progress_selector, self.max_queue_length, int(timeout * 1000),
+                timeout=timeout + 5,
+            )
+        except TimeoutException:
+            return []
+        if not result:
+            return []
+        self.dropped_count += result.get('dropped') or 0
+        self.current = result.get('current')
+        return result.get('states') or []
@@ -1,4 +1,34 @@
+from typing import Callable
+
 from selenium.webdriver.support.events import AbstractEventListener
 
 class EventListener(AbstractEventListener):
-    pass
\ No newline at end of file
+    """Listens to the WebDriver events and calls the interaction listeners after the page may have changed.
+
+    * Navigations (`get`, `back`, `forward`)
+    * Clicks
+    * Value changes (`send_keys`, `clear`)
+    """
+    def __init__(self) -> None:
+        self.interaction_listeners: list[Callable[[], None]] = []
+        """The functions that are called after an interaction."""
+
+    def _interacted(self) -> None:
+        """Calls the interaction listeners."""
+        for listener in self.interaction_listeners:
+            listener()
+
+    def after_navigate_to(self, url, driver) -> None:
+        self._interacted()
+
+    def after_navigate_back(self, driver) -> None:
+        self._interacted()
+
+    def after_navigate_forward(self, driver) -> None:
+        self._interacted()
+
+    def after_click(self, element, driver) -> None:
+        self._interacted()
+
+    def after_change_value_of(self, element, driver) -> None:
+        self._interacted()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+class LRUCache(Generic[K, V]):
+    """A thread-safe dictionary that keeps the most recently used items.
+
+    * The least recently used item is dropped when the cache is full
+    * `get` and `put` are `O(1)`
+
+    Args:
+        max_size (int): The maximum number of items.
+    """
+    def __init__(self, max_size:int):
+        self.max_size = max_size
+        self.hits = 0
+        """The number of `get` calls that found the key."""
+        self.misses = 0
+        """The number of `get` calls that did not find the key."""
+        self.__items:OrderedDict[K, V] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __contains__(self, key:K) -> bool:
+        return key in self.__items
+
+    def __str__(self):
+        return f"LRUCache({len(self)}/{self.max_size})"
+
+    def get(self, key:K, default:Any = None) -> V | Any:
+        """Returns the item and marks it as recently used.
+
+        Args:
+            key (K): The key of the item.
+            default (Any, optional): The value to return if the key is not found. Defaults to None.
+
+        Returns:
+            value (V | Any): The item if found, `default` otherwise.
+        """
+        with self.__lock:
+            if key not in self.__items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.__items.move_to_end(key)
+            return self.__items[key]
+
+    def put(self, key:K, value:V) -> None:
+        """Adds or replaces the item, drops the least recently used one if the cache is full.
+
+        Args:
+            key (K): The key of the item.
+            value (V): The item.
+        """
+        with self.__lock:
+            self.__items[key] = value
+            self.__items.move_to_end(key)
+            while len(self.__items) > self.max_size:
+                self.__items.popitem(last=False)
+
+    def pop(self, key:K, default:Any = None) -> V | Any:
+        """Removes the item.
+
+        Args:
+            key (K): The key of the item.
+            default (Any, optional): The value to return if the key is not found. Defaults to None.
+
+        Returns:
+            value (V | Any): The removed item if found, `default` otherwise.
+        """
+        with self.__lock:
+            return self.__items.pop(key, default)
+
+    def clear(self) -> None:
+        """Removes all the items."""
+        with self.__lock:
+            self.__items.clear()
@@ -1,18 +1,36 @@
 from __future__ import annotations
 
+import os
 import time
 from datetime import datetime, timedelta
 
 from .const import *
 from .helpers import *
 from .css import CSS
-from .message import Message
+from .message import Message, MessageSnapshot
+from .composer import type_text, COMPOSER_HAS_CONTENT_SCRIPT
+from .timing import StepTimer
+from .upload import UPLOAD_PROGRESS_SCRIPT, UploadProgress, file_size
+from .receipts import MessageStatus
+from .client_events import ClientEvents
+from .errors import SendError, TransientSendError, PermanentSendError
 from .task import MessageTask
+from .task_store import TaskState
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 if TYPE_CHECKING:
     from .client import Client
 
+class ChatInfo(NamedTuple):
+    """The verified identity of a chat, cached by [`Client.is_chat_open`](../client/#client.Client.is_chat_open).
+
+    Attributes:
+        title (str): The title of the chat header (e.g. the contact name).
+        jid (str): The WhatsApp id of the chat (e.g. `905551234567@c.us`). `None` if the chat has no messages.
+    """
+    title: str
+    jid: str
+
 class Chat:
     """Represents a chat in WhatsApp Web
     
@@ -29,6 +47,9 @@ class Chat:
     phone_number:str = None
     """The phone number of the chat"""
 
+    title:str = None
+    """The title of the chat in the chat list of WhatsApp Web (e.g. the contact name). Known after the chat is opened in app"""
+
     def __init__(self, client:Client, phone_number):
         self.client = client
         self.phone_number = phone_number
@@ -66,12 +87,20 @@ class Chat:
     def open(self) -> bool:
         """Calls [`Client.load_chat_page`](../client/#client.Client.load_chat_page) with the chat's instance
 
+        * Tries [`Client.open_chat_in_app`](../client/#client.Client.open_chat_in_app) first if `in_app_navigation` is enabled
         * Waits until chat page is loaded
+        * Saves whether the number is on WhatsApp to the [`number_cache`](../client/#client.Client.number_cache) of the client
 
         Returns:
             is_open (bool): Whether the chat is open or not
         """
         self._is_loading = True
+        if self.client.in_app_navigation and self.client.open_chat_in_app(self):
+            self.debug_info('Chat opened in app.')
+            self._is_loading = False
+            self.client.number_cache.put(self.phone_number, True)
+            return True
+
         self.client.load_chat_page(self)
         
         # if retry_until_true(lambda: self.client.has_confirm_popup):
@@ -99,6 +128,7 @@ class Chat:
         if self.client.has_confirm_popup_ok:
             self.client.confirm_popup()
             self.is_phone_number_invalid = True
+            self.client.number_cache.put(self.phone_number, False)
             self.debug_info('Invalid phone number.')
             return False
 
@@ -115,26 +145,49 @@ class Chat:
             self.debug_error('Unable to open chat.')
             return False
         
+        self.client.number_cache.put(self.phone_number, True)
         return True
     
-    def send_message(self, content:str=None, file:str=None, media:str=None, delay:timedelta = None, at_time:datetime=None, nonce:str=str(datetime.now().timestamp())) -> Message:
+    def send_message(self, content:str=None, file:str|list[str]=None, media:str|list[str]=None, delay:timedelta = None, at_time:datetime=None, nonce:str=None, captions:list[str]=None) -> Message:
         """Sends a message to the chat
 
         Parameters:
             content (str, optional): The content of the message
-            file (str, optional): The path to the file to send
-            media (str, optional): The path to the media to send
+            file (str | list[str], optional): The path to the file to send, or the paths of the files to send together
+            media (str | list[str], optional): The path to the media to send, or the paths of the media to send together as an album
             delay (timedelta, optional): The delay before sending the message
             at_time (datetime, optional): The time to send the message
-            nonce (str, optional): The nonce of the message. 
+            nonce (str, optional): The nonce of the message. A unique one is generated if not given.
+            captions (list[str], optional): The captions of the files or media, in the same order. Cannot be used with `content`.
             
         !!!info
             `nonce` can be used to identify the message later (e.g. on `ClientEvent.TASK_COMPLETED`)
 
+        !!!info
+            With a [`task_store`](../client/#client.Client.task_store), a known `nonce` is not scheduled again:
+            
+            * The queued message is returned if it is waiting
+            * A message with the stored `id` and `error` is returned if it was sent or failed before
+
+        !!!info
+            With a [`task_store`](../client/#client.Client.task_store), a message scheduled later than [`TASK_STORE_WINDOW`](../constants/#const.TASK_STORE_WINDOW) seconds is only saved to the store, so the far future messages do not fill the memory. It is loaded back when it is due soon, the returned message is not updated then: use its `nonce` to identify it.
+
         Returns:
             message (Message): The message that was sent
         """
-        message = Message(chat=self, content=content, file=file, media=media, time=None, nonce=nonce)
+        message = Message(chat=self, content=content, file=file, media=media, time=None, nonce=nonce, captions=captions)
+
+        if nonce is not None and self.client.task_store is not None:
+            queued = self.client.task_manager.get_task_by_nonce(nonce)
+            if queued is not None:
+                self.debug_info(f"Message is already scheduled: {queued}")
+                return queued.message
+            stored = self.client.task_store.get(nonce)
+            if stored is not None and stored.state != TaskState.PENDING:
+                message.set_id(stored.message_id)
+                message.error = stored.error
+                self.debug_info(f"Message is already {stored.state}: {message}")
+                return message
         task = MessageTask(client=self.client, message=message)
 
         if at_time is not None:
@@ -143,42 +196,90 @@ class Chat:
         if delay is not None:
             task.start_date += delay
 
+        if self.client.task_store is not None and task.start_date > datetime.now() + timedelta(seconds=TASK_STORE_WINDOW):
+            # Loaded by the task store job of the client when it is due soon
+            self.client.task_store.save(task)
+            self.debug_info(f"Message stored: {task}")
+            return message
+
         self.client.task_manager.add_task(task)
         self.debug_info(f"Message scheduled: {task}")
 
         return message
         
     
-    def _send_message(self, message:Message) -> Message:
+    def _send_message(self, message:Message, check_open:bool = True, wait_delivery:bool = True) -> Message:
         """Sends a message to the chat (internal)
 
+        * Errors before the send button is clicked are transient unless they are known to be permanent, the message was not sent
+        * Errors after the send button is clicked are permanent, the message may have been sent
+        * The duration of each step is saved to `message.timings` and added to [`Client.send_timings`](../client/#client.Client.send_timings)
+
         Parameters:
             message (Message): The message to send
+            check_open (bool, optional): Whether to check if the chat is open. `False` when the previous message of a burst is sent to this chat. Defaults to True.
+            wait_delivery (bool, optional): Whether to wait until the message is delivered. `False` for the tasks, their delivery is tracked in the background. Defaults to True.
         
         Returns:
             message (Message): The message that was sent
+
+        Raises:
+            TransientSendError: If the message was not sent and it can be tried again
+            PermanentSendError: If the message cannot be sent or it may have been sent
         """
-        if self.is_phone_number_invalid:
-            raise Exception(f"Invalid phone number.")
+        timer = StepTimer(self.client.send_timings)
+        message.timings = timer.durations
+        try:
+            last_sent_message_data, upload_size = self.__compose_message(message, timer, check_open)
+        except SendError:
+            raise
+        except Exception as e:
+            raise TransientSendError(str(e)) from e
+
+        try:
+            return self.__confirm_message(message, last_sent_message_data, upload_size, timer, wait_delivery)
+        except SendError:
+            raise
+        except Exception as e:
+            raise PermanentSendError(f"Message may have been sent: {e}") from e
+
+    def __compose_message(self, message:Message, timer:StepTimer, check_open:bool = True) -> tuple[str, int]:
+        """Opens the chat, types the content and uploads the file of the message
+
+        * Waits for the previews of the files up to a timeout that scales with their size (see [`ThroughputEstimator`](../upload/#upload.ThroughputEstimator))
+
+        Parameters:
+            message (Message): The message to send
+            timer (StepTimer): The timer of the steps
+            check_open (bool, optional): Whether to check if the chat is open. Defaults to True.
+
+        Returns:
+            last_sent_message_data (str): The `data-id` of the last sent message before sending this one
+            upload_size (int): The total size of the uploaded files in bytes, `0` if there is none
+        """
+        if self.is_phone_number_invalid or self.client.number_cache.is_invalid(self.phone_number):
+            raise PermanentSendError(f"Invalid phone number.")
             self.debug_error(f"Invalid phone number. Please don't use this chat object anymore.")
             return
 
-        if not self.is_open:
-            self.debug_info(f"Chat is not open. Opening chat to send message.")
-            _success = self.open()
+        with timer.step('open'):
+            _success = not check_open or self.is_open
+            if not _success:
+                self.debug_info(f"Chat is not open. Opening chat to send message.")
+                _success = self.open()
             if not _success:
                 if self.is_phone_number_invalid:
-                    raise Exception(f"Invalid phone number.")
+                    raise PermanentSendError(f"Invalid phone number.")
                     self.debug_error(f"Invalid phone number. Please don't use this chat object anymore.")
                 else:
-                    raise Exception(f"Unable to open chat.")
+                    raise TransientSendError(f"Unable to open chat.")
                     self.debug_error(f"Unable to open chat. Please report this issue.")
                 return
         
         # Send message
         chat_input = self.client.browser.find_element(CSS.CHAT_INPUT)
         if chat_input is None:
-            raise Exception(f"Chat input box not found.")
+            raise TransientSendError(f"Chat input box not found.")
             self.debug_error(f"Chat input box not found. Please report this issue.")
             return
 
@@ -186,55 +287,122 @@ class Chat:
         self.debug_info(f"Last sent message data: {last_sent_message_data}")
 
         chat_input.clear()
+        upload_size = 0
 
         if message.content is not None:
             self.debug_info(f"Typing message content: {message.content}")
-            chat_input.send_keys(message.content)
-            time.sleep(0.1)
+            with timer.step('type'):
+                type_text(self.client.browser, chat_input, message.content, self.client.input_mode)
+            with timer.step('commit'):
+                try:
+                    # The editor applies the input asynchronously
+                    self.client.browser.wait_until(lambda: self.client.browser.execute_script(COMPOSER_HAS_CONTENT_SCRIPT, chat_input), timeout=COMPOSE_TIMEOUT)
+                except:
+                    self.debug_info(f"Composer content is not committed in {COMPOSE_TIMEOUT}s.")
+
+        if len(message.attachments) > 0:
+            paths = message.attachments
+            if self.client.media_preprocessor is not None and message.media is not None:
+                with timer.step('preprocess'):
+                    paths = self.client.media_preprocessor.resolve(message)
+            for path in paths:
+                if not os.path.isfile(path):
+                    raise PermanentSendError(f"File not found: {path}")
 
-        if message.file is not None or message.media is not None:
             clip_buttton = self.client.browser.find_element(CSS.CLIP_BUTTON)
             if clip_buttton is None:
-                raise Exception(f"Clip button not found.")
+                raise TransientSendError(f"Clip button not found.")
                 self.debug_error(f"Clip button not found. Please report this issue.")
                 return
             
             clip_buttton.click()
 
-            self.debug_info(f"Uploading: {message.file}")
+            self.debug_info(f"Uploading: {paths}")
             document_input = self.client.browser.find_element(CSS.DOCUMENT_INPUT if message.file is not None else CSS.MEDIA_INPUT)
             if document_input is None:
-                raise Exception(f"File selection input not found.")
+                raise TransientSendError(f"File selection input not found.")
                 self.debug_error(f"File selection input not found. Please report this issue.")
                 return
             
             self.client.browser.execute_script("arguments[0].style.display = 'block';", document_input)
             
             try:
-                document_input.send_keys(message.file if message.file is not None else message.media)
+                # The input accepts multiple files, all of them are selected at once
+                document_input.send_keys("\n".join(paths))
             except Exception as e:
-                raise Exception(f"File not found: {message.file if message.file is not None else message.media}")
-                self.debug_error(f"File not found: {message.file if message.file is not None else message.media}")
+                raise TransientSendError(f"File selection failed: {paths}")
+                self.debug_error(f"File selection failed: {paths}")
                 return
             
+            upload_size = file_size(paths)
             try:
-                self.client.browser.wait_until(lambda: self.client.browser.find_element(CSS.MEDIA_CAPTION), timeout=10)
+                with timer.step('upload'):
+                    timeout = max(UPLOAD_MIN_TIMEOUT * len(paths), self.client.upload_throughput.timeout_for(upload_size))
+                    self.client.browser.wait_until(lambda: self.__is_preview_ready(len(paths)), timeout=timeout)
             except:
-                raise Exception(f"File upload failed.")
+                raise TransientSendError(f"File upload failed.")
                 self.debug_error(f"File upload failed. Please report this issue.")
                 return
 
+            if message.captions is not None:
+                with timer.step('captions'):
+                    self.__type_captions(message.captions)
+
+        return last_sent_message_data, upload_size
+
+    def __is_preview_ready(self, count:int) -> bool:
+        """Checks if the caption box and the thumbnails of all the selected files are shown"""
+        if self.client.browser.find_element(CSS.MEDIA_CAPTION) is None:
+            return False
+        # The thumbnails are not shown for a single file
+        return count == 1 or len(self.client.browser.find_elements(CSS.MEDIA_THUMBNAIL)) >= count
+
+    def __type_captions(self, captions:list[str]) -> None:
+        """Selects the preview of each file and types its caption
+
+        Parameters:
+            captions (list[str]): The captions in the order of the files, `None` items are skipped
+        """
+        thumbnails = self.client.browser.find_elements(CSS.MEDIA_THUMBNAIL)
+        for index, caption in enumerate(captions):
+            if caption is None:
+                continue
+            if len(captions) > 1 or len(thumbnails) > 1:
+                if index >= len(thumbnails):
+                    raise TransientSendError(f"Preview of the file {index + 1} not found.")
+                thumbnails[index].click()
+            try:
+                self.client.browser.wait_until(lambda: self.client.browser.find_element(CSS.MEDIA_CAPTION), timeout=COMPOSE_TIMEOUT)
+            except:
+                raise TransientSendError(f"Caption box of the file {index + 1} not found.")
+            caption_input = self.client.browser.find_element(CSS.MEDIA_CAPTION)
+            type_text(self.client.browser, caption_input, caption, self.client.input_mode)
+
+    def __confirm_message(self, message:Message, last_sent_message_data:str, upload_size:int, timer:StepTimer, wait_delivery:bool = True) -> Message:
+        """Clicks the send button and waits until the message is sent
+
+        * Waits until the files are uploaded if there is any (see `__wait_for_upload`)
+
+        Parameters:
+            message (Message): The message to send
+            last_sent_message_data (str): The `data-id` of the last sent message before sending this one
+            upload_size (int): The total size of the uploaded files in bytes, `0` if there is none
+            timer (StepTimer): The timer of the steps
+            wait_delivery (bool, optional): Whether to wait until the message is delivered. Defaults to True.
 
-        el_send_button = self.client.browser.find_element(CSS.SEND_BUTTON)
-        if el_send_button is None:
-            raise Exception(f"Send button not found.")
+        Returns:
+            message (Message): The message that was sent
+        """
+        try:
+            with timer.step('send_button'):
+                el_send_button = self.client.browser.wait_until(lambda: self.client.browser.find_element(CSS.SEND_BUTTON), timeout=COMPOSE_TIMEOUT)
+        except:
+            raise TransientSendError(f"Send button not found.")
             self.debug_error(f"Send button not found. Please report this issue.")
             return
         
         el_send_button.click()
-
-        # Wait for message to be sent
-        time.sleep(0.2)
+        clicked_at = time.monotonic()
         
         # if message.content is not None:
         #     try:
@@ -248,9 +416,10 @@ class Chat:
         # wait until last_sent_message_data is updated
         self.debug_info(f"Waiting for message to be sent... {message}")
         try:
-            self.client.browser.wait_until(lambda: self.client.last_sent_message_data != last_sent_message_data, timeout=20)
+            with timer.step('sent'):
+                self.client.browser.wait_until(lambda: self.client.last_sent_message_data != last_sent_message_data, timeout=20)
         except:
-            raise Exception(f"Unable to send message.")
+            raise PermanentSendError(f"Unable to send message. Message may have been sent.")
             self.debug_error(f"Unable to send message. Please report this issue.")
             return
         
@@ -266,24 +435,104 @@ class Chat:
         message.set_id(message_id) \
             .set_time(datetime.now()) \
             .set_element(self.client.get_message_from_data(last_sent_message_data))
+        message.data_id = last_sent_message_data
 
-        if message.content is not None:
+        # The last row of an album is its last file, the content is the caption of the first one
+        if message.content is not None and not message.is_album:
             el_message_content = message.el_content # self.client.browser.find_element(CSS.LAST_MESSAGE_CONTENT)
             if el_message_content.text != message.content:
-                raise Exception(f"Message content does not match.")
+                raise PermanentSendError(f"Message content does not match.")
                 self.debug_error(f"Error: Message content does not match. Please report this issue."\
                     f"\n\t└─╴ Expected: {message.content}"\
                     f"\n\t└─╴ Actual: {el_message_content.text}")
                 return
+
+        if upload_size > 0:
+            with timer.step('transfer'):
+                self.__wait_for_upload(message, upload_size, clicked_at)
         
+        if wait_delivery:
+            with timer.step('delivery'):
+                self._wait_for_delivery([message])
+
+        # message = Message(chat=self, id=message_id, content=content, file=None, media=None, time=None)
+        self.debug_info(f"Message: {message}")
+        return message
+
+    def __wait_for_upload(self, message:Message, size:int, clicked_at:float) -> None:
+        """Waits until the upload of the sent message is completed
+
+        * The upload is completed when the progress indicator was shown and is gone, or when the status of the message is past `MessageStatus.SENDING` (the server has the files)
+        * A missing indicator alone is not enough, it may not be rendered yet
+        * Emits `ClientEvents.UPLOAD_PROGRESS` when the progress changes and when the upload is completed
+        * The timeout scales with the size and the estimated throughput, the completed upload is added to the estimate
+
+        Parameters:
+            message (Message): The sent message, its `data_id` is set
+            size (int): The total size of the uploaded files in bytes
+            clicked_at (float): The `time.monotonic()` value when the send button is clicked
+
+        Raises:
+            PermanentSendError: If the upload is not completed in time, the message may have been sent
+        """
+        timeout = self.client.upload_throughput.timeout_for(size)
+        last_percent = None
+        is_progress_seen = False
+
+        def is_uploaded() -> bool:
+            nonlocal last_percent, is_progress_seen
+            result = self.client.browser.execute_script(UPLOAD_PROGRESS_SCRIPT, message.data_id, CSS._UPLOAD_PROGRESS, CSS._META_STATUS)
+            if not result:
+                return False
+            if result.get('status') in (MessageStatus.DELIVERED, MessageStatus.READ):
+                return True
+            if not result['active']:
+                return is_progress_seen
+            is_progress_seen = True
+            progress = UploadProgress.from_result(result, size, time.monotonic() - clicked_at)
+            if progress.percent is not None and progress.percent != last_percent:
+                last_percent = progress.percent
+                self.client.emit(ClientEvents.UPLOAD_PROGRESS, message, progress)
+            return False
+
+        try:
+            self.client.browser.wait_until(is_uploaded, timeout=timeout)
+        except:
+            raise PermanentSendError(f"Upload is not completed in {timeout:.0f}s. Message may have been sent.")
+
+        elapsed = time.monotonic() - clicked_at
+        self.client.upload_throughput.add(size, elapsed)
+        self.client.emit(ClientEvents.UPLOAD_PROGRESS, message, UploadProgress(size, 100.0, elapsed))
+        self.debug_info(f"Uploaded {size} bytes in {elapsed:.1f}s. {self.client.upload_throughput}")
+
+    def __refresh_messages(self, messages:list[Message]) -> list[Message]:
+        """Refreshes the snapshots of the messages with a single script call (see [`Message.fetch_snapshots`](../message/#message.Message.fetch_snapshots))"""
+        snapshots = Message.fetch_snapshots(self.client.browser, [message.data_id for message in messages])
+        for message, snapshot in zip(messages, snapshots):
+            message.set_snapshot(snapshot if snapshot is not None else MessageSnapshot(taken_at=time.monotonic()))
+        return messages
+
+    def _wait_for_delivery(self, messages:list[Message], timeout:int = 30) -> bool:
+        """Waits until the sent messages are delivered or read (internal)
+
+        * Used when a message is sent with `wait_delivery`. The task job does not wait, it tracks the delivery with the [`ReceiptTracker`](../receipts/#receipts.ReceiptTracker)
+        * Does not raise, the messages may have been sent even if they are not delivered in time
+
+        Parameters:
+            messages (list[Message]): The sent messages
+            timeout (int, optional): The timeout in seconds for all the messages. Defaults to 30.
+
+        Returns:
+            sent_in_time (bool): Whether all the messages are delivered in time or not
+        """
         try:
             self.client.browser.wait_until(
                 # msg-time || msg-check || msg-dblcheck
                 # Sending  || Delivered || Read
                 # lambda: self.client.browser.find_element(CSS.LAST_MESSAGE_STATUS).get_attribute('data-testid') in ['msg-check', 'msg-dblcheck'],
                 # lambda: message.element_status.get_attribute('data-testid') in ['msg-check', 'msg-dblcheck'],
-                lambda: message.is_delivered_w or message.is_read_w,
-                timeout=30,
+                lambda: all(message.is_delivered_w or message.is_read_w for message in self.__refresh_messages(messages)),
+                timeout=timeout,
             )
             sent_in_time = True
         except:
@@ -293,10 +542,7 @@ class Chat:
             self.debug_error(f"Message could not be sent in time due to slow internet connection."\
                 f"\n\t└─╴ Message may have been sent. Please check your WhatsApp to make sure.")
         else:
-            self.debug_info(f"Message sent successfully.")
-
-        # message = Message(chat=self, id=message_id, content=content, file=None, media=None, time=None)
-        self.debug_info(f"Message: {message}")
-        return message
+            self.debug_info(f"Message sent successfully." if len(messages) == 1 else f"{len(messages)} messages sent successfully.")
+        return sent_in_time
 
 
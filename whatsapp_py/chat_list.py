@@ -0,0 +1,84 @@
+from __future__ import annotations
+from typing import NamedTuple
+
+CHAT_LIST_SCAN_SCRIPT = """
+const [paneSelector, rowSelector, titleSelector, unreadSelector, previewSelector, timeSelector, avatarSelector, maxChats, unreadOnly, stepDelay, timeout] = arguments;
+const done = arguments[arguments.length - 1];
+const pane = document.querySelector(paneSelector);
+if (pane === null) return done(null);
+const deadline = Date.now() + timeout;
+const text = (parent, selector) => {
+    const element = parent.querySelector(selector);
+    return element === null ? null : (element.getAttribute('title') || element.innerText);
+};
+const normalize = title => /^[+\\d\\s()-]+$/.test(title) ? title.replace(/\\D/g, '') : null;
+const chats = new Map();
+let count = 0;
+const read = () => {
+    pane.querySelectorAll(rowSelector).forEach(row => {
+        const title = text(row, titleSelector);
+        if (title === null) return;
+        let jid = null;
+        const avatar = row.querySelector(avatarSelector);
+        const match = avatar === null ? null : /[?&]u=([^&]+)/.exec(avatar.getAttribute('src') || '');
+        if (match) jid = decodeURIComponent(match[1]);
+        const digits = normalize(title);
+        if (jid === null && digits) jid = `${digits}@c.us`;
+        const key = jid || title;
+        if (chats.has(key)) return;
+        const badge = row.querySelector(unreadSelector);
+        const unread = badge === null ? 0 : (parseInt(badge.innerText, 10) || 1);
+        if (unreadOnly && unread === 0) return chats.set(key, null);
+        chats.set(key, [title, jid, unread, text(row, previewSelector), text(row, timeSelector)]);
+        count++;
+    });
+};
+const scrollTop = pane.scrollTop;
+const finish = () => {
+    pane.scrollTop = scrollTop;
+    done(Array.from(chats.values()).filter(chat => chat !== null).slice(0, maxChats));
+};
+const step = () => {
+    read();
+    const isEnd = pane.scrollTop + pane.clientHeight >= pane.scrollHeight - 1;
+    if (isEnd || count >= maxChats || Date.now() >= deadline) return finish();
+    // The list is virtualized, the rows are rendered while it is scrolled
+    pane.scrollTop += Math.max(1, Math.floor(pane.clientHeight * 0.8));
+    setTimeout(step, stepDelay);
+};
+pane.scrollTop = 0;
+setTimeout(step, stepDelay);
+"""
+"""Scrolls the chat list from the top to the bottom in a single `execute_async_script` call and returns the rows, deduplicated by JID (or by title if the JID is not known).
+
+* The scroll position is restored at the end
+* Returns the chats read so far when `maxChats` chats are read or the `timeout` (milliseconds) is reached
+"""
+
+class ChatListEntry(NamedTuple):
+    """A chat of the chat list (see [`Client.scan_chat_list`](../client/#client.Client.scan_chat_list)).
+
+    Attributes:
+        title (str): The title of the chat (the contact name, the group name or the phone number).
+        jid (str): The WhatsApp id of the chat (e.g. `905551234567@c.us`). `None` if it cannot be read from the row (e.g. a saved contact without a profile photo).
+        unread (int): The number of the unread messages. `0` if there is none.
+        preview (str): The preview of the last message. `None` if it is not shown.
+        time (str): The time of the last message as shown in the list (e.g. `14:05`, `Yesterday`).
+    """
+    title: str
+    jid: str
+    unread: int
+    preview: str
+    time: str
+
+    @property
+    def phone_number(self) -> str | None:
+        """The phone number of the chat. `None` for the groups and the chats without a known JID."""
+        if self.jid is None or not self.jid.endswith('@c.us'):
+            return None
+        return self.jid.split('@')[0]
+
+    @property
+    def is_group(self) -> bool:
+        """Whether the chat is a group."""
+        return self.jid is not None and self.jid.endswith('@g.us')
@@ -1,4 +1,8 @@
-from typing import Callable
+import time
+import threading
+from typing import Any, Callable
+
+from .const import *
 
 class Check:
     """Contains all the check types that are used to check if the check is true or not."""
@@ -23,4 +27,68 @@ class Check:
     @staticmethod
     def remove_first_check(name: str):
         if name in Check.true_once:
-            Check.true_once.remove(name)
\ No newline at end of file
+            Check.true_once.remove(name)
+
+class CheckCache:
+    """Memoizes the results of the check functions for a short time.
+
+    * Nested check functions (e.g. `has_confirm_popup_ok` -> `has_confirm_popup` -> `is_whatsapp_ready`) are computed once per tick
+    * [`Client`](../client/#client.Client) invalidates the cache when a new snapshot is taken and after navigations, clicks and `send_keys`
+
+    Args:
+        ttl (float, optional): The time to live of the results in seconds. Defaults to [`CHECK_CACHE_TTL`](../constants/#const.CHECK_CACHE_TTL).
+    """
+    def __init__(self, ttl:float = CHECK_CACHE_TTL):
+        self.ttl = ttl
+        """The time to live of the results in seconds."""
+        self.hits = 0
+        """The number of results that were returned from the cache."""
+        self.misses = 0
+        """The number of results that were computed."""
+        self.__values: dict[str, tuple[float, Any]] = {}
+        self.__generation = 0
+        self.__lock = threading.Lock()
+
+    def get(self, type:str, compute:Callable[[], Any]) -> Any:
+        """Returns the cached result of the check or computes it.
+
+        Args:
+            type (str): The type of the check function.
+            compute (Callable[[], Any]): The function that computes the result.
+
+        Returns:
+            result (Any): The result of the check.
+        """
+        with self.__lock:
+            cached = self.__values.get(type)
+            if cached is not None and time.monotonic() - cached[0] < self.ttl:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            generation = self.__generation
+        # Computed outside the lock, so nested checks can use the cache too
+        computed_at = time.monotonic()
+        value = compute()
+        with self.__lock:
+            # Do not cache a result that was computed before an invalidation
+            if generation == self.__generation:
+                self.__values[type] = (computed_at, value)
+        return value
+
+    def invalidate(self):
+        """Removes all the cached results."""
+        with self.__lock:
+            self.__generation += 1
+            self.__values.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        """The ratio of the results that were returned from the cache.
+
+        Returns:
+            hit_ratio (float): Between `0.0` and `1.0`. `0.0` if nothing was checked yet.
+        """
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
@@ -1,19 +1,40 @@
 import os
+import math
 import time
 import threading
-from typing import Callable
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Iterable
 
 import qrcode
+from selenium.webdriver.common.keys import Keys
 
 from .event_emitter import EventEmitter
 from .const import *
 from .helpers import *
 from .css import CSS
-from .chat import Chat
-from .browser import Browser, WebDriver
+from .chat import Chat, ChatInfo
+from .chat_list import CHAT_LIST_SCAN_SCRIPT, ChatListEntry
+from .cache import LRUCache
+from .composer import InputMode
+from .timing import TimingStats
+from .receipts import ReceiptTracker
+from .browser import Browser, WebDriver, DomObserver
 from .browser import WebElement
-from .check import Check
-from .task import TaskManager
+from .check import Check, CheckCache
+from .snapshot import Snapshot
+from .scheduler import Scheduler, Job, Backoff
+from .message import Message
+from .task import Task, MessageTask, TaskManager
+from .task_store import TaskStore, TaskState
+from .rate_limit import RateLimiter, RateLimitScope
+from .retry import RetryPolicy
+from .media import MediaPreprocessor
+from .upload import ThroughputEstimator
+from .inbox import Inbox
+from .number_cache import NumberCache
+from .number_check import NumberChecker
+from .lookahead import LookAhead
 from .client_events import ClientEvents
 
 class Client(EventEmitter):
@@ -25,6 +46,16 @@ class Client(EventEmitter):
         user_data_dir (str): The path to the user data directory
         debug (bool): Whether to print debug messages or not
         print_qr_code (bool): Whether to print the QR code to the console or not
+        rate_limiter (RateLimiter): Limits the sending rate per account, per recipient and globally (see [`RateLimiter`](../rate_limit/#rate_limit.RateLimiter)). Share one instance between clients for a global limit. Defaults to `None` (not limited).
+        retry_policy (RetryPolicy): Decides when the failed tasks are retried (see [`RetryPolicy`](../retry/#retry.RetryPolicy)). Defaults to `RetryPolicy()`.
+        task_store (str): The path to a SQLite database that persists the message tasks across restarts (see [`TaskStore`](../task_store/#task_store.TaskStore)). Defaults to `None` (in memory only).
+        in_app_navigation (bool): Whether to open the chats inside the loaded WhatsApp Web app (chat list or search box) instead of loading the chat url. Falls back to the url for unknown chats. Defaults to `False`.
+        input_mode (str): How the message content is typed (see [`InputMode`](../composer/#composer.InputMode)). Defaults to `InputMode.SEND_KEYS`.
+        number_cache (str): The path to a SQLite database that persists the numbers known to be on WhatsApp or not (see [`NumberCache`](../number_cache/#number_cache.NumberCache)). Defaults to `None` (in memory only).
+        look_ahead (bool): Whether to validate the numbers of the upcoming message tasks inside the page on the scheduler thread, concurrently with the send on the task thread, so the tasks to invalid numbers fail without opening their chats (see [`LookAhead`](../lookahead/#lookahead.LookAhead)). Defaults to `False`.
+        receive_messages (bool): Whether to emit `ClientEvents.MESSAGE_RECEIVED` for the messages received in the open chat and `ClientEvents.CHAT_UNREAD` for the others (see [`Inbox`](../inbox/#inbox.Inbox)). Defaults to `False`.
+        media_preprocessor (MediaPreprocessor): Prepares the images of the media messages in a process pool when they are scheduled (see [`MediaPreprocessor`](../media/#media.MediaPreprocessor)). Defaults to `None` (sent as they are).
+        observe_dom (bool): Whether to fire the UI state changes on actual DOM changes (see [`DomObserver`](../browser/#browser.dom_observer.DomObserver)) instead of the update loop timer
 
     Raises:
         Exception: If the webdriver is not supported
@@ -39,8 +70,14 @@ class Client(EventEmitter):
     Safari = WebDriver.Safari
     """The Safari webdriver"""
 
-    __update_loop_timer: threading.Timer = None
-    """The timer for the update loop"""
+    __update_job: Job = None
+    """The scheduler job of the update loop"""
+    __login_wait_job: Job = None
+    """The scheduler job that waits for the user to login"""
+    __task_job: Job = None
+    """The scheduler job that starts the tasks"""
+    __task_store_job: Job = None
+    """The scheduler job that syncs the task store"""
     __is_looping: bool = False
     """Whether the update loop is running or not"""
     __last_loading_progress_percent: float = None
@@ -53,11 +90,49 @@ class Client(EventEmitter):
     """The number of errors that occurred (used for the debug)"""
     __debug_enabled: bool = False
     """Whether to print debug messages or not"""
+    __snapshot: Snapshot = None
+    """The last snapshot of the page that is read by the check functions"""
+    __dom_observer: DomObserver = None
+    """The observer that pushes the UI state changes (only in `observe_dom` mode)"""
+    __idle_backoff: Backoff = None
+    """The interval of the update loop while there is nothing to do. Grows exponentially up to `MAX_LOOP_INTERVAL`, reset when a task is added or due"""
 
     browser: Browser = None
     """The browser"""
     task_manager: TaskManager = None
     """The manager of the tasks"""
+    check_cache: CheckCache = None
+    """The cache of the check function results (see [`CheckCache`](../check/#check.CheckCache) for the hit/miss counters)"""
+    chat_cache: LRUCache[str, ChatInfo] = None
+    """The verified chats by phone number, so [`is_chat_open`](./#client.Client.is_chat_open) does not open the chat info drawer again for them"""
+    receipt_tracker: ReceiptTracker = None
+    """Watches the statuses of the sent messages in the background (see [`ReceiptTracker`](../receipts/#receipts.ReceiptTracker))"""
+    upload_throughput: ThroughputEstimator = None
+    """The estimated upload throughput that scales the upload timeouts of the file and media messages (see [`ThroughputEstimator`](../upload/#upload.ThroughputEstimator))"""
+    send_timings: TimingStats = None
+    """The durations of the send steps of all the messages (e.g. `open`, `type`, `sent`, `delivery`), see [`TimingStats.summary`](../timing/#timing.TimingStats.summary)"""
+    scheduler: Scheduler = None
+    """The scheduler that runs the update loop, the login wait, the screenshot loop and the background jobs (receipts, inbox, stores) on a single thread"""
+    task_scheduler: Scheduler = None
+    """The scheduler that runs the task job on its own thread, so a long send does not stop the jobs of the [`scheduler`](./#client.Client.scheduler)"""
+    in_app_navigation: bool = False
+    """Whether the chats are opened inside the loaded app (see [`open_chat_in_app`](./#client.Client.open_chat_in_app))"""
+    input_mode: str = InputMode.SEND_KEYS
+    """How the message content is typed (see [`InputMode`](../composer/#composer.InputMode))"""
+    rate_limiter: RateLimiter = None
+    """The rate limiter of the tasks. `None` if the `rate_limiter` parameter is not given"""
+    retry_policy: RetryPolicy = None
+    """The retry policy of the failed tasks"""
+    task_store: TaskStore = None
+    """The persistent store of the message tasks. `None` if the `task_store` parameter is not given"""
+    number_cache: NumberCache = None
+    """The numbers known to be on WhatsApp or not. Known invalid numbers are rejected by [`new_chat`](./#client.Client.new_chat) and by the task job without opening them"""
+    inbox: Inbox = None
+    """The stream of the received messages. `None` if the `receive_messages` parameter is not set"""
+    look_ahead: LookAhead = None
+    """Validates the recipients of the upcoming tasks on the [`scheduler`](./#client.Client.scheduler) thread while the task thread sends. `None` if the `look_ahead` parameter is not set"""
+    media_preprocessor: MediaPreprocessor = None
+    """The preprocessor of the media messages. `None` if the `media_preprocessor` parameter is not given"""
 
     def __init__(self, 
             WebDriver:Chrome = Chrome, 
@@ -65,16 +140,49 @@ class Client(EventEmitter):
             user_data_dir:str = 'user_data', 
             debug=False,
             print_qr_code = True, 
+            observe_dom = False,
+            task_store:str = None,
+            rate_limiter:RateLimiter = None,
+            retry_policy:RetryPolicy = None,
+            in_app_navigation = False,
+            input_mode:str = InputMode.SEND_KEYS,
+            media_preprocessor:MediaPreprocessor = None,
+            receive_messages:bool = False,
+            number_cache:str = None,
+            look_ahead:bool = False,
         ) -> None:
         self.__WebDriver = WebDriver
         self.__headless = headless
         self.__user_data_dir = user_data_dir
         self.__debug_enabled = debug
         self.__should_qr_code_printed = print_qr_code
+        self.__observe_dom = observe_dom
+        self.in_app_navigation = in_app_navigation
+        self.input_mode = input_mode
+        self.media_preprocessor = media_preprocessor
+        self.number_cache = NumberCache(number_cache)
+        if receive_messages:
+            self.inbox = Inbox(self)
+        if look_ahead:
+            self.look_ahead = LookAhead(self)
 
         self.__error_count = len([entry for entry in os.listdir('debug/') if os.path.isfile(os.path.join('debug/', entry))]) if os.path.exists('debug/') else 0
 
         self.task_manager = TaskManager()
+        self.task_manager.on_task_added = self.__on_task_added
+        self.task_manager.on_task_released = self.__on_task_released
+        self.check_cache = CheckCache()
+        self.__idle_backoff = Backoff(LOOP_INTERVAL, MAX_LOOP_INTERVAL, LOOP_BACKOFF_FACTOR)
+        self.chat_cache = LRUCache(CHAT_CACHE_SIZE)
+        self.send_timings = TimingStats()
+        self.upload_throughput = ThroughputEstimator()
+        self.receipt_tracker = ReceiptTracker(self)
+        self.scheduler = Scheduler(on_error=self.__on_job_error)
+        self.task_scheduler = Scheduler(name='whatsapp_py-tasks', on_error=self.__on_job_error)
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        if task_store is not None:
+            self.task_store = TaskStore(task_store)
         self.start()
 
     def debug_info(self, *args, **kwargs):
@@ -106,13 +214,24 @@ class Client(EventEmitter):
             self.browser.screenshot(f'debug/error{self.__error_count}.png')
             self.__error_count += 1
     
+    def __on_job_error(self, job:Job, error:Exception) -> None:
+        """Reports the exception of a scheduler job with `debug_error`, the traceback is printed if the debug is enabled"""
+        self.debug_info(''.join(traceback.format_exception(error)))
+        self.debug_error(f'Error in job {job.name}: {error}')
+
     def __create_browser(self):
-        """Creates the browser and emits the `ClientEvents.BROWSER_CREATED` event"""
-        self.browser = Browser(WebDriver=self.__WebDriver, headless=self.__headless, user_data_dir=self.__user_data_dir, debug=self.__debug_enabled, starting_url=WHATSAPP_URL)
+        """Creates the browser and emits the `ClientEvents.BROWSER_CREATED` event
+
+        * The cached page state is invalidated after every navigation, click and `send_keys` of the browser
+        """
+        self.browser = Browser(WebDriver=self.__WebDriver, headless=self.__headless, user_data_dir=self.__user_data_dir, debug=self.__debug_enabled, starting_url=WHATSAPP_URL, scheduler=self.scheduler)
+        self.browser.add_interaction_listener(self.invalidate_checks)
         self.emit(ClientEvents.BROWSER_CREATED, self.browser)
 
     def __check_function_decorator(type: str) -> Callable:
         """A decorator for the check functions
+
+        * The results are memoized in the [`check_cache`](./#client.Client.check_cache)
         
         Args:
             type (str): The type of the check function
@@ -124,14 +243,14 @@ class Client(EventEmitter):
             def wrapper(self, first_time=False, *args, **kwargs):
                 if first_time:
                     if type not in Check.true_once:
-                        val = func(self, *args, **kwargs)
+                        val = self.check_cache.get(type, lambda: func(self, *args, **kwargs))
                         if val:
                             Check.true_once.append(type)
                         return val
                     else:
                         return False
                 else:
-                    return func(self, *args, **kwargs)
+                    return self.check_cache.get(type, lambda: func(self, *args, **kwargs))
             Check.funcs[type] = wrapper
             return wrapper
         return decorator
@@ -169,36 +288,184 @@ class Client(EventEmitter):
         """
         * Creates the browser
         * Emits the `ClientEvents.START` event
-        * Starts the update loop timer (calls `__update`)
+        * Adds the update loop job to the scheduler (calls `__update` every [`LOOP_INTERVAL`](../constants/#const.LOOP_INTERVAL) seconds)
+        * Adds the observer job instead in `observe_dom` mode (calls `__observe`)
+        * Adds the task job to the task scheduler (calls `__check_tasks`), sends block its thread only
+        * Adds the receipt job to the scheduler (calls [`ReceiptTracker.poll`](../receipts/#receipts.ReceiptTracker.poll))
+        * Adds the number cache job if it is persisted (calls [`NumberCache.flush`](../number_cache/#number_cache.NumberCache.flush) every [`NUMBER_CACHE_FLUSH_INTERVAL`](../constants/#const.NUMBER_CACHE_FLUSH_INTERVAL) seconds)
+        * Adds the media cache job if there is a media preprocessor (calls `__prune_media_cache` every [`MEDIA_CACHE_PRUNE_INTERVAL`](../constants/#const.MEDIA_CACHE_PRUNE_INTERVAL) seconds)
+        * Starts the inbox and adds its job if messages are received (calls [`Inbox.poll`](../inbox/#inbox.Inbox.poll))
+        * Adds the look-ahead job if it is enabled (calls [`LookAhead.poll`](../lookahead/#lookahead.LookAhead.poll))
+        * Restores the stored tasks and adds the task store job if there is a task store (calls `__sync_task_store`)
+        * Starts the scheduler threads
         """
         self.debug_info('__start()')
         self.__create_browser()
         # self.load_main_page()
         self.emit(ClientEvents.START)
         self.__is_looping = True
-        self.__update_loop_timer = threading.Timer(LOOP_INTERVAL, self.__update)
-        self.__update_loop_timer.start()
-
-    def __update(self) -> None:
-        """
+        if self.__observe_dom:
+            self.__dom_observer = DomObserver(self.browser, Snapshot.SELECTORS, CSS.LOADING_PROGRESS)
+            self.__update_job = self.scheduler.add_job(self.__observe, LOOP_INTERVAL, name='observe')
+        else:
+            self.__update_job = self.scheduler.add_job(self.__update, LOOP_INTERVAL, name='update')
+        self.__task_job = self.task_scheduler.add_job(self.__check_tasks, LOOP_INTERVAL, name='tasks')
+        self.receipt_tracker.job = self.scheduler.add_job(self.receipt_tracker.poll, RECEIPT_POLL_INTERVAL, name='receipts')
+        if self.number_cache.path is not None:
+            self.scheduler.add_job(self.number_cache.flush, NUMBER_CACHE_FLUSH_INTERVAL, name='number_cache')
+        if self.media_preprocessor is not None:
+            self.scheduler.add_job(self.__prune_media_cache, MEDIA_CACHE_PRUNE_INTERVAL, delay=0, name='media_cache')
+        if self.inbox is not None:
+            self.inbox.start()
+            self.inbox.job = self.scheduler.add_job(self.inbox.poll, INBOX_POLL_INTERVAL, name='inbox')
+        if self.look_ahead is not None:
+            self.look_ahead.job = self.scheduler.add_job(self.look_ahead.poll, LOOK_AHEAD_INTERVAL, name='look_ahead')
+        if self.task_store is not None:
+            self.__restore_tasks()
+            self.__task_store_job = self.scheduler.add_job(self.__sync_task_store, TASK_STORE_INTERVAL, name='task_store')
+        self.scheduler.start()
+        self.task_scheduler.start()
+
+    def __update(self) -> float | None:
+        """The update loop job
+
+        * Takes a new snapshot of the page for the check functions
         * Stops if the browser window is closed
         * Stops if the client is not looping (`__is_looping` is `False`)
-        * Emits the `ClientEvents.UPDATE` event
-        * Starts the update loop timer (calls `__update`)
+        * Calls `__tick`
+
+        Returns:
+            delay (float | None): The delay before the next tick (see `__next_interval`)
         """
-        if self.browser.is_closed:
+        # The window is only checked when the snapshot could not be taken
+        if self.take_snapshot().url == '' and self.browser.is_closed:
             self.debug_info('Browser window closed by user')
             self.stop()
+            return None
+
+        if not self.__is_looping:
+            return None
+
+        self.__tick()
+        return self.__next_interval()
+
+    def __next_interval(self) -> float:
+        """Computes the delay before the next tick of the update loop
+
+        * [`MIN_LOOP_INTERVAL`](../constants/#const.MIN_LOOP_INTERVAL) while WhatsApp Web is loading, a transition is expected
+        * [`LOOP_INTERVAL`](../constants/#const.LOOP_INTERVAL) while the login screen is shown
+        * Backs off exponentially while logged in with nothing to do, up to [`MAX_LOOP_INTERVAL`](../constants/#const.MAX_LOOP_INTERVAL)
+        * The backoff is reset when a task is added or due (see `__reset_idle_interval`)
+        * The tasks do not depend on it, they are started by the task job (see `__check_tasks`)
+
+        Returns:
+            delay (float): The delay in seconds
+        """
+        if not self.is_true(Check.LOGGED_IN):
+            self.__idle_backoff.reset()
+            if not self.is_true(Check.WHATSAPP_READY) or self.is_true(Check.LOADING_SCREEN):
+                return MIN_LOOP_INTERVAL
+            return LOOP_INTERVAL
+
+        return self.__idle_backoff.next()
+
+    def __reset_idle_interval(self) -> None:
+        """Resets the backoff of the update loop and runs it in [`LOOP_INTERVAL`](../constants/#const.LOOP_INTERVAL) seconds at the latest"""
+        self.__idle_backoff.reset()
+        if self.__update_job is not None:
+            self.__update_job.wake(LOOP_INTERVAL)
+
+    def __on_task_added(self, task:Task) -> None:
+        """Wakes the task job for the new task
+
+        * Saves the message task to the task store if there is one
+        * Starts preparing the media of the message task if there is a media preprocessor
+        * Wakes the look-ahead job if there is one, so the recipient is validated before the task is due
+        * Resets the backoff of the update loop (see `__next_interval`)
+        * Runs the task job right away if the task is due, or at its `start_date` at the latest
+        """
+        if self.task_store is not None and isinstance(task, MessageTask):
+            self.task_store.save(task)
+        if self.media_preprocessor is not None and isinstance(task, MessageTask):
+            self.media_preprocessor.submit(task.message)
+        if self.look_ahead is not None and self.look_ahead.job is not None:
+            self.look_ahead.job.wake()
+        self.__reset_idle_interval()
+        if self.__task_job is None:
+            return
+        self.__task_job.wake(self.__seconds_until(task.start_date))
+
+    def __on_task_released(self, task:Task) -> None:
+        """Releases the resources of a task that will not be sent (removed or failed for good)
+
+        * Drops the prepared media of the message task if there is a media preprocessor
+        * Marks the removed message task as failed in the task store if there is one, so the task store job does not load it again
+        """
+        if self.media_preprocessor is not None and isinstance(task, MessageTask):
+            self.media_preprocessor.release(task.message)
+        if self.task_store is not None and isinstance(task, MessageTask) and task.is_cancelled:
+            # The tasks that failed for good are already stored with their error
+            self.task_store.fail(task.message.nonce, 'Cancelled')
+
+    @staticmethod
+    def __seconds_until(date:datetime) -> float:
+        """Returns the seconds until the given date, `0.0` if it is in the past"""
+        return max(0.0, (date - datetime.now()).total_seconds())
+
+    def __observe(self) -> float | None:
+        """The update loop job of the `observe_dom` mode
+
+        * Drains the UI state changes that are queued by the [`DomObserver`](../browser/#browser.dom_observer.DomObserver)
+        * Calls `__tick` with the snapshot of each state change in order
+        * Calls `__tick` with the current state if nothing changed in [`OBSERVER_TIMEOUT`](../constants/#const.OBSERVER_TIMEOUT) seconds
+        * Long-polls only before login, the long-poll is the wait of the loop and it runs again right after a drain
+        * Never waits after the next run of the other jobs of the scheduler (e.g. the receipt job), they share its thread
+        * After login, drains without waiting every [`LOOP_INTERVAL`](../constants/#const.LOOP_INTERVAL) seconds: WebDriver runs one command at a time, a pending drain would delay each command of the sends on the task thread
+        * Does not drain while a task is in progress, the state changes stay queued in the page
+        * Stops if the browser window is closed
+
+        Returns:
+            delay (float | None): The delay before the next run after login, `None` before login (the job is woken right after a drain)
+        """
+        logged_in = Check.LOGGED_IN in Check.true_once
+        if logged_in:
+            current_task = self.task_manager.current_task
+            if current_task is not None and current_task.in_progress:
+                return LOOP_INTERVAL
+            timeout = 0
+        else:
+            timeout = min(OBSERVER_TIMEOUT, self.scheduler.next_run_in(exclude=self.__update_job))
+        try:
+            states = self.__dom_observer.drain(timeout)
+        except Exception as e:
+            if self.browser.is_closed:
+                self.debug_info('Browser window closed by user')
+                self.stop()
+            # Otherwise the page is being loaded, the observer will be installed again on the next run
             return
 
         if not self.__is_looping:
             return
 
-        # Start the update loop timer for the endless loop
-        # With threads, it can be run endless without the recursion limit (1000)
-        self.__update_loop_timer = threading.Timer(LOOP_INTERVAL, self.__update)
-        self.__update_loop_timer.start()
+        if len(states) == 0 and self.__dom_observer.current is not None:
+            # Nothing changed, the last known state is still valid
+            states = [self.__dom_observer.current]
 
+        for state in states:
+            self.__snapshot = Snapshot.from_result(state)
+            self.check_cache.invalidate()
+            self.__tick()
+
+        if logged_in:
+            return LOOP_INTERVAL
+        self.__update_job.wake()
+
+    def __tick(self) -> None:
+        """
+        * Emits the `ClientEvents.UPDATE` event
+        * Emits the UI state events (`ClientEvents.QR_CODE`, `ClientEvents.LOGGED_IN`)
+        * Wakes the task job when the user is logged in
+        """
         self.emit(ClientEvents.UPDATE)
 
         # Check for the loading screen
@@ -214,9 +481,11 @@ class Client(EventEmitter):
             self.debug_info('Login screen detected')
             Check.remove_first_check(Check.QR_REFRESH)
             Check.remove_first_check(Check.QR_READY)
-            # Start the login wait thread
-            self.__login_wait_thread = threading.Thread(target=self.wait_for_login)
-            self.__login_wait_thread.start()
+            # Start the login wait job
+            self.debug_info('Waiting for login...')
+            if self.__login_wait_job is not None:
+                self.__login_wait_job.cancel()
+            self.__login_wait_job = self.scheduler.add_job(self.__check_login, LOOP_INTERVAL, name='login_wait')
             return
         
         if self.is_true_first_time(Check.QR_READY):
@@ -230,36 +499,244 @@ class Client(EventEmitter):
         if self.is_true_first_time(Check.LOGGED_IN):
             self.debug_info('Logged in')
             self.emit(ClientEvents.LOGGED_IN)
+            self.__task_job.wake()
             return
 
-        if self.is_true(Check.LOGGED_IN):
-            self.__check_tasks()
-            return
+    def __check_tasks(self) -> float | None:
+        """The task job: checks if there is a task to do and starts it if there is
+
+        * Checks again every [`LOOP_INTERVAL`](../constants/#const.LOOP_INTERVAL) seconds while the user is not logged in
+        * Otherwise sleeps until the `start_date` of the next task, adding a task wakes it up (see `__on_task_added`)
+        * Throttled tasks are deferred instead of waited for (see `__throttle`)
+        * Due message tasks to the same recipient are sent in a burst (see `__send_burst`)
+        * Message tasks to a number known to be invalid fail right away, without a rate limiter token (see [`number_cache`](./#client.Client.number_cache))
+        * Wakes the [`look_ahead`](./#client.Client.look_ahead) job before a task is started, it validates the next recipients while this task is sent
+        * Resets the backoff of the update loop while a task is due (see `__next_interval`)
+
+        Returns:
+            delay (float | None): The delay before the next run
+        """
+        if not self.__is_looping:
+            return None
+
+        if not self.is_true(Check.LOGGED_IN):
+            return LOOP_INTERVAL
 
-    def __check_tasks(self):
-        """Checks if there is a task to do and starts it if there is"""
         task = self.task_manager.get_task()
         if task is not None:
             # There is a task to do
+            self.__reset_idle_interval()
             if not task.is_done:
                 # Task is not done yet
                 if not task.in_progress:
                     # Task is not in progress. Start it
-                    self.debug_info(f'Starting task {task}')
-                    task.start()
+                    if self.look_ahead is not None and self.look_ahead.job is not None:
+                        # Runs on the scheduler thread, it does not delay this task
+                        self.look_ahead.job.wake()
+                    if isinstance(task, MessageTask) and self.number_cache.is_invalid(task.message.chat.phone_number):
+                        # Fails with the invalid phone number error without opening the chat
+                        self.__start_task(task)
+                        return self.__next_task_in()
+                    delay = self.__throttle(task)
+                    if delay is not None:
+                        return delay
+                    if isinstance(task, MessageTask):
+                        self.__send_burst(task)
+                    else:
+                        self.__start_task(task)
+
+        return self.__next_task_in()
+
+    def __start_task(self, task:Task, **kwargs) -> None:
+        """Starts the task and saves its state to the task store if there is one
+
+        Args:
+            task (Task): The task to start
+            **kwargs (Any): The keyword arguments of `task.start`
+        """
+        self.debug_info(f'Starting task {task}')
+        if self.task_store is not None and isinstance(task, MessageTask):
+            # Committed before sending, so an interrupted send is never replayed
+            self.task_store.update(task, TaskState.STARTED)
+            task.start(**kwargs)
+            self.task_store.update(task)
+        else:
+            task.start(**kwargs)
+
+    def __send_burst(self, task:MessageTask) -> None:
+        """Sends the message task and the due message tasks to the same recipient one after another
+
+        * The chat is opened once, the next messages of the burst skip the open chat check
+        * Tasks are completed when WhatsApp assigns the message id, the delivery is tracked by the [`receipt_tracker`](./#client.Client.receipt_tracker)
+        * Each task still gets its own id, status and `ClientEvents.TASK_COMPLETED` event
+        * Stops after [`BURST_MAX_SIZE`](../constants/#const.BURST_MAX_SIZE) tasks or when a task is throttled
+
+        Args:
+            task (MessageTask): The first task of the burst
+        """
+        group = task.group
+        burst:list[MessageTask] = []
+        check_open = True
+        while True:
+            has_next = group is not None and len(burst) + 1 < BURST_MAX_SIZE and self.task_manager.has_due_task_in(group)
+            self.__start_task(task, check_open=check_open, wait_delivery=False)
+            burst.append(task)
+            is_sent = task.is_done and task.message.error is None
+            if is_sent:
+                self.receipt_tracker.track(task.message)
+            # The chat is known to be open only if the message is sent
+            check_open = not is_sent
+            if not has_next:
+                break
+            task = self.task_manager.get_task(group=group)
+            if task is None or self.__throttle(task) is not None:
+                break
+
+        if len(burst) > 1:
+            self.debug_info(f'Burst of {len(burst)} tasks')
+
+    def __next_task_in(self) -> float:
+        """Returns the seconds until the next task is due
+
+        Returns:
+            delay (float): `0.0` if a task is due, `math.inf` if there is no task
+        """
+        if self.task_manager.has_due_task:
+            return 0.0
+        next_start_date = self.task_manager.next_start_date
+        if next_start_date is None:
+            # Nothing to do until a task is added
+            return math.inf
+        return self.__seconds_until(next_start_date)
+   
+    def __throttle(self, task:Task) -> float | None:
+        """Takes a token from the [`rate_limiter`](./#client.Client.rate_limiter) for the task, defers the task if it is throttled
+
+        * A task throttled by its recipient is deferred to when the recipient has a token, the other tasks go on
+        * A task throttled by the account or the global limit is put back, the task job sleeps until a token is available
+        * Emits the `ClientEvents.TASK_THROTTLED` event
+
+        Args:
+            task (Task): The task to start
+
+        Returns:
+            delay (float | None): `None` if the task can be started. Otherwise the delay before the next run of the task job
+        """
+        if self.rate_limiter is None:
+            return None
+        # The digits of the number, so differently formatted numbers share a bucket
+        recipient = task.group if isinstance(task, MessageTask) else None
+        throttle = self.rate_limiter.acquire(account=self.__user_data_dir, recipient=recipient)
+        if throttle is None:
+            return None
+
+        self.debug_info(f'Task throttled by {throttle.scope} for {throttle.wait_time:.2f}s: {task}')
+        if throttle.scope == RateLimitScope.RECIPIENT:
+            self.task_manager.defer_task(task, datetime.now() + timedelta(seconds=throttle.wait_time))
+            self.emit(ClientEvents.TASK_THROTTLED, task, throttle)
+            return self.__next_task_in()
+        self.task_manager.defer_task(task)
+        self.emit(ClientEvents.TASK_THROTTLED, task, throttle)
+        return throttle.wait_time
+
+    def __restore_tasks(self) -> None:
+        """Restores the tasks of the task store after a restart
+
+        * Marks the tasks that were interrupted while sending as failed, they may have been sent
+        * Loads the pending tasks (see `__load_stored_tasks`)
+        """
+        for stored in self.task_store.load(TaskState.STARTED):
+            self.debug_info(f'Interrupted task: {stored.nonce}')
+            self.task_store.fail(stored.nonce, 'Interrupted while sending. The message may have been sent.')
+        self.__load_stored_tasks()
+        self.task_store.flush()
+
+    def __load_stored_tasks(self) -> None:
+        """Loads the pending tasks of the task store into the task manager
+
+        * Only the tasks that start in [`TASK_STORE_WINDOW`](../constants/#const.TASK_STORE_WINDOW) seconds, [`TASK_STORE_LOAD_LIMIT`](../constants/#const.TASK_STORE_LOAD_LIMIT) at most
+        * Skips the tasks that are already in the task manager, so it can be called again safely
+        * Marks the tasks that cannot be created (e.g. the file does not exist anymore) as failed
+        """
+        before = datetime.now() + timedelta(seconds=TASK_STORE_WINDOW)
+        for stored in self.task_store.load(TaskState.PENDING, before=before, limit=TASK_STORE_LOAD_LIMIT):
+            if self.task_manager.get_task_by_nonce(stored.nonce) is not None:
+                continue
+            try:
+                chat = self.new_chat(stored.phone_number)
+                message = Message(chat=chat, content=stored.content, file=stored.file, media=stored.media, nonce=stored.nonce, captions=stored.captions)
+            except Exception as e:
+                self.debug_info(f'Stored task could not be restored: {stored.nonce} ({e})')
+                self.task_store.fail(stored.nonce, str(e))
+                continue
+            self.task_manager.add_task(MessageTask(client=self, message=message, priority=stored.priority, start_date=stored.start_date))
+
+    def __sync_task_store(self) -> None:
+        """The task store job
+
+        * Commits the pending writes
+        * Loads the pending tasks that are due soon (see `__load_stored_tasks`)
+        * Deletes the old completed tasks (see [`TaskStore.compact`](../task_store/#task_store.TaskStore.compact))
+        """
+        self.task_store.flush()
+        self.__load_stored_tasks()
+        self.task_store.compact()
+
+    def __prune_media_cache(self) -> None:
+        """The media cache job: deletes the prepared images that are not used anymore (see [`MediaPreprocessor.prune`](../media/#media.MediaPreprocessor.prune))"""
+        deleted_count = self.media_preprocessor.prune()
+        if deleted_count > 0:
+            self.debug_info(f'Deleted {deleted_count} prepared media')
+
+    def __check_login(self) -> None:
+        """The login wait job
+
+        * Removes the check for login screen and cancels itself when the user is logged in
+        """
+        if not self.is_logged_in:
+            return
+        self.debug_info('Logged in.')
+        Check.remove_first_check(Check.LOGIN_SCREEN)
+        self.__login_wait_job.cancel()
    
     def start(self) -> None:
         """Starts the client in a new thread (calls `__start`)"""
         threading.Thread(target=self.__start).start()
          
     def stop(self) -> None:
-        """Stops the client"""
+        """Stops the client
+
+        * Cancels all the jobs of the schedulers and waits up to [`STOP_TIMEOUT`](../constants/#const.STOP_TIMEOUT) seconds for the running ones
+        * Stops the inbox before the stores, so its handlers can still add tasks
+        * Commits and closes the task store and the number cache, a send that is still running after the timeout cannot write to the task store anymore (see [`TaskStore`](../task_store/#task_store.TaskStore))
+        """
         self.__is_looping = False
 
+        for scheduler in (self.task_scheduler, self.scheduler):
+            try:
+                scheduler.stop(timeout=STOP_TIMEOUT)
+            except Exception as e:
+                self.debug_info(f'Error while stopping scheduler: {e}')
+
+        if self.inbox is not None:
+            self.inbox.stop()
+
         try:
-            self.__update_loop_timer.cancel()
+            if self.task_store is not None:
+                self.task_store.close()
         except Exception as e:
-            self.debug_info(f'Error while stopping timer: {e}')
+            self.debug_info(f'Error while saving tasks: {e}')
+
+        try:
+            self.number_cache.close()
+        except Exception as e:
+            self.debug_info(f'Error while saving number cache: {e}')
+
+        try:
+            if self.media_preprocessor is not None:
+                self.media_preprocessor.shutdown()
+        except Exception as e:
+            self.debug_info(f'Error while stopping media preprocessor: {e}')
 
         try:
             self.browser.stop()
@@ -268,6 +745,44 @@ class Client(EventEmitter):
         
         self.emit(ClientEvents.STOP)
 
+    def take_snapshot(self) -> Snapshot:
+        """Takes a new snapshot of the page with a single script call
+
+        * The check functions read from this snapshot until it is older than [`SNAPSHOT_MAX_AGE`](../constants/#const.SNAPSHOT_MAX_AGE)
+
+        * Invalidates the [`check_cache`](./#client.Client.check_cache), the results of the old snapshot are not used anymore
+
+        Returns:
+            snapshot (Snapshot): The new snapshot
+        """
+        snapshot = Snapshot.take(self.browser)
+        self.__snapshot = snapshot
+        self.check_cache.invalidate()
+        return snapshot
+
+    def invalidate_checks(self) -> None:
+        """Drops the snapshot and the cached check results
+
+        * Called after every navigation, click and `send_keys` of the browser
+        * The next check takes a new snapshot
+        """
+        self.__snapshot = None
+        self.check_cache.invalidate()
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """The last snapshot of the page
+
+        * Takes a new snapshot if there is none or the last one is older than [`SNAPSHOT_MAX_AGE`](../constants/#const.SNAPSHOT_MAX_AGE)
+
+        Returns:
+            snapshot (Snapshot): The snapshot of the page
+        """
+        snapshot = self.__snapshot
+        if snapshot is None or snapshot.age > SNAPSHOT_MAX_AGE:
+            snapshot = self.take_snapshot()
+        return snapshot
+
     def load_main_page(self) -> None:
         """Loads the WhatsApp Web main page"""
         Check.remove_first_check(Check.MAIN_SCREEN)
@@ -281,6 +796,151 @@ class Client(EventEmitter):
         """
         self.browser.load_url(f"{WHATSAPP_PHONE_URL}{chat.phone_number}")
 
+    def open_chat_in_app(self, chat:Chat) -> bool:
+        """Opens the chat inside the loaded WhatsApp Web app, without reloading the page
+
+        * Clicks the chat in the chat list if it is listed, otherwise searches the phone number in the search box
+        * The chat is matched by the phone number, the known [`title`](../chat/#chat.Chat.title) of the chat or its title in the [`chat_cache`](./#client.Client.chat_cache)
+        * A single search result is also tried (e.g. a contact saved with a name), the opened chat is always verified with [`is_chat_open`](./#client.Client.is_chat_open)
+        * Waits [`NAVIGATION_TIMEOUT`](../constants/#const.NAVIGATION_TIMEOUT) seconds at most for each step
+        * Returns `False` for the chats that are not found (e.g. numbers without a chat yet), use [`load_chat_page`](./#client.Client.load_chat_page) for them
+
+        Args:
+            chat (Chat): The chat to open
+
+        Returns:
+            is_open (bool): True if the chat is opened, False otherwise
+        """
+        if not self.is_logged_in or self.is_loading_screen:
+            return False
+
+        try:
+            phone_number = str(int(chat.phone_number.replace(' ', '')))
+        except:
+            return False
+        cached = self.chat_cache.get(phone_number)
+        keys = [phone_number] + [title for title in (chat.title, cached.title if cached is not None else None) if title]
+
+        el_chat = self.__find_chat_in_list(keys)
+        searched = False
+        if el_chat is None:
+            el_search = self.browser.find_element(CSS.SEARCH_INPUT)
+            if el_search is None:
+                self.debug_info('open_chat_in_app -> search input not found')
+                return False
+            try:
+                el_search.click()
+                el_search.send_keys(Keys.CONTROL, 'a')
+                el_search.send_keys(Keys.BACKSPACE)
+                el_search.send_keys(phone_number)
+                searched = True
+                el_chat = self.browser.wait_until(lambda: self.__find_chat_in_list(keys, single=True), timeout=NAVIGATION_TIMEOUT)
+            except:
+                self.debug_info('open_chat_in_app -> chat not found')
+                el_chat = None
+
+        try:
+            if el_chat is None:
+                return False
+            title = el_chat.get_attribute('title')
+            el_chat.click()
+            self.browser.wait_until(lambda: self.is_chat_open(chat.phone_number), timeout=NAVIGATION_TIMEOUT)
+            chat.title = title or chat.title
+            return True
+        except:
+            self.debug_info('open_chat_in_app -> chat not opened')
+            return False
+        finally:
+            if searched:
+                self.__clear_search()
+
+    def __find_chat_in_list(self, keys:list[str], single:bool = False) -> WebElement | None:
+        """Finds the title element of the chat in the chat list (or the search results)
+
+        * Titles that look like a phone number are compared without the formatting
+
+        Args:
+            keys (list[str]): The phone number and the titles to match
+            single (bool, optional): Whether to return the only listed chat if none matches. Defaults to False.
+
+        Returns:
+            web_element (WebElement | None): The title element if found, None otherwise
+        """
+        return self.browser.execute_script('''
+            const [selector, keys, single] = arguments;
+            const normalize = text => /^[+\\d\\s()-]+$/.test(text) ? text.replace(/\\D/g, '') : text;
+            const titles = Array.from(document.querySelectorAll(selector));
+            const found = titles.find(el => keys.includes(normalize(el.getAttribute('title') || '')));
+            if (found) return found;
+            return single && titles.length === 1 ? titles[0] : null;
+        ''', CSS.CHAT_LIST_TITLE, keys, single) or None
+
+    def scan_chat_list(self, unread_only:bool = False, max_chats:int = CHAT_SCAN_MAX_CHATS, timeout:float = CHAT_SCAN_TIMEOUT) -> list[ChatListEntry]:
+        """Reads the whole chat list with a single script call, without opening any chat
+
+        * Scrolls the virtualized list to the bottom and reads the rows while they are rendered, the scroll position is restored
+        * Chats are deduplicated by their JID (or their title if the JID is not known)
+        * The titles of the chats with a phone number are added to the [`chat_cache`](./#client.Client.chat_cache), so [`open_chat_in_app`](./#client.Client.open_chat_in_app) finds them
+        * Clears the search box first, so all the chats are listed
+
+        Args:
+            unread_only (bool, optional): Whether to return only the chats with unread messages. Defaults to False.
+            max_chats (int, optional): The maximum number of chats to return. Defaults to [`CHAT_SCAN_MAX_CHATS`](../constants/#const.CHAT_SCAN_MAX_CHATS).
+            timeout (float, optional): The maximum time to scan in seconds, the chats read so far are returned. Defaults to [`CHAT_SCAN_TIMEOUT`](../constants/#const.CHAT_SCAN_TIMEOUT).
+
+        Returns:
+            chats (list[ChatListEntry]): The chats in the order of the list (the most recent first). Empty if the user is not logged in.
+        """
+        if not self.is_logged_in:
+            return []
+        self.__clear_search()
+        try:
+            rows = self.browser.execute_async_script(
+                CHAT_LIST_SCAN_SCRIPT,
+                CSS.SIDE_PANE, CSS.CHAT_LIST_ROW, CSS._CHAT_ROW_TITLE, CSS._CHAT_ROW_UNREAD, CSS._CHAT_ROW_PREVIEW, CSS._CHAT_ROW_TIME, CSS._CHAT_ROW_AVATAR,
+                max_chats, unread_only, int(CHAT_SCAN_STEP_DELAY * 1000), int(timeout * 1000),
+                timeout=timeout + 5,
+            ) or []
+        except Exception as e:
+            self.debug_info(f'scan_chat_list -> {e}')
+            return []
+
+        chats = [ChatListEntry(title, jid, int(unread or 0), preview, time) for title, jid, unread, preview, time in rows]
+        for chat in chats:
+            if chat.phone_number is not None:
+                self.chat_cache.put(chat.phone_number, ChatInfo(chat.title, chat.jid))
+        self.debug_info(f'scan_chat_list -> {len(chats)} chats')
+        return chats
+
+    def check_numbers(self, numbers:Iterable[str], batch_size:int = NUMBER_CHECK_BATCH_SIZE, timeout:float = NUMBER_CHECK_TIMEOUT) -> NumberChecker:
+        """Checks whether the phone numbers are on WhatsApp, without opening their chats
+
+        * Returns an iterator that yields a [`NumberCheck`](../number_check/#number_check.NumberCheck) `(number, exists, jid)` for each number, in order
+        * The numbers are read lazily, a long list (e.g. 100k numbers from a file) is not loaded into the memory
+        * Known numbers are answered from the [`number_cache`](./#client.Client.number_cache), the results are added to it
+        * The other numbers are looked up concurrently inside the page in batches, the chats are opened one by one only if the in-page lookup is not available
+        * The iterator has `checked`, `existing`, `cached`, `errors` and `per_second` counters (see [`NumberChecker`](../number_check/#number_check.NumberChecker))
+
+        Args:
+            numbers (Iterable[str]): The phone numbers in any format.
+            batch_size (int, optional): The number of numbers looked up together. Defaults to [`NUMBER_CHECK_BATCH_SIZE`](../constants/#const.NUMBER_CHECK_BATCH_SIZE).
+            timeout (float, optional): The seconds to wait for the lookup of a number. Defaults to [`NUMBER_CHECK_TIMEOUT`](../constants/#const.NUMBER_CHECK_TIMEOUT).
+
+        Returns:
+            checker (NumberChecker): The iterator of the results.
+        """
+        return NumberChecker(self, numbers, batch_size=batch_size, timeout=timeout)
+
+    def __clear_search(self) -> None:
+        """Clears the search box, so the chat list shows the chats again"""
+        try:
+            el_search = self.browser.find_element(CSS.SEARCH_INPUT)
+            if el_search is not None:
+                el_search.send_keys(Keys.CONTROL, 'a')
+                el_search.send_keys(Keys.BACKSPACE)
+        except:
+            pass
+
     @property
     def qr_content(self) -> str:
         """Fetches the qr code from the browser and returns it
@@ -323,7 +983,10 @@ class Client(EventEmitter):
 
         self.debug_info('Refreshing QR code...')
         el_qr_refresh.click()
-        time.sleep(LOOP_INTERVAL)
+        try:
+            self.browser.wait_until(lambda: not self.need_qr_refresh, timeout=POPUP_TIMEOUT)
+        except:
+            self.debug_info('QR code is not refreshed in time.')
         Check.remove_first_check(Check.QR_REFRESH)
         Check.remove_first_check(Check.QR_READY)
 
@@ -336,7 +999,7 @@ class Client(EventEmitter):
         Returns:
             is_whatsapp_url (bool): True if the current url is the WhatsApp Web url, False otherwise
         """
-        return self.browser.current_url.startswith(WHATSAPP_URL)
+        return self.snapshot.url.startswith(WHATSAPP_URL)
     
     @property
     @__check_function_decorator(Check.WHATSAPP_READY)
@@ -346,7 +1009,7 @@ class Client(EventEmitter):
         Returns:
             is_whatsapp_ready (bool): True if the WhatsApp Web is ready, False otherwise
         """
-        return self.is_whatsapp_url and self.browser.has_element(CSS.APP)
+        return self.is_whatsapp_url and self.snapshot.has_element(CSS.APP)
 
     @property
     @__check_function_decorator(Check.CONFIRM_POPUP)
@@ -358,7 +1021,7 @@ class Client(EventEmitter):
         Returns:
             has_confirm_popup (bool): True if the confirm popup is visible, False otherwise
         """
-        return self.is_whatsapp_ready and self.browser.has_element(CSS.CONFIRM_POPUP)
+        return self.is_whatsapp_ready and self.snapshot.has_element(CSS.CONFIRM_POPUP)
     
     @property
     @__check_function_decorator(Check.CONFIRM_POPUP_OK)
@@ -370,7 +1033,7 @@ class Client(EventEmitter):
         Returns:
             has_confirm_popup_ok (bool): True if the confirm popup has the OK button, False otherwise
         """
-        return self.has_confirm_popup and self.browser.has_element(CSS.CONFIRM_POPUP_OK)
+        return self.has_confirm_popup and self.snapshot.has_element(CSS.CONFIRM_POPUP_OK)
     
     @property
     @__check_function_decorator(Check.CONFIRM_POPUP_CANCEL)
@@ -382,7 +1045,7 @@ class Client(EventEmitter):
         Returns:
             has_confirm_popup_cancel (bool): True if the confirm popup has the Cancel button, False otherwise
         """
-        return self.has_confirm_popup and self.browser.has_element(CSS.CONFIRM_POPUP_CANCEL)
+        return self.has_confirm_popup and self.snapshot.has_element(CSS.CONFIRM_POPUP_CANCEL)
 
     @property
     @__check_function_decorator(Check.CONFIRM_POPUP_BUTTON)
@@ -402,7 +1065,7 @@ class Client(EventEmitter):
         Returns:
             is_loading_screen (bool): True if the loading screen is visible, False otherwise
         """
-        return self.is_whatsapp_ready and self.browser.has_element(CSS.LOADING_SCREEN)
+        return self.is_whatsapp_ready and self.snapshot.has_element(CSS.LOADING_SCREEN)
 
     @property
     @__check_function_decorator(Check.LOGIN_SCREEN)
@@ -412,7 +1075,7 @@ class Client(EventEmitter):
         Returns:
             is_login_screen (bool): True if the login screen is visible, False otherwise
         """
-        return self.is_whatsapp_ready and self.browser.has_element(CSS.LINK_WITH_PHONE)
+        return self.is_whatsapp_ready and self.snapshot.has_element(CSS.LINK_WITH_PHONE)
 
     @property
     @__check_function_decorator(Check.QR_READY)
@@ -425,7 +1088,7 @@ class Client(EventEmitter):
         Returns:
             is_qr_ready (bool): True if the QR code is ready, False otherwise
         """
-        return self.is_login_screen and self.browser.has_element(CSS.QR_CODE)
+        return self.is_login_screen and self.snapshot.has_element(CSS.QR_CODE)
     
     @property
     @__check_function_decorator(Check.QR_REFRESH)
@@ -438,7 +1101,7 @@ class Client(EventEmitter):
         Returns:
             need_qr_refresh (bool): True if the QR code needs to be refreshed, False otherwise
         """
-        return self.is_qr_ready and self.browser.has_element(CSS.QR_REFRESH)
+        return self.is_qr_ready and self.snapshot.has_element(CSS.QR_REFRESH)
 
     @property
     @__check_function_decorator(Check.LOGGED_IN)
@@ -451,7 +1114,7 @@ class Client(EventEmitter):
         Returns:
             is_logged_in (bool): True if the user is logged in, False otherwise
         """
-        return self.is_whatsapp_ready and self.browser.has_element(CSS.MIDDLE_DRAWER)
+        return self.is_whatsapp_ready and self.snapshot.has_element(CSS.MIDDLE_DRAWER)
     
     @property
     @__check_function_decorator(Check.MAIN_SCREEN)
@@ -463,7 +1126,7 @@ class Client(EventEmitter):
         Returns:
             is_main_screen (bool): True if the main screen is visible, False otherwise
         """
-        return self.is_logged_in and self.browser.has_element(CSS.INTRO_TITLE)
+        return self.is_logged_in and self.snapshot.has_element(CSS.INTRO_TITLE)
     
     @property
     @__check_function_decorator(Check.CHAT_SCREEN)
@@ -475,7 +1138,7 @@ class Client(EventEmitter):
         Returns:
             is_chat_screen (bool): True if the chat screen is visible, False otherwise
         """
-        return self.is_logged_in and self.browser.has_element(CSS.CONVERSATION_PANEL)
+        return self.is_logged_in and self.snapshot.has_element(CSS.CONVERSATION_PANEL)
     
 
 
@@ -490,17 +1153,7 @@ class Client(EventEmitter):
         """
         if not self.is_loading_screen:
             return 0.0
-        try:
-            el = self.browser.find_element(CSS.LOADING_PROGRESS)
-            value = el.get_attribute('value')
-            max = el.get_attribute('max')
-            if value is not None and max is not None:
-                if max == '0':
-                    return 0.0
-                return (float(value) / float(max)) * 100
-        except:
-            pass
-        return 0.0
+        return self.snapshot.loading_percent
 
     @property
     def confirm_popup_content(self) -> str:
@@ -590,12 +1243,16 @@ class Client(EventEmitter):
         self.debug_info('Confirming popup...')
         ok = self.browser.find_element(CSS.CONFIRM_POPUP_OK)
         ok.click()
-        time.sleep(LOOP_INTERVAL)
+        try:
+            self.browser.wait_until(lambda: not self.has_confirm_popup, timeout=POPUP_TIMEOUT)
+        except:
+            self.debug_info('Popup is not dismissed in time.')
         return None
 
     def wait_for_login(self) -> None:
-        """Waits for the user to login
+        """Waits for the user to login (blocks the calling thread)
 
+        * The update loop does not use it, it runs the login wait job on the scheduler instead
         * Does nothing if the user is already logged in
         * Removes the check for login screen when the user is logged in
         """
@@ -607,9 +1264,30 @@ class Client(EventEmitter):
         Check.remove_first_check(Check.LOGIN_SCREEN)
 
 
+    @property
+    def chat_jid(self) -> str | None:
+        """Fetches the WhatsApp id of the open chat from its messages (e.g. `905551234567@c.us`)
+
+        * Returns `None` when the chat screen is not shown or the chat has no messages
+
+        Returns:
+            chat_jid (str | None): WhatsApp id of the open chat
+        """
+        if not self.is_chat_screen:
+            return None
+        data = self.browser.execute_script('return document.querySelector(arguments[0])?.getAttribute("data-testid");', f'{CSS.CONVERSATION_PANEL_MESSAGES} [data-testid^=conv-msg-]')
+        if not data:
+            return None
+        parts = data.split('_')
+        return parts[1] if len(parts) > 1 and parts[1] != '' else None
+
     def is_chat_open(self, phone_number: str) -> bool:
         """Checks if the chat is open for the given phone number
 
+        * A contact chat is verified once by opening the chat info drawer, then it is found in the [`chat_cache`](./#client.Client.chat_cache)
+        * A cached chat is trusted only if its JID and the JID of the open chat are both known and equal, otherwise the drawer is checked
+        * The cached chat is removed if the drawer does not verify it anymore
+
         Args:
             phone_number (str): Phone number of the chat
 
@@ -636,6 +1314,18 @@ class Client(EventEmitter):
             self.debug_info('is_chat_open -> chat_title == phone_number')
             return True
 
+        chat_jid = self.chat_jid
+        if chat_jid is not None and chat_jid == f'{phone_number}@c.us':
+            self.debug_info('is_chat_open -> chat_jid == phone_number')
+            self.chat_cache.put(phone_number, ChatInfo(chat_title, chat_jid))
+            return True
+
+        cached = self.chat_cache.get(phone_number)
+        # Contacts can share a display name, a cached chat is trusted only by its JID
+        if cached is not None and cached.title == chat_title and chat_jid is not None and cached.jid == chat_jid:
+            self.debug_info('is_chat_open -> cached chat == open chat')
+            return True
+
         el_chat_title = self.browser.find_element(CSS.CHAT_TITLE)
         if el_chat_title is None:
             self.debug_info('is_chat_open -> el_chat_title is None')
@@ -681,9 +1371,14 @@ class Client(EventEmitter):
 
         if chat_info_subtitle == phone_number:
             self.debug_info('is_chat_open -> chat_info_subtitle == phone_number')
+            self.chat_cache.put(phone_number, ChatInfo(chat_title, chat_jid))
             self.browser.execute_script('if (arguments[0]) arguments[0].innerText = arguments[1];', el_chat_title, chat_info_subtitle)
             return True
 
+        if cached is not None and cached.title == chat_title:
+            self.debug_info('is_chat_open -> cached chat is invalid')
+            self.chat_cache.pop(phone_number)
+
         self.debug_info('is_chat_open -> False')
         return False
 
@@ -710,7 +1405,7 @@ class Client(EventEmitter):
             chat (Chat): Chat object
 
         Raises:
-            Exception: If the phone number is invalid
+            Exception: If the phone number is invalid or it is known to be not on WhatsApp (see [`number_cache`](./#client.Client.number_cache))
         """
         chat = Chat(client=self, phone_number=phone_number)
 
@@ -721,4 +1416,8 @@ class Client(EventEmitter):
             chat.is_phone_number_invalid = True
             raise Exception(f"Invalid phone number.")
 
+        if self.number_cache.is_invalid(phone_number):
+            chat.is_phone_number_invalid = True
+            raise Exception(f"Phone number is not on WhatsApp.")
+
         return chat
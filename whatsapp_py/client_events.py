@@ -9,7 +9,7 @@ class ClientEvents:
     """Fired when the client is started."""
 
     UPDATE = 'update'
-    """Fired when the client is updated. Default interval is 0.5 seconds."""
+    """Fired on every tick of the update loop. The interval adapts between `MIN_LOOP_INTERVAL` and `MAX_LOOP_INTERVAL` seconds."""
 
     STOP = 'stop'
     """Fired when the client is stopped."""
@@ -31,3 +31,27 @@ class ClientEvents:
 
     TASK_COMPLETED = 'task_completed'
     """Fired when a task is completed."""
+
+    MESSAGE_DELIVERED = 'message_delivered'
+    """Fired when a sent message is delivered. Called with the message."""
+
+    MESSAGE_READ = 'message_read'
+    """Fired when a sent message is read. Called with the message."""
+
+    MESSAGE_RECEIPT_TIMEOUT = 'message_receipt_timeout'
+    """Fired when a sent message is not delivered in `RECEIPT_TIMEOUT` seconds and it is not tracked anymore. Called with the message."""
+
+    TASK_RETRYING = 'task_retrying'
+    """Fired when a failed task is scheduled to be retried. Called with the task and the delay in seconds."""
+
+    TASK_THROTTLED = 'task_throttled'
+    """Fired when a task is deferred by the rate limiter. Called with the task and the `Throttle`."""
+
+    MESSAGE_RECEIVED = 'message_received'
+    """Fired when a message is received in the open chat. Called with the message. Emitted on the inbox thread."""
+
+    CHAT_UNREAD = 'chat_unread'
+    """Fired when the unread message count of a chat in the chat list increases. Called with the `UnreadChat`. Emitted on the inbox thread."""
+
+    UPLOAD_PROGRESS = 'upload_progress'
+    """Fired when the upload progress of a file or media message changes, and once more when it is completed. Called with the message and the `UploadProgress`."""
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from selenium.webdriver.common.keys import Keys
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .browser import Browser, WebElement
+
+FOCUS_SCRIPT = """
+const element = arguments[0];
+const editable = element.closest('[contenteditable=true]') || element;
+editable.focus();
+const range = document.createRange();
+range.selectNodeContents(editable);
+range.collapse(false);
+const selection = window.getSelection();
+selection.removeAllRanges();
+selection.addRange(range);
+"""
+"""Focuses the editable element of the composer and moves the caret to the end."""
+
+EXEC_COMMAND_SCRIPT = FOCUS_SCRIPT + """
+return document.execCommand('insertText', false, arguments[1]);
+"""
+"""Inserts the text at the caret with `document.execCommand`. The editor gets a single `beforeinput`/`input` event pair."""
+
+COMPOSER_HAS_CONTENT_SCRIPT = """
+const element = arguments[0];
+const editable = element.closest('[contenteditable=true]') || element;
+return editable.textContent.trim() !== '' || editable.querySelector('img') !== null;
+"""
+"""Checks if the composer has content (text or emoji images), so the typed input is committed by the editor."""
+
+class InputMode:
+    """Input modes of the message content (see [`type_text`](./#composer.type_text))."""
+    # TODO: Convert to Enum
+    SEND_KEYS = 'send_keys'
+    """Types the text key by key with `WebElement.send_keys`. Slow for long texts."""
+    EXEC_COMMAND = 'exec_command'
+    """Inserts the text in one script call with `document.execCommand('insertText')`. Works with all browsers."""
+    INSERT_TEXT = 'insert_text'
+    """Inserts the text in one DevTools call with `Input.insertText`. Chromium based browsers only."""
+
+def type_text(browser:Browser, element:WebElement, text:str, mode:str = InputMode.SEND_KEYS) -> None:
+    """Types the text into the composer element.
+
+    * Newlines are sent as the `Enter` key in all the modes, the same as `send_keys` does
+    * Falls back to `send_keys` for a line if the selected mode cannot insert it
+
+    Args:
+        browser (Browser): The browser of the element.
+        element (WebElement): The composer element.
+        text (str): The text to type.
+        mode (str, optional): The input mode (see [`InputMode`](./#composer.InputMode)). Defaults to `InputMode.SEND_KEYS`.
+    """
+    if mode == InputMode.SEND_KEYS:
+        element.send_keys(text)
+        return
+
+    for index, line in enumerate(text.replace('\r\n', '\n').split('\n')):
+        if index > 0:
+            element.send_keys(Keys.ENTER)
+        if line == '':
+            continue
+        if not _insert_line(browser, element, line, mode):
+            element.send_keys(line)
+
+def _insert_line(browser:Browser, element:WebElement, line:str, mode:str) -> bool:
+    """Inserts a line without newlines into the composer element.
+
+    Returns:
+        is_inserted (bool): True if the line is inserted, False if the mode is not supported.
+    """
+    try:
+        if mode == InputMode.EXEC_COMMAND:
+            return bool(browser.execute_script(EXEC_COMMAND_SCRIPT, element, line))
+        if mode == InputMode.INSERT_TEXT:
+            browser.execute_script(FOCUS_SCRIPT, element)
+            browser.insert_text(line)
+            return True
+    except NotImplementedError:
+        return False
+    raise ValueError(f'Unknown input mode: {mode}')
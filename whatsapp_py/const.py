@@ -4,3 +4,66 @@ MAX_LOOP_RETRIES = 20
 LOOP_INTERVAL = 0.5
 WHATSAPP_URL = 'https://web.whatsapp.com'
 WHATSAPP_PHONE_URL = f'{WHATSAPP_URL}/send?phone='
+SNAPSHOT_MAX_AGE = 0.1
+OBSERVER_TIMEOUT = 5.0
+CHECK_CACHE_TTL = SNAPSHOT_MAX_AGE
+STOP_TIMEOUT = 10
+MIN_LOOP_INTERVAL = 0.1
+MAX_LOOP_INTERVAL = 5.0
+LOOP_BACKOFF_FACTOR = 2.0
+TASK_STORE_BATCH_SIZE = 100
+TASK_STORE_INTERVAL = 60.0
+TASK_STORE_WINDOW = 60 * 60
+TASK_STORE_LOAD_LIMIT = 1000
+TASK_STORE_RETENTION = 7 * 24 * 60 * 60
+RATE_LIMIT_GLOBAL_RATE = None
+RATE_LIMIT_GLOBAL_BURST = 10
+RATE_LIMIT_ACCOUNT_RATE = 1 / 3
+RATE_LIMIT_ACCOUNT_BURST = 5
+RATE_LIMIT_RECIPIENT_RATE = 1 / 10
+RATE_LIMIT_RECIPIENT_BURST = 3
+RATE_LIMIT_MAX_RECIPIENTS = 10000
+RETRY_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 5 * 60
+RETRY_BACKOFF_FACTOR = 2.0
+DEAD_LETTER_MAX_LENGTH = 1000
+NAVIGATION_TIMEOUT = 3
+CHAT_CACHE_SIZE = 1000
+BURST_MAX_SIZE = 10
+WAIT_POLL_FREQUENCY = CHECK_CACHE_TTL
+COMPOSE_TIMEOUT = 2
+POPUP_TIMEOUT = 5
+RECEIPT_TIMEOUT = 120
+RECEIPT_READ_TIMEOUT = 24 * 60 * 60
+RECEIPT_POLL_INTERVAL = 2.0
+RECEIPT_READ_POLL_INTERVAL = 10.0
+RECEIPT_BATCH_SIZE = 200
+ALBUM_MAX_SIZE = 30
+MEDIA_CACHE_DIR = 'media_cache'
+MEDIA_MAX_DIMENSION = 1600
+MEDIA_JPEG_QUALITY = 80
+MEDIA_PREPROCESS_TIMEOUT = 60
+MEDIA_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+MEDIA_CACHE_PRUNE_INTERVAL = 60 * 60
+UPLOAD_MIN_TIMEOUT = 10
+UPLOAD_MAX_TIMEOUT = 30 * 60
+UPLOAD_TIMEOUT_FACTOR = 3.0
+UPLOAD_INITIAL_THROUGHPUT = 256 * 1024
+UPLOAD_THROUGHPUT_ALPHA = 0.3
+UPLOAD_MIN_SAMPLE_SIZE = 512 * 1024
+INBOX_POLL_INTERVAL = 1.0
+INBOX_BATCH_SIZE = 50
+INBOX_MAX_QUEUE_LENGTH = 1000
+CHAT_SCAN_MAX_CHATS = 10000
+CHAT_SCAN_TIMEOUT = 60
+CHAT_SCAN_STEP_DELAY = 0.05
+NUMBER_CACHE_VALID_TTL = 30 * 24 * 60 * 60
+NUMBER_CACHE_INVALID_TTL = 7 * 24 * 60 * 60
+NUMBER_CACHE_BATCH_SIZE = 100
+NUMBER_CACHE_FLUSH_INTERVAL = 60.0
+NUMBER_CHECK_BATCH_SIZE = 20
+NUMBER_CHECK_TIMEOUT = 10
+LOOK_AHEAD_DEPTH = 20
+LOOK_AHEAD_TIMEOUT = 10
+LOOK_AHEAD_INTERVAL = 1.0
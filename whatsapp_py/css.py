@@ -17,6 +17,16 @@ class CSS:
     QR_CODE = f"{LANDING_WINDOW} [data-testid=qrcode]"
     QR_REFRESH = f"{QR_CODE} [data-testid=refresh-large]"
 
+    SIDE_PANE = f"{APP} #pane-side"
+    _CHAT_ROW_TITLE = f"[data-testid=cell-frame-title] span[title]"
+    _CHAT_ROW_UNREAD = f"[data-testid=icon-unread-count]"
+    _CHAT_ROW_PREVIEW = f"[data-testid=last-msg-status] span[title]"
+    _CHAT_ROW_TIME = f"[data-testid=cell-frame-primary-detail]"
+    _CHAT_ROW_AVATAR = f"img[src*='u=']"
+    CHAT_LIST_ROW = f"{SIDE_PANE} [data-testid=cell-frame-container]"
+    CHAT_LIST_TITLE = f"{SIDE_PANE} {_CHAT_ROW_TITLE}"
+    SEARCH_INPUT = f"{APP} [data-testid=chat-list-search]"
+
     MIDDLE_DRAWER = f"{APP} [data-testid=drawer-middle]"
     RIGHT_DRAWER = f"{APP} [data-testid=drawer-right]"
     CHAT_INFO_DRAWER = f"{RIGHT_DRAWER} [data-testid=chat-info-drawer]"
@@ -26,6 +36,7 @@ class CSS:
 
     CHAT_INPUT = f"{CONVERSATION_PANEL} div[data-testid=conversation-compose-box-input] p"
     MEDIA_CAPTION = f"{APP} div[data-testid=media-caption-input-container] p"
+    MEDIA_THUMBNAIL = f"{APP} div[data-testid=media-editor-thumbs] [role=button]"
     CLIP_BUTTON = f"{CONVERSATION_PANEL} [data-testid=conversation-clip] [role=button]"
     DOCUMENT_INPUT = f"{APP} [data-testid=mi-attach-document] input"
     MEDIA_INPUT = f"{APP} [data-testid=mi-attach-media] input"
@@ -37,6 +48,8 @@ class CSS:
     _META = f"div[data-testid=msg-meta]"
     _META_TIME = f"{_META} span"
     _META_STATUS = f"{_META} div span"
+    _UPLOAD_PROGRESS = f"[role=progressbar]"
+    _RECEIVED_MESSAGE_ROW = f"[data-testid^=conv-msg-false_]"
     LAST_MESSAGE_CONTENT = f"{LAST_MESSAGE_ROW} {_CONTENT}"
     LAST_MESSAGE_META = f"{LAST_MESSAGE_ROW} {_META}"
     LAST_MESSAGE_TIME = f"{LAST_MESSAGE_ROW} {_META_TIME}"
@@ -0,0 +1,16 @@
+class SendError(Exception):
+    """Raised when a message cannot be sent."""
+
+class TransientSendError(SendError):
+    """Raised when a message cannot be sent for now (e.g. the chat could not be opened or the upload failed).
+
+    * The message was not sent, it is safe to try again
+    * Message tasks are retried with the [`RetryPolicy`](../retry/#retry.RetryPolicy) of the client
+    """
+
+class PermanentSendError(SendError):
+    """Raised when a message cannot be sent and trying again will not help (e.g. an invalid phone number or a missing file).
+
+    * Also raised when the message may have been sent, so it is never sent twice
+    * Message tasks are moved to the [`dead_letters`](../task/#task.TaskManager.dead_letters) of the task manager
+    """
@@ -0,0 +1,255 @@
+from __future__ import annotations
+import queue
+import threading
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from .const import *
+from .css import CSS
+from .chat import Chat
+from .message import Message
+from .client_events import ClientEvents
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .client import Client
+    from .scheduler import Job
+
+INBOX_INSTALL_SCRIPT = """
+const [messagesSelector, chatListSelector, rowSelector, contentSelector, timeSelector, titleSelector, unreadSelector, previewSelector, maxQueueLength] = arguments;
+if (!window.__wpyInbox) {
+    const state = { queue: [], seen: new Set(), unread: new Map(), panel: null, dropped: 0 };
+    const push = (item) => {
+        state.queue.push(item);
+        if (state.queue.length > maxQueueLength) {
+            state.queue.shift();
+            state.dropped++;
+        }
+    };
+    const text = (parent, selector) => {
+        const element = parent.querySelector(selector);
+        return element === null ? null : element.innerText;
+    };
+    const scanMessages = (emit) => {
+        const panel = document.querySelector(messagesSelector);
+        // The panel is created again for every opened chat, its first rows are history
+        if (panel !== state.panel) emit = false;
+        state.panel = panel;
+        if (panel === null) return;
+        const rows = Array.from(panel.querySelectorAll(rowSelector));
+        const received = [];
+        let isHistory = false;
+        for (const row of rows.reverse()) {
+            const id = row.getAttribute('data-testid');
+            // The rows above a known row are older messages loaded by scrolling up
+            if (state.seen.has(id)) { isHistory = true; continue; }
+            state.seen.add(id);
+            if (state.seen.size > maxQueueLength * 10) state.seen.delete(state.seen.values().next().value);
+            if (emit && !isHistory) received.push({ kind: 'message', id: id, content: text(row, contentSelector), time: text(row, timeSelector) });
+        }
+        received.reverse().forEach(push);
+    };
+    const scanChatList = (emit) => {
+        document.querySelectorAll(chatListSelector).forEach(row => {
+            const title = row.querySelector(titleSelector);
+            if (title === null) return;
+            const name = title.getAttribute('title');
+            const badge = row.querySelector(unreadSelector);
+            const unread = badge === null ? 0 : parseInt(badge.innerText, 10) || 1;
+            const previous = state.unread.get(name) || 0;
+            state.unread.set(name, unread);
+            if (emit && unread > previous) push({ kind: 'unread', title: name, unread: unread, preview: text(row, previewSelector) });
+        });
+    };
+    // The rows that are in the page when the inbox is installed are history, they are not reported
+    scanMessages(false);
+    scanChatList(false);
+    state.observer = new MutationObserver(() => {
+        if (state.scheduled) return;
+        state.scheduled = true;
+        setTimeout(() => {
+            state.scheduled = false;
+            scanMessages(true);
+            scanChatList(true);
+        }, 0);
+    });
+    state.observer.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+    window.__wpyInbox = state;
+}
+"""
+"""Installs the `MutationObserver` that queues the received messages and the unread chats into the page if it is not installed yet.
+
+* The observer is lost on every navigation, so the drain script installs it again when needed
+* The messages of a chat are reported when they are rendered, so only the open conversation is covered
+* The rows of a newly opened chat and the older rows loaded by scrolling up are not reported
+"""
+
+INBOX_DRAIN_SCRIPT = INBOX_INSTALL_SCRIPT + """
+const limit = arguments[9];
+const state = window.__wpyInbox;
+const dropped = state.dropped;
+state.dropped = 0;
+return { items: state.queue.splice(0, limit), pending: state.queue.length, dropped: dropped };
+"""
+"""Returns up to `limit` queued items in a single `execute_script` call, the rest stays in the page."""
+
+class UnreadChat(NamedTuple):
+    """A chat of the chat list whose unread message count is increased (see [`ClientEvents.CHAT_UNREAD`](../client_events/#client_events.ClientEvents.CHAT_UNREAD))."""
+    title:str
+    """The title of the chat (the contact name or the phone number)."""
+    unread:int
+    """The number of the unread messages."""
+    preview:str
+    """The preview of the last message. `None` if it is not shown."""
+
+class Inbox:
+    """Streams the received messages of WhatsApp Web to `ClientEvents.MESSAGE_RECEIVED`.
+
+    * An in-page `MutationObserver` queues the new `conv-msg-false_*` rows of the open conversation and the unread count changes of the chat list
+    * [`poll`](./#inbox.Inbox.poll) is a scheduler job that fetches the queued items in batches with one script call
+    * The events are emitted on a dispatcher thread, so slow handlers do not block sending
+    * Backpressure: when `max_queue_length` items wait for the handlers, the items stay in the page queue, which drops the oldest ones when it is full (see [`dropped_count`](./#inbox.Inbox.dropped_count))
+
+    !!!warning
+        WhatsApp Web only renders the messages of the open chat. The messages of the other chats are reported as [`UnreadChat`](./#inbox.UnreadChat) with `ClientEvents.CHAT_UNREAD`.
+
+    Args:
+        client (Client): The client to read the messages from.
+        batch_size (int, optional): The maximum number of items fetched with one script call. Defaults to [`INBOX_BATCH_SIZE`](../constants/#const.INBOX_BATCH_SIZE).
+        max_queue_length (int, optional): The maximum number of items waiting for the handlers, and in the page. Defaults to [`INBOX_MAX_QUEUE_LENGTH`](../constants/#const.INBOX_MAX_QUEUE_LENGTH).
+    """
+    def __init__(self, client:Client, batch_size:int = INBOX_BATCH_SIZE, max_queue_length:int = INBOX_MAX_QUEUE_LENGTH):
+        self.client = client
+        self.batch_size = batch_size
+        self.max_queue_length = max_queue_length
+        self.job:Job = None
+        """The scheduler job that runs [`poll`](./#inbox.Inbox.poll)."""
+        self.dropped_count = 0
+        """The number of items that were dropped in the page because the handlers lagged behind."""
+        self.__queue:queue.Queue[tuple[str, Any]] = queue.Queue(maxsize=max_queue_length)
+        self.__is_backlogged = False
+        """Whether items are left in the page because the queue is full"""
+        self.__thread:threading.Thread = None
+        self.__stopping = threading.Event()
+
+    def __len__(self) -> int:
+        return self.__queue.qsize()
+
+    def start(self) -> None:
+        """Starts the dispatcher thread."""
+        if self.__thread is not None:
+            return
+        self.__stopping.clear()
+        self.__thread = threading.Thread(target=self.__dispatch, name='inbox', daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout:float = STOP_TIMEOUT) -> None:
+        """Stops the dispatcher thread after the queued events are emitted.
+
+        * Never blocks on a full queue, waits up to `timeout` seconds for the dispatcher thread
+
+        Args:
+            timeout (float, optional): The maximum time to wait for the queued events in seconds. Defaults to [`STOP_TIMEOUT`](../constants/#const.STOP_TIMEOUT).
+        """
+        thread = self.__thread
+        if thread is None:
+            return
+        self.__thread = None
+        self.__stopping.set()
+        try:
+            # Wakes the dispatcher if it waits on an empty queue
+            self.__queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def poll(self) -> float:
+        """Fetches the queued items of the page and hands them to the dispatcher (the job function).
+
+        * Fetches only as many items as the dispatcher queue can take
+        * Does nothing until the user is logged in
+
+        Returns:
+            delay (float): `0.0` if more items are waiting in the page and there is room for them, [`INBOX_POLL_INTERVAL`](../constants/#const.INBOX_POLL_INTERVAL) otherwise.
+        """
+        if not self.client.is_logged_in:
+            return INBOX_POLL_INTERVAL
+        limit = min(self.batch_size, self.max_queue_length - self.__queue.qsize())
+        if limit <= 0:
+            self.__is_backlogged = True
+            return INBOX_POLL_INTERVAL
+        try:
+            result = self.client.browser.execute_script(
+                INBOX_DRAIN_SCRIPT,
+                CSS.CONVERSATION_PANEL_MESSAGES, CSS.CHAT_LIST_ROW, CSS._RECEIVED_MESSAGE_ROW, CSS._CONTENT, CSS._META_TIME,
+                CSS._CHAT_ROW_TITLE, CSS._CHAT_ROW_UNREAD, CSS._CHAT_ROW_PREVIEW,
+                self.max_queue_length, limit,
+            )
+        except Exception as e:
+            self.client.debug_info(f'Unable to read the received messages: {e}')
+            return INBOX_POLL_INTERVAL
+        if not result:
+            return INBOX_POLL_INTERVAL
+
+        self.dropped_count += result.get('dropped') or 0
+        for item in result.get('items') or []:
+            try:
+                event = self.__to_event(item)
+            except Exception as e:
+                self.client.debug_info(f'Received item could not be read: {item} ({e})')
+                continue
+            self.__queue.put(event)
+
+        has_pending = (result.get('pending') or 0) > 0
+        has_room = self.__queue.qsize() < self.max_queue_length
+        self.__is_backlogged = has_pending and not has_room
+        return 0.0 if has_pending and has_room else INBOX_POLL_INTERVAL
+
+    def __to_event(self, item:dict) -> tuple[str, Any]:
+        """Converts a queued item of the page to the event and its argument."""
+        if item['kind'] == 'unread':
+            return ClientEvents.CHAT_UNREAD, UnreadChat(item['title'], int(item['unread']), item.get('preview'))
+        return ClientEvents.MESSAGE_RECEIVED, self.__to_message(item)
+
+    def __to_message(self, item:dict) -> Message:
+        """Creates the received message from a queued message row.
+
+        * The `data-testid` of a row is `conv-msg-false_<chat>@<server>_<id>`, followed by `_<sender>@<server>` in the groups
+        """
+        data_id = item['id']
+        _, chat_jid, message_id, *sender = data_id.split('_')
+        chat = Chat(client=self.client, phone_number=chat_jid.split('@')[0])
+        message = Message(chat=chat, id=message_id, content=item.get('content') or None, time=Inbox.__parse_time(item.get('time')))
+        message.data_id = data_id
+        message.sender = sender[0].split('@')[0] if len(sender) > 0 else chat.phone_number
+        return message
+
+    @staticmethod
+    def __parse_time(text:str) -> datetime:
+        """Returns today at the time of the row (e.g. `14:05`), or now if it cannot be read."""
+        now = datetime.now()
+        try:
+            parsed = datetime.strptime((text or '').strip(), '%H:%M')
+        except ValueError:
+            return now
+        return now.replace(hour=parsed.hour, minute=parsed.minute, second=0, microsecond=0)
+
+    def __dispatch(self) -> None:
+        """Emits the queued events in order until it is stopped and the queue is empty (the dispatcher thread)."""
+        while True:
+            try:
+                event = self.__queue.get(timeout=INBOX_POLL_INTERVAL)
+            except queue.Empty:
+                if self.__stopping.is_set():
+                    return
+                continue
+            if event is None:
+                if self.__stopping.is_set() and self.__queue.qsize() == 0:
+                    return
+                continue
+            self.client.emit(*event)
+            if self.__is_backlogged and self.job is not None and self.__queue.qsize() == 0:
+                # There is room again, the items waiting in the page are fetched
+                self.__is_backlogged = False
+                self.job.wake(0.0)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import math
+
+from .const import *
+from .task import MessageTask
+from .number_cache import NumberCache
+from .number_check import NUMBER_QUERY_SCRIPT
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .client import Client
+    from .scheduler import Job
+
+LOOK_AHEAD_SCRIPT = """
+const [numbers, timeout] = arguments;
+""" + NUMBER_QUERY_SCRIPT + """
+if (!query || !widFactory) return { available: false, results: {}, pending: 0 };
+const state = window.__wpyLookAhead || (window.__wpyLookAhead = { pending: new Set(), results: {} });
+const results = state.results;
+state.results = {};
+numbers.forEach(number => {
+    if (state.pending.has(number) || number in results) return;
+    state.pending.add(number);
+    lookup(number, timeout).then(result => {
+        state.pending.delete(number);
+        state.results[number] = result;
+    });
+});
+return { available: true, results: results, pending: state.pending.size };
+"""
+"""Starts the lookups of the numbers in the page and returns the results of the finished ones, in a single `execute_script` call.
+
+* Does not wait for the lookups, they finish in the page between the calls
+* The state is lost on a navigation, the numbers that are still not known are looked up again
+* Each result is `[exists, jid]`, or `null` if the lookup failed or timed out
+"""
+
+class LookAhead:
+    """Validates the recipients of the upcoming message tasks concurrently with the send of the current one.
+
+    * [`poll`](./#lookahead.LookAhead.poll) is a job of the client [`scheduler`](../client/#client.Client.scheduler), the sends run on the thread of the [`task_scheduler`](../client/#client.Client.task_scheduler), so the look-ahead never delays a send
+    * The task job wakes it when a task is started, adding a task wakes it too
+    * The numbers of the next `depth` tasks that are not in the [`number_cache`](../client/#client.Client.number_cache) are looked up inside the page (see [`LOOK_AHEAD_SCRIPT`](./#lookahead.LOOK_AHEAD_SCRIPT)), without waiting and without a navigation
+    * The finished lookups are saved to the number cache on the next run, so a task to an invalid number fails without opening its chat
+    * Disables itself if the app does not expose the number lookup
+
+    !!!info
+        Only the numbers are validated ahead, the chat and the composer of the next recipient are not prepared. WhatsApp Web allows one active tab per session (a second tab takes the session over), and the open chat of the single tab is used by the current send. The look-ahead does not change the open chat, so the page state of the check functions stays valid.
+
+    Args:
+        client (Client): The client whose tasks are validated.
+        depth (int, optional): The number of the upcoming tasks to validate. Defaults to [`LOOK_AHEAD_DEPTH`](../constants/#const.LOOK_AHEAD_DEPTH).
+        timeout (float, optional): The seconds to wait for the lookup of a number in the page. Defaults to [`LOOK_AHEAD_TIMEOUT`](../constants/#const.LOOK_AHEAD_TIMEOUT).
+    """
+    def __init__(self, client:Client, depth:int = LOOK_AHEAD_DEPTH, timeout:float = LOOK_AHEAD_TIMEOUT):
+        self.client = client
+        self.depth = depth
+        self.timeout = timeout
+        self.job:Job = None
+        """The scheduler job that runs [`poll`](./#lookahead.LookAhead.poll)."""
+        self.is_available:bool = None
+        """Whether the number lookup of the app is available. `None` until the first call."""
+        self.validated = 0
+        """The number of the numbers that are validated ahead."""
+        self.invalid = 0
+        """The number of the numbers that are found to be not on WhatsApp ahead."""
+        self.pending = 0
+        """The number of the lookups running in the page after the last call."""
+
+    def __str__(self):
+        return f"LookAhead({self.validated} validated)({self.invalid} invalid)({self.pending} pending)"
+
+    def poll(self) -> float:
+        """Runs [`prefetch`](./#lookahead.LookAhead.prefetch) (the job function).
+
+        Returns:
+            delay (float): [`LOOK_AHEAD_INTERVAL`](../constants/#const.LOOK_AHEAD_INTERVAL) while there are lookups to start or to collect, `math.inf` otherwise (it is woken by the client).
+        """
+        if self.is_available is False:
+            return math.inf
+        if not self.client.is_logged_in:
+            return LOOK_AHEAD_INTERVAL
+        started = self.prefetch()
+        return LOOK_AHEAD_INTERVAL if started > 0 or self.pending > 0 else math.inf
+
+    def prefetch(self) -> int:
+        """Saves the finished lookups to the number cache and starts the lookups of the upcoming recipients.
+
+        * Does nothing if the lookup is not available
+
+        Returns:
+            count (int): The number of the upcoming recipients that are not known yet.
+        """
+        if self.is_available is False:
+            return 0
+        numbers:list[str] = []
+        for task in self.client.task_manager.upcoming_tasks(self.depth):
+            if not isinstance(task, MessageTask):
+                continue
+            number = NumberCache.normalize(task.message.chat.phone_number)
+            if number != '' and number not in numbers and self.client.number_cache.get(number) is None:
+                numbers.append(number)
+        if len(numbers) == 0 and self.pending == 0:
+            return 0
+        try:
+            result = self.client.browser.execute_script(LOOK_AHEAD_SCRIPT, numbers, int(self.timeout * 1000))
+        except Exception as e:
+            self.client.debug_info(f'Look-ahead failed: {e}')
+            return len(numbers)
+        if not result:
+            return len(numbers)
+        self.is_available = bool(result.get('available'))
+        if not self.is_available:
+            self.client.debug_info('Look-ahead is disabled, the number lookup is not available')
+            return 0
+        self.pending = result.get('pending') or 0
+        for number, item in (result.get('results') or {}).items():
+            if item is None:
+                continue
+            self.client.number_cache.put(number, item[0])
+            self.validated += 1
+            self.invalid += not item[0]
+        return len(numbers)
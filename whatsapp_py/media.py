@@ -0,0 +1,271 @@
+from __future__ import annotations
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .const import *
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .message import Message
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff')
+"""The extensions of the images that are preprocessed. The other media (e.g. videos, GIFs) are uploaded as they are."""
+
+METADATA_KEYS = ('xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop', 'iptc')
+"""The `Image.info` keys of the metadata that is stripped besides the EXIF tags (e.g. the location). The color profile is kept."""
+
+def has_metadata(image:Image.Image) -> bool:
+    """Checks if the image carries metadata that would be uploaded with it (see [`METADATA_KEYS`](./#media.METADATA_KEYS)).
+
+    Args:
+        image (Image.Image): The opened image.
+
+    Returns:
+        has_metadata (bool): True if the image has EXIF tags, XMP or other metadata, False otherwise. An empty EXIF block is ignored.
+    """
+    return len(image.getexif()) > 0 or any(key in image.info for key in METADATA_KEYS)
+
+def prepare_image(path:str, cache_dir:str, max_dimension:int = MEDIA_MAX_DIMENSION, quality:int = MEDIA_JPEG_QUALITY) -> str:
+    """Downscales and recompresses an image without metadata.
+
+    * Images with transparency are saved as PNG, the others as JPEG
+    * The result is cached in `cache_dir` by the hash of the content and the settings, a cached image is not processed again and its modification time is renewed (see [`MediaPreprocessor.prune`](./#media.MediaPreprocessor.prune))
+    * Images that are not larger than `max_dimension` are only saved again if they carry metadata (see [`has_metadata`](./#media.has_metadata))
+    * Animated images are not processed
+    * Runs in the worker processes of [`MediaPreprocessor`](./#media.MediaPreprocessor), so it is a module level function
+
+    Args:
+        path (str): The path to the image.
+        cache_dir (str): The directory of the processed images.
+        max_dimension (int, optional): The maximum width and height in pixels. Defaults to [`MEDIA_MAX_DIMENSION`](../constants/#const.MEDIA_MAX_DIMENSION).
+        quality (int, optional): The JPEG quality between `1` and `95`. Defaults to [`MEDIA_JPEG_QUALITY`](../constants/#const.MEDIA_JPEG_QUALITY).
+
+    Returns:
+        path (str): The path to the processed image, or the given path if it is not processed.
+    """
+    with Image.open(path) as image:
+        # Only the header is read until the pixels are needed
+        if getattr(image, 'is_animated', False):
+            return path
+        if max(image.size) <= max_dimension and not has_metadata(image):
+            return path
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+        digest = hashlib.sha256(f'{max_dimension}:{quality}:'.encode())
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        output = os.path.join(cache_dir, f"{digest.hexdigest()}.{'png' if has_alpha else 'jpg'}")
+        try:
+            os.utime(output)
+            return output
+        except OSError:
+            # Not prepared yet, or pruned
+            pass
+
+        # Applies the EXIF orientation, the metadata is dropped on save
+        image = ImageOps.exif_transpose(image)
+        target_mode = 'RGBA' if has_alpha else 'RGB'
+        if image.mode != target_mode:
+            image = image.convert(target_mode)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f'{output}.{os.getpid()}.tmp'
+        if has_alpha:
+            image.save(temporary, 'PNG', optimize=True)
+        else:
+            image.save(temporary, 'JPEG', quality=quality, optimize=True)
+    os.replace(temporary, output)
+    return output
+
+class MediaPreprocessor:
+    """Prepares the images of the media messages in a process pool before they are sent.
+
+    * Images larger than [`MEDIA_MAX_DIMENSION`](../constants/#const.MEDIA_MAX_DIMENSION) pixels are downscaled, recompressed and stripped of their metadata, transparent images stay PNG (see [`prepare_image`](./#media.prepare_image))
+    * [`submit`](./#media.MediaPreprocessor.submit) starts the work when the task is added, so the images are ready at its start time
+    * [`resolve`](./#media.MediaPreprocessor.resolve) returns the prepared paths when the message is sent, the original path is used if an image cannot be prepared
+    * [`release`](./#media.MediaPreprocessor.release) drops the work of a message that will not be sent (e.g. removed or failed for good)
+    * [`prune`](./#media.MediaPreprocessor.prune) deletes the prepared images that are not used for `max_age` seconds, the [`Client`](../client/#client.Client) runs it every [`MEDIA_CACHE_PRUNE_INTERVAL`](../constants/#const.MEDIA_CACHE_PRUNE_INTERVAL) seconds
+    * The processes are started on the first submit
+
+    !!!warning
+        Requires [Pillow](https://pypi.org/project/Pillow/) (`pip install Pillow`).
+
+        The worker processes import the main module on Windows and macOS, so the client must be created under `if __name__ == '__main__':`.
+
+    Args:
+        cache_dir (str, optional): The directory of the prepared images. Defaults to [`MEDIA_CACHE_DIR`](../constants/#const.MEDIA_CACHE_DIR).
+        max_dimension (int, optional): The maximum width and height in pixels. Defaults to [`MEDIA_MAX_DIMENSION`](../constants/#const.MEDIA_MAX_DIMENSION).
+        quality (int, optional): The JPEG quality between `1` and `95`. Defaults to [`MEDIA_JPEG_QUALITY`](../constants/#const.MEDIA_JPEG_QUALITY).
+        max_workers (int, optional): The number of worker processes. Defaults to `None` (the number of CPUs).
+        max_age (float, optional): The seconds a prepared image is kept after its last use. Defaults to [`MEDIA_CACHE_MAX_AGE`](../constants/#const.MEDIA_CACHE_MAX_AGE).
+
+    Raises:
+        ImportError: If Pillow is not installed.
+    """
+    def __init__(self,
+            cache_dir:str = MEDIA_CACHE_DIR,
+            max_dimension:int = MEDIA_MAX_DIMENSION,
+            quality:int = MEDIA_JPEG_QUALITY,
+            max_workers:int = None,
+            max_age:float = MEDIA_CACHE_MAX_AGE,
+        ):
+        if Image is None:
+            raise ImportError('Pillow is required for the media preprocessing: pip install Pillow')
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self.__executor:ProcessPoolExecutor = None
+        self.__futures:dict[str, list[Future | None]] = {}
+        """The futures of the submitted messages by nonce. `None` for the media that are not processed."""
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return f"MediaPreprocessor({self.max_dimension}px)(q{self.quality})({len(self.__futures)} pending)"
+
+    @staticmethod
+    def is_image(path:str) -> bool:
+        """Checks if the media is an image that can be prepared.
+
+        Args:
+            path (str): The path to the media.
+
+        Returns:
+            is_image (bool): True if the extension is one of [`IMAGE_EXTENSIONS`](./#media.IMAGE_EXTENSIONS), False otherwise.
+        """
+        return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+    def submit(self, message:Message) -> None:
+        """Starts preparing the images of the message in the process pool.
+
+        * Does nothing if the message has no media (files are sent as they are) or it is already submitted
+
+        Args:
+            message (Message): The message to prepare.
+        """
+        if message.media is None:
+            return
+        with self.__lock:
+            if message.nonce in self.__futures:
+                return
+            if self.__executor is None:
+                self.__executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self.__futures[message.nonce] = [
+                self.__executor.submit(prepare_image, path, self.cache_dir, self.max_dimension, self.quality) if self.is_image(path) else None
+                for path in message.attachments
+            ]
+
+    def resolve(self, message:Message, timeout:float = MEDIA_PREPROCESS_TIMEOUT) -> list[str]:
+        """Returns the paths to upload for the media of the message.
+
+        * Submits the message if it is not submitted yet
+        * Waits up to `timeout` seconds in total for all the images of the message
+        * The original path is used for the images that fail, time out or whose prepared file is deleted
+
+        Args:
+            message (Message): The message to send.
+            timeout (float, optional): The seconds to wait for the images. Defaults to [`MEDIA_PREPROCESS_TIMEOUT`](../constants/#const.MEDIA_PREPROCESS_TIMEOUT).
+
+        Returns:
+            paths (list[str]): The paths in the order of [`Message.attachments`](../message/#message.Message.attachments).
+        """
+        paths = message.attachments
+        if message.media is None:
+            return paths
+        self.submit(message)
+        with self.__lock:
+            futures = self.__futures.pop(message.nonce, [])
+        deadline = time.monotonic() + timeout
+        prepared = []
+        for path, future in zip(paths, futures):
+            try:
+                result = future.result(timeout=max(0.0, deadline - time.monotonic())) if future is not None else path
+            except Exception:
+                result = path
+            # A prepared file may be deleted by the release of another message with the same image
+            prepared.append(result if os.path.isfile(result) else path)
+        return prepared
+
+    def release(self, message:Message) -> None:
+        """Drops the work of a message that will not be sent.
+
+        * Cancels its images that are not started yet
+        * Deletes its prepared images (when they are done), unless another submitted message uses the same prepared image
+
+        Args:
+            message (Message): The submitted message.
+        """
+        with self.__lock:
+            futures = self.__futures.pop(message.nonce, None)
+        if futures is None:
+            return
+        for path, future in zip(message.attachments, futures):
+            if future is None or future.cancel():
+                continue
+            future.add_done_callback(lambda future, path=path: self.__discard(path, future))
+
+    def __discard(self, path:str, future:Future) -> None:
+        """Deletes the prepared image of a released message if no submitted message uses it."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        output = future.result()
+        if output == path or os.path.dirname(output) != self.cache_dir:
+            return
+        with self.__lock:
+            for futures in self.__futures.values():
+                for other in futures:
+                    if other is not None and other.done() and not other.cancelled() and other.exception() is None and other.result() == output:
+                        return
+        try:
+            os.remove(output)
+        except OSError:
+            pass
+
+    def prune(self) -> int:
+        """Deletes the prepared images that are not used for `max_age` seconds.
+
+        * The modification time of a prepared image is renewed every time it is prepared again
+        * Keeps the prepared images of the submitted messages
+
+        Returns:
+            deleted_count (int): The number of deleted files.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        with self.__lock:
+            in_use = {
+                future.result()
+                for futures in self.__futures.values()
+                for future in futures
+                if future is not None and future.done() and not future.cancelled() and future.exception() is None
+            }
+        expired_at = time.time() - self.max_age
+        deleted_count = 0
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if not entry.is_file() or entry.path in in_use or entry.stat().st_mtime >= expired_at:
+                    continue
+                os.remove(entry.path)
+                deleted_count += 1
+            except OSError:
+                pass
+        return deleted_count
+
+    def shutdown(self) -> None:
+        """Stops the worker processes, the pending images are not prepared."""
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+            self.__futures.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,44 @@
 from __future__ import annotations
 import os
+import time
+import uuid
 from datetime import datetime
+from typing import NamedTuple
+from .const import *
 from .css import CSS
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .chat import Chat
-    from .browser import WebElement
+    from .browser import Browser, WebElement
+
+MESSAGE_SNAPSHOT_SCRIPT = """
+const [ids, statusSelector, timeSelector, contentSelector] = arguments;
+return ids.map(id => {
+    const row = document.querySelector(`[data-testid="${CSS.escape(id)}"]`);
+    if (row === null) return null;
+    const status = row.querySelector(statusSelector);
+    const time = row.querySelector(timeSelector);
+    const content = row.querySelector(contentSelector);
+    return [
+        status === null ? null : status.getAttribute('data-testid'),
+        time === null ? null : time.innerText,
+        content === null ? null : content.innerText,
+    ];
+});
+"""
+"""Returns the status `data-testid`, the time text and the content text of the message rows in a single `execute_script` call. `null` for the rows that are not in the page."""
+
+class MessageSnapshot(NamedTuple):
+    """The state of a message row in WhatsApp Web at a moment (see [`Message.fetch_snapshots`](./#message.Message.fetch_snapshots))."""
+    status:str = None
+    """The `data-testid` of the status icon (see [`MessageStatus`](../receipts/#receipts.MessageStatus)). `None` for the received messages."""
+    time:str = None
+    """The time text of the message (e.g. `14:05`)."""
+    content:str = None
+    """The text content of the message. `None` for the messages without text."""
+    taken_at:float = 0.0
+    """The `time.monotonic()` value when the snapshot was taken."""
 
 class Message:
     """Contains the information about a message.
@@ -15,26 +47,40 @@ class Message:
         chat (Chat): The chat that the message belongs to.
         id (str): The id of the message.
         content (str): The content of the message.
-        file (str): The path to the file that the message contains.
-        media (str): The path to the media that the message contains.
+        file (str | list[str]): The path to the file that the message contains, or the paths of the files to send together.
+        media (str | list[str]): The path to the media that the message contains, or the paths of the media to send together as an album.
+        captions (list[str]): The captions of the files or media, in the same order. `None` items have no caption.
         time (datetime): The time that the message was sent.
-        nonce (str): The nonce of the message.
+        nonce (str): The nonce of the message. A unique one is generated if not given.
             
     !!!info
         `nonce` can be used to identify the message later (e.g. on `ClientEvent.TASK_COMPLETED`)
+
+    !!!info
+        All the files of a message are uploaded together, up to [`ALBUM_MAX_SIZE`](../constants/#const.ALBUM_MAX_SIZE). `content` is the caption of the first one, so it cannot be used with `captions`.
     """
 
-    def __init__(self, chat:Chat=None, id:str=None, content:str=None, file:str=None, media:str=None, time:datetime=None, nonce:str=str(datetime.now().timestamp())):
+    def __init__(self, chat:Chat=None, id:str=None, content:str=None, file:str|list[str]=None, media:str|list[str]=None, time:datetime=None, nonce:str=None, captions:list[str]=None):
         self.chat = chat
         self.id = id
         self.content = content
         self.file = file
         self.media = media
+        self.captions = captions
         self.time = time
-        self.nonce = nonce # str(nonce)
+        self.nonce = nonce if nonce is not None else uuid.uuid4().hex # str(nonce)
         self.__check_arguments()
         self.element = None
         self.error = None
+        self.data_id:str = None
+        """The `data-testid` of the message row in WhatsApp Web (e.g. `conv-msg-true_905551234567@c.us_3EB0...`). Set when the message is sent."""
+        self.sender:str = None
+        """The phone number of the sender of a received message (see [`ClientEvents.MESSAGE_RECEIVED`](../client_events/#client_events.ClientEvents.MESSAGE_RECEIVED)). `None` for the sent messages."""
+        self.status:str = None
+        """The last known status of the message (see [`MessageStatus`](../receipts/#receipts.MessageStatus)), updated by the [`ReceiptTracker`](../receipts/#receipts.ReceiptTracker)."""
+        self.timings:dict[str, float] = {}
+        """The durations of the send steps in seconds (see [`Client.send_timings`](../client/#client.Client.send_timings))."""
+        self.__snapshot:MessageSnapshot = None
     
     def __str__(self):
         str_args = []
@@ -50,6 +96,8 @@ class Message:
             str_args.append(f"media={self.media}")
         if self.time is not None:
             str_args.append(f"time={self.time.strftime('%d/%m/%Y %H:%M:%S')}")
+        if self.captions is not None:
+            str_args.append(f"captions={self.captions}")
         if self.nonce is not None:
             str_args.append(f"nonce={self.nonce}")
         if self.error is not None:
@@ -65,31 +113,61 @@ class Message:
         if self.content is not None and self.content.replace(' ', '') == "":
             self.content = None
 
-        if self.file is not None and self.file.replace(' ', '') == "":
-            self.file = None
-        
-        if self.media is not None and self.media.replace(' ', '') == "":
-            self.media = None
+        self.file = Message.__clean_paths(self.file)
+        self.media = Message.__clean_paths(self.media)
 
-        if self.content is None and self.file is None and self.media is None:
+        # The received messages have an id, they may have no text (e.g. a sticker)
+        if self.id is None and self.content is None and self.file is None and self.media is None:
             raise ValueError("Message must have content, file or media.")
     
         if self.file is not None and self.media is not None:
             raise ValueError("Message cannot have both file and media.")
-        
-        if self.file is not None:
-            self.file = self.file.replace("\u202a", "").replace("\u202b", "").replace("\u202c", "").strip()
-            if not os.path.isabs(self.file):
-                self.file = os.path.abspath(self.file)
-            if not os.path.isfile(self.file):
-                raise ValueError("File does not exist.")
-        
-        if self.media is not None:
-            self.media = self.media.replace("\u202a", "").replace("\u202b", "").replace("\u202c", "").strip()
-            if not os.path.isabs(self.media):
-                self.media = os.path.abspath(self.media)
-            if not os.path.isfile(self.media):
-                raise ValueError("Media does not exist.")
+
+        if len(self.attachments) > ALBUM_MAX_SIZE:
+            raise ValueError(f"Message cannot have more than {ALBUM_MAX_SIZE} files or media.")
+
+        for path in self.attachments:
+            if not os.path.isfile(path):
+                raise ValueError(f"{'File' if self.file is not None else 'Media'} does not exist: {path}")
+
+        if self.captions is not None:
+            if len(self.attachments) == 0:
+                raise ValueError("Captions can only be used with file or media.")
+            if len(self.captions) > len(self.attachments):
+                raise ValueError("Message cannot have more captions than files or media.")
+            if self.content is not None:
+                raise ValueError("Message cannot have both content and captions.")
+            self.captions = [caption if caption is not None and caption.replace(' ', '') != "" else None for caption in self.captions]
+            if all(caption is None for caption in self.captions):
+                self.captions = None
+
+    @staticmethod
+    def __clean_paths(paths:str|list[str]) -> str|list[str]:
+        """Removes the direction marks and makes the paths absolute. Empty paths are dropped."""
+        if paths is None:
+            return None
+        cleaned = []
+        for path in [paths] if isinstance(paths, str) else paths:
+            path = path.replace("\u202a", "").replace("\u202b", "").replace("\u202c", "").strip()
+            if path == "":
+                continue
+            cleaned.append(path if os.path.isabs(path) else os.path.abspath(path))
+        if len(cleaned) == 0:
+            return None
+        return cleaned[0] if isinstance(paths, str) else cleaned
+
+    @property
+    def attachments(self) -> list[str]:
+        """The paths of the files or media of the message. Empty if it has none."""
+        paths = self.file if self.file is not None else self.media
+        if paths is None:
+            return []
+        return [paths] if isinstance(paths, str) else list(paths)
+
+    @property
+    def is_album(self) -> bool:
+        """Whether the message has more than one file or media."""
+        return len(self.attachments) > 1
     
     def set_element(self, element: WebElement) -> Message:
         """Sets the element of the message.
@@ -155,13 +233,66 @@ class Message:
     def is_sent(self) -> bool:
         return self.element is not None
     
+    @staticmethod
+    def fetch_snapshots(browser:Browser, data_ids:list[str]) -> list[MessageSnapshot|None]:
+        """Fetches the status, time and content of many messages with a single `execute_script` call.
+
+        Args:
+            browser (Browser): The browser of the chat.
+            data_ids (list[str]): The `data-testid` values of the message rows (e.g. `conv-msg-true_...`).
+
+        Returns:
+            snapshots (list[MessageSnapshot|None]): The snapshots in the order of `data_ids`. `None` for the messages that are not in the page (e.g. their chat is not open).
+        """
+        if len(data_ids) == 0:
+            return []
+        rows = browser.execute_script(MESSAGE_SNAPSHOT_SCRIPT, list(data_ids), CSS._META_STATUS, CSS._META_TIME, CSS._CONTENT) or []
+        taken_at = time.monotonic()
+        return [MessageSnapshot(*row, taken_at) if row is not None else None for row in rows]
+
+    def refresh(self) -> MessageSnapshot:
+        """Fetches the state of the message row with one `execute_script` call and caches it.
+
+        * The `*_w` properties read from the cached snapshot, it is refreshed when older than [`SNAPSHOT_MAX_AGE`](../constants/#const.SNAPSHOT_MAX_AGE)
+        * The snapshot is empty if the message is not sent or its row is not in the page
+
+        Returns:
+            snapshot (MessageSnapshot): The new snapshot of the message.
+        """
+        snapshot = None
+        if self.data_id is not None and self.chat is not None:
+            try:
+                snapshot = Message.fetch_snapshots(self.chat.client.browser, [self.data_id])[0]
+            except:
+                pass
+        return self.set_snapshot(snapshot if snapshot is not None else MessageSnapshot(taken_at=time.monotonic()))
+
+    def set_snapshot(self, snapshot:MessageSnapshot) -> MessageSnapshot:
+        """Sets the cached snapshot of the message (e.g. from a bulk [`fetch_snapshots`](./#message.Message.fetch_snapshots) call).
+
+        Args:
+            snapshot (MessageSnapshot): The snapshot of the message.
+
+        Returns:
+            snapshot (MessageSnapshot): The snapshot itself.
+        """
+        self.__snapshot = snapshot
+        return snapshot
+
+    @property
+    def snapshot(self) -> MessageSnapshot:
+        """The cached snapshot of the message, refreshed if it is older than [`SNAPSHOT_MAX_AGE`](../constants/#const.SNAPSHOT_MAX_AGE)."""
+        if self.__snapshot is None or time.monotonic() - self.__snapshot.taken_at > SNAPSHOT_MAX_AGE:
+            return self.refresh()
+        return self.__snapshot
+
     # msg-time || msg-check || msg-dblcheck
     # Sending  || Delivered || Read
     @property
     def status_w(self) -> str:
-        if self.el_status is None:
+        if not self.is_sent:
             return None
-        return self.el_status.get_attribute("data-testid")
+        return self.snapshot.status
 
     @property
     def status_w_index(self) -> int:
@@ -183,15 +314,15 @@ class Message:
 
     @property
     def content_w(self) -> str:
-        if self.el_content is None:
+        if not self.is_sent:
             return None
-        return self.el_content.text
+        return self.snapshot.content
     
     @property
     def time_w(self) -> str:
-        if self.el_time is None:
+        if not self.is_sent:
             return None
-        return self.el_time.text
+        return self.snapshot.time
     
     @property
     def time_w_datetime(self) -> datetime:
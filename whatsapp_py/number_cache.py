@@ -0,0 +1,160 @@
+from __future__ import annotations
+import os
+import time
+import sqlite3
+import threading
+
+from .const import *
+
+class NumberCache:
+    """Remembers the phone numbers that are known to be on WhatsApp or not, so an invalid number is not opened again.
+
+    * Lookups are in memory, a known invalid number is rejected without touching the browser
+    * Valid and invalid numbers expire after their own TTL, a number may join or leave WhatsApp later
+    * Persisted to a SQLite database when a path is given, writes are committed in batches (see [`flush`](./#number_cache.NumberCache.flush))
+    * Numbers are keyed by their digits, `+90 555 123 45 67` and `905551234567` are the same number
+    * Thread-safe
+
+    Args:
+        path (str, optional): The path to the database file. Defaults to `None` (in memory only).
+        valid_ttl (float, optional): The seconds to remember a valid number. Defaults to [`NUMBER_CACHE_VALID_TTL`](../constants/#const.NUMBER_CACHE_VALID_TTL).
+        invalid_ttl (float, optional): The seconds to remember an invalid number. Defaults to [`NUMBER_CACHE_INVALID_TTL`](../constants/#const.NUMBER_CACHE_INVALID_TTL).
+        batch_size (int, optional): The number of writes that are committed together. Defaults to [`NUMBER_CACHE_BATCH_SIZE`](../constants/#const.NUMBER_CACHE_BATCH_SIZE).
+    """
+    def __init__(self,
+            path:str = None,
+            valid_ttl:float = NUMBER_CACHE_VALID_TTL,
+            invalid_ttl:float = NUMBER_CACHE_INVALID_TTL,
+            batch_size:int = NUMBER_CACHE_BATCH_SIZE,
+        ):
+        self.path = path
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self.batch_size = batch_size
+        self.hits = 0
+        """The number of lookups that found the number."""
+        self.misses = 0
+        """The number of lookups that did not find the number (or found it expired)."""
+        self.__numbers:dict[str, tuple[bool, float]] = {}
+        """Whether the number is valid and when it expires (`time.time()`), by the digits of the number."""
+        self.__pending_writes = 0
+        self.__lock = threading.RLock()
+        self.__connection:sqlite3.Connection = None
+        if path is not None:
+            self.__open(path)
+
+    def __len__(self) -> int:
+        return len(self.__numbers)
+
+    def __str__(self):
+        return f"NumberCache({len(self)})({self.path or 'memory'})"
+
+    def __open(self, path:str) -> None:
+        """Opens the database and loads the numbers that are not expired."""
+        if os.path.dirname(path) != '' and not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('''
+            CREATE TABLE IF NOT EXISTS numbers (
+                number TEXT PRIMARY KEY,
+                is_valid INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self.__connection.execute('DELETE FROM numbers WHERE expires_at <= ?', (time.time(),))
+        self.__connection.commit()
+        for number, is_valid, expires_at in self.__connection.execute('SELECT number, is_valid, expires_at FROM numbers'):
+            self.__numbers[number] = (bool(is_valid), expires_at)
+
+    @staticmethod
+    def normalize(phone_number:str) -> str:
+        """Returns the digits of the phone number.
+
+        Args:
+            phone_number (str): The phone number in any format.
+
+        Returns:
+            number (str): The digits of the phone number.
+        """
+        return ''.join(filter(str.isdigit, str(phone_number)))
+
+    def get(self, phone_number:str) -> bool | None:
+        """Returns whether the number is known to be on WhatsApp.
+
+        Args:
+            phone_number (str): The phone number in any format.
+
+        Returns:
+            is_valid (bool | None): True if the number is valid, False if it is invalid, `None` if it is not known or expired.
+        """
+        entry = self.__numbers.get(NumberCache.normalize(phone_number))
+        if entry is None or entry[1] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def is_invalid(self, phone_number:str) -> bool:
+        """Checks if the number is known to be not on WhatsApp.
+
+        Args:
+            phone_number (str): The phone number in any format.
+
+        Returns:
+            is_invalid (bool): True if the number is known to be invalid, False otherwise.
+        """
+        return self.get(phone_number) is False
+
+    def put(self, phone_number:str, is_valid:bool) -> None:
+        """Remembers the number as valid or invalid for the TTL of its kind.
+
+        Args:
+            phone_number (str): The phone number in any format.
+            is_valid (bool): Whether the number is on WhatsApp.
+        """
+        number = NumberCache.normalize(phone_number)
+        if number == '':
+            return
+        expires_at = time.time() + (self.valid_ttl if is_valid else self.invalid_ttl)
+        with self.__lock:
+            self.__numbers[number] = (is_valid, expires_at)
+            if self.__connection is None:
+                return
+            self.__connection.execute(
+                'INSERT OR REPLACE INTO numbers (number, is_valid, expires_at) VALUES (?, ?, ?)',
+                (number, int(is_valid), expires_at),
+            )
+            self.__pending_writes += 1
+            if self.__pending_writes >= self.batch_size:
+                self.flush()
+
+    def pop(self, phone_number:str) -> None:
+        """Forgets the number (e.g. it is known to be changed).
+
+        Args:
+            phone_number (str): The phone number in any format.
+        """
+        number = NumberCache.normalize(phone_number)
+        with self.__lock:
+            self.__numbers.pop(number, None)
+            if self.__connection is not None:
+                self.__connection.execute('DELETE FROM numbers WHERE number = ?', (number,))
+                self.__pending_writes += 1
+
+    def flush(self) -> None:
+        """Commits the pending writes to the disk."""
+        with self.__lock:
+            if self.__connection is None or self.__pending_writes == 0:
+                return
+            self.__connection.commit()
+            self.__pending_writes = 0
+
+    def close(self) -> None:
+        """Commits the pending writes and closes the database."""
+        with self.__lock:
+            if self.__connection is None:
+                return
+            self.flush()
+            self.__connection.close()
+            self.__connection = None
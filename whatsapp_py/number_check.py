@@ -0,0 +1,165 @@
+from __future__ import annotations
+import time
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple
+
+from .const import *
+from .number_cache import NumberCache
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .client import Client
+
+NUMBER_QUERY_SCRIPT = """
+const load = name => {
+    try { return window.require(name); } catch (e) { return null; }
+};
+const job = typeof window.require === 'function' ? load('WAWebQueryExistsJob') : null;
+const widFactory = typeof window.require === 'function' ? load('WAWebWidFactory') : null;
+const query = job && (job.queryWidExists || job.queryExists);
+const lookup = (number, timeout) => Promise.race([
+    Promise.resolve().then(() => query(widFactory.createWid(`${number}@c.us`))),
+    new Promise((_, reject) => setTimeout(reject, timeout)),
+]).then(result => result ? [true, result.wid ? (result.wid._serialized || String(result.wid)) : `${number}@c.us`] : [false, null])
+  .catch(() => null);
+"""
+"""Defines `lookup(number, timeout)` with the number lookup of the WhatsApp Web app, it resolves to `[exists, jid]` or `null` if the lookup failed or timed out.
+
+* `query` is `null` if the app does not expose the lookup (it is not a public API and may change)
+"""
+
+NUMBER_CHECK_SCRIPT = """
+const [numbers, timeout] = arguments;
+const done = arguments[arguments.length - 1];
+""" + NUMBER_QUERY_SCRIPT + """
+if (!query || !widFactory) return done({ available: false, results: [] });
+Promise.all(numbers.map(number => lookup(number, timeout))).then(results => done({ available: true, results: results }));
+"""
+"""Looks up the numbers concurrently with the number lookup of the WhatsApp Web app, in a single `execute_async_script` call.
+
+* Returns `available: false` if the app does not expose the lookup (it is not a public API and may change)
+* Each result is `[exists, jid]`, or `null` if the lookup failed or timed out
+"""
+
+class NumberCheck(NamedTuple):
+    """The result of a number check (see [`Client.check_numbers`](../client/#client.Client.check_numbers))."""
+    number:str
+    """The checked phone number as it is given."""
+    exists:bool
+    """Whether the number is on WhatsApp. `None` if it could not be checked."""
+    jid:str
+    """The WhatsApp id of the number (e.g. `905551234567@c.us`). `None` if it does not exist or it is not known."""
+
+class NumberChecker:
+    """Checks whether the phone numbers are on WhatsApp, streaming the results as they are known.
+
+    * An iterator of [`NumberCheck`](./#number_check.NumberCheck) results, in the order of the numbers
+    * The numbers are read lazily in batches, so any iterable (e.g. a file or a database cursor) can be checked
+    * Known numbers are answered from the [`number_cache`](../client/#client.Client.number_cache) of the client, the results are added to it
+    * The other numbers of a batch are looked up concurrently inside the page (see [`NUMBER_CHECK_SCRIPT`](./#number_check.NUMBER_CHECK_SCRIPT)), without a navigation
+    * Falls back to opening the chat of each number if the in-page lookup is not available, which takes seconds per number
+
+    Args:
+        client (Client): The logged in client.
+        numbers (Iterable[str]): The phone numbers in any format.
+        batch_size (int, optional): The number of numbers looked up together. Defaults to [`NUMBER_CHECK_BATCH_SIZE`](../constants/#const.NUMBER_CHECK_BATCH_SIZE).
+        timeout (float, optional): The seconds to wait for the lookup of a number. Defaults to [`NUMBER_CHECK_TIMEOUT`](../constants/#const.NUMBER_CHECK_TIMEOUT).
+    """
+    def __init__(self, client:Client, numbers:Iterable[str], batch_size:int = NUMBER_CHECK_BATCH_SIZE, timeout:float = NUMBER_CHECK_TIMEOUT):
+        self.client = client
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.checked = 0
+        """The number of the checked numbers, including the errors."""
+        self.existing = 0
+        """The number of the numbers that are on WhatsApp."""
+        self.cached = 0
+        """The number of the numbers that are answered from the cache."""
+        self.errors = 0
+        """The number of the numbers that could not be checked."""
+        self.started_at:float = None
+        """The `time.monotonic()` value when the first number is checked."""
+        self.is_in_page:bool = None
+        """Whether the in-page lookup is used. `None` until the first lookup."""
+        self.__numbers = iter(numbers)
+        self.__results = self.__check()
+
+    def __str__(self):
+        return f"NumberChecker({self.checked} checked)({self.existing} exist)({self.errors} errors)({self.per_second:.1f}/s)"
+
+    def __iter__(self) -> Iterator[NumberCheck]:
+        return self
+
+    def __next__(self) -> NumberCheck:
+        return next(self.__results)
+
+    @property
+    def per_second(self) -> float:
+        """The average number of the checked numbers per second."""
+        if self.started_at is None:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.checked / elapsed if elapsed > 0 else 0.0
+
+    def __check(self) -> Iterator[NumberCheck]:
+        """Checks the numbers batch by batch and yields the results in order."""
+        self.started_at = time.monotonic()
+        while True:
+            batch = list(islice(self.__numbers, self.batch_size))
+            if len(batch) == 0:
+                return
+            results:dict[int, NumberCheck] = {}
+            lookups:list[tuple[int, str, str]] = []
+            for index, number in enumerate(batch):
+                digits = NumberCache.normalize(number)
+                if digits == '':
+                    results[index] = NumberCheck(number, False, None)
+                    continue
+                exists = self.client.number_cache.get(digits)
+                if exists is not None:
+                    self.cached += 1
+                    results[index] = NumberCheck(number, exists, f'{digits}@c.us' if exists else None)
+                    continue
+                lookups.append((index, number, digits))
+
+            if len(lookups) > 0:
+                for (index, number, digits), result in zip(lookups, self.__lookup([digits for _, _, digits in lookups])):
+                    results[index] = NumberCheck(number, *result) if result is not None else NumberCheck(number, None, None)
+                    if result is not None:
+                        self.client.number_cache.put(digits, result[0])
+
+            for index in range(len(batch)):
+                check = results[index]
+                self.checked += 1
+                self.existing += check.exists is True
+                self.errors += check.exists is None
+                yield check
+
+    def __lookup(self, numbers:list[str]) -> list[tuple[bool, str] | None]:
+        """Looks up the numbers in the page, or by opening their chats if it is not available."""
+        if self.is_in_page is not False:
+            try:
+                result = self.client.browser.execute_async_script(
+                    NUMBER_CHECK_SCRIPT, numbers, int(self.timeout * 1000),
+                    timeout=self.timeout + 5,
+                )
+            except Exception as e:
+                self.client.debug_info(f'check_numbers -> {e}')
+                return [None] * len(numbers)
+            self.is_in_page = bool(result and result.get('available'))
+            if self.is_in_page:
+                return [tuple(item) if item is not None else None for item in result.get('results') or []]
+            self.client.debug_info('check_numbers -> in-page lookup is not available, the chats are opened')
+        return [self.__open(number) for number in numbers]
+
+    def __open(self, number:str) -> tuple[bool, str] | None:
+        """Checks a number by opening its chat (the slow path)."""
+        try:
+            chat = self.client.new_chat(number)
+            if chat.open():
+                return True, self.client.chat_jid or f'{number}@c.us'
+            if chat.is_phone_number_invalid:
+                return False, None
+        except Exception as e:
+            self.client.debug_info(f'check_numbers -> {number}: {e}')
+        return None
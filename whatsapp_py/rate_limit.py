@@ -0,0 +1,220 @@
+from __future__ import annotations
+import time
+import threading
+from typing import NamedTuple
+
+from .const import *
+
+class TokenBucket:
+    """A token bucket that refills continuously.
+
+    * Holds up to `burst` tokens, refills `rate` tokens per second
+    * Starts full, so a burst can be sent right away
+
+    Args:
+        rate (float): The number of tokens added per second.
+        burst (int): The maximum number of tokens.
+    """
+    def __init__(self, rate:float, burst:int):
+        if rate <= 0:
+            raise ValueError(f'Rate must be positive: {rate}')
+        if burst < 1:
+            raise ValueError(f'Burst must be at least 1: {burst}')
+        self.rate = rate
+        self.burst = burst
+        self.tokens:float = burst
+        """The number of tokens at `updated_at`."""
+        self.updated_at = time.monotonic()
+        """The `time.monotonic()` value of the last refill."""
+
+    def __str__(self):
+        return f"TokenBucket({self.tokens:.2f}/{self.burst})({self.rate}/s)"
+
+    def refill(self, now:float = None) -> None:
+        """Adds the tokens earned since the last refill.
+
+        Args:
+            now (float, optional): The `time.monotonic()` value. Defaults to now.
+        """
+        now = now if now is not None else time.monotonic()
+        if now <= self.updated_at:
+            return
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now:float = None) -> float:
+        """Returns the seconds until a token is available. Does not take the token.
+
+        Args:
+            now (float, optional): The `time.monotonic()` value. Defaults to now.
+
+        Returns:
+            wait_time (float): `0.0` if a token is available.
+        """
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Takes a token. Call [`wait_time`](./#rate_limit.TokenBucket.wait_time) first."""
+        self.tokens -= 1
+
+    @property
+    def is_full(self) -> bool:
+        """Whether the bucket was full at the last refill (e.g. it is not used recently)."""
+        return self.tokens >= self.burst
+
+
+class RateLimitScope:
+    """Scopes of the rate limits."""
+    # TODO: Convert to Enum
+    GLOBAL = 'global'
+    """Shared by all the clients that use the same [`RateLimiter`](./#rate_limit.RateLimiter)."""
+    ACCOUNT = 'account'
+    """Per sending account (`user_data_dir` of the client)."""
+    RECIPIENT = 'recipient'
+    """Per recipient `phone_number`."""
+
+class Throttle(NamedTuple):
+    """Returned by [`RateLimiter.acquire`](./#rate_limit.RateLimiter.acquire) when a task is throttled.
+
+    Attributes:
+        scope (str): The scope that throttled the task (see [`RateLimitScope`](./#rate_limit.RateLimitScope)). The one with the longest wait.
+        wait_time (float): The seconds until all the buckets have a token.
+    """
+    scope: str
+    wait_time: float
+
+class RateLimiter:
+    """Limits the sending rate with token buckets.
+
+    * A send takes a token from the global bucket, the bucket of the account and the bucket of the recipient
+    * Tokens are taken only if all the buckets have one, so a throttled send does not use up the others
+    * Never sleeps, the caller defers the throttled task (see [`acquire`](./#rate_limit.RateLimiter.acquire))
+    * Thread-safe, one instance can be shared by several clients to apply the global limit to all of them
+    * A `rate` of `None` disables the limit of that scope
+
+    Args:
+        global_rate (float, optional): Sends per second of all the accounts. Defaults to [`RATE_LIMIT_GLOBAL_RATE`](../constants/#const.RATE_LIMIT_GLOBAL_RATE).
+        global_burst (int, optional): Sends in a burst of all the accounts. Defaults to [`RATE_LIMIT_GLOBAL_BURST`](../constants/#const.RATE_LIMIT_GLOBAL_BURST).
+        account_rate (float, optional): Sends per second of an account. Defaults to [`RATE_LIMIT_ACCOUNT_RATE`](../constants/#const.RATE_LIMIT_ACCOUNT_RATE).
+        account_burst (int, optional): Sends in a burst of an account. Defaults to [`RATE_LIMIT_ACCOUNT_BURST`](../constants/#const.RATE_LIMIT_ACCOUNT_BURST).
+        recipient_rate (float, optional): Sends per second to a recipient. Defaults to [`RATE_LIMIT_RECIPIENT_RATE`](../constants/#const.RATE_LIMIT_RECIPIENT_RATE).
+        recipient_burst (int, optional): Sends in a burst to a recipient. Defaults to [`RATE_LIMIT_RECIPIENT_BURST`](../constants/#const.RATE_LIMIT_RECIPIENT_BURST).
+        max_recipients (int, optional): The number of recipient buckets kept before the full (idle) ones are dropped. Defaults to [`RATE_LIMIT_MAX_RECIPIENTS`](../constants/#const.RATE_LIMIT_MAX_RECIPIENTS).
+    """
+    def __init__(self,
+            global_rate:float = RATE_LIMIT_GLOBAL_RATE,
+            global_burst:int = RATE_LIMIT_GLOBAL_BURST,
+            account_rate:float = RATE_LIMIT_ACCOUNT_RATE,
+            account_burst:int = RATE_LIMIT_ACCOUNT_BURST,
+            recipient_rate:float = RATE_LIMIT_RECIPIENT_RATE,
+            recipient_burst:int = RATE_LIMIT_RECIPIENT_BURST,
+            max_recipients:int = RATE_LIMIT_MAX_RECIPIENTS,
+        ):
+        self.__limits:dict[str, tuple[float, int]] = {
+            RateLimitScope.GLOBAL: (global_rate, global_burst),
+            RateLimitScope.ACCOUNT: (account_rate, account_burst),
+            RateLimitScope.RECIPIENT: (recipient_rate, recipient_burst),
+        }
+        self.max_recipients = max_recipients
+        self.__buckets:dict[str, dict[str, TokenBucket]] = {scope: {} for scope in self.__limits}
+        self.__lock = threading.Lock()
+
+        self.acquired_count = 0
+        """The number of sends that got a token."""
+        self.throttled_count = 0
+        """The number of times a send was throttled."""
+        self.throttled_counts:dict[str, int] = {scope: 0 for scope in self.__limits}
+        """The number of throttles by scope."""
+        self.total_wait_time = 0.0
+        """The sum of the wait times of the throttles in seconds."""
+        self.max_wait_time = 0.0
+        """The longest wait time of a throttle in seconds."""
+
+    def __bucket(self, scope:str, key:str) -> TokenBucket | None:
+        """Returns the bucket of the key, creates it if needed. `None` if the scope is not limited."""
+        rate, burst = self.__limits[scope]
+        if rate is None:
+            return None
+        buckets = self.__buckets[scope]
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= self.max_recipients:
+                self.__drop_idle(buckets)
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    @staticmethod
+    def __drop_idle(buckets:dict[str, TokenBucket]) -> None:
+        """Drops the buckets that are full. A new bucket starts full, so nothing is lost."""
+        now = time.monotonic()
+        for bucket in buckets.values():
+            bucket.refill(now)
+        for key in [key for key, bucket in buckets.items() if bucket.is_full]:
+            del buckets[key]
+
+    def acquire(self, account:str = None, recipient:str = None) -> Throttle | None:
+        """Takes a token for a send if all the buckets have one.
+
+        Args:
+            account (str, optional): The key of the sending account. Defaults to None (not limited per account).
+            recipient (str, optional): The phone number of the recipient in any format, `+90 555 ...` and `90555...` share a bucket. Defaults to None (not limited per recipient).
+
+        Returns:
+            throttle (Throttle | None): `None` if the send can be done now. Otherwise the scope and the seconds to wait, no token is taken.
+        """
+        if recipient is not None:
+            recipient = ''.join(filter(str.isdigit, str(recipient))) or recipient
+        keys = {RateLimitScope.GLOBAL: '', RateLimitScope.ACCOUNT: account, RateLimitScope.RECIPIENT: recipient}
+        with self.__lock:
+            now = time.monotonic()
+            buckets:list[TokenBucket] = []
+            throttle:Throttle = None
+            for scope, key in keys.items():
+                if key is None:
+                    continue
+                bucket = self.__bucket(scope, key)
+                if bucket is None:
+                    continue
+                buckets.append(bucket)
+                wait_time = bucket.wait_time(now)
+                if wait_time > 0 and (throttle is None or wait_time > throttle.wait_time):
+                    throttle = Throttle(scope, wait_time)
+
+            if throttle is not None:
+                self.throttled_count += 1
+                self.throttled_counts[throttle.scope] += 1
+                self.total_wait_time += throttle.wait_time
+                self.max_wait_time = max(self.max_wait_time, throttle.wait_time)
+                return throttle
+
+            for bucket in buckets:
+                bucket.take()
+            self.acquired_count += 1
+            return None
+
+    @property
+    def average_wait_time(self) -> float:
+        """The average wait time of the throttles in seconds. `0.0` if nothing is throttled."""
+        return self.total_wait_time / self.throttled_count if self.throttled_count > 0 else 0.0
+
+    @property
+    def stats(self) -> dict[str, float]:
+        """The metrics of the rate limiter.
+
+        Returns:
+            stats (dict[str, float]): `acquired_count`, `throttled_count`, `throttled_<scope>_count`, `total_wait_time`, `average_wait_time` and `max_wait_time`.
+        """
+        with self.__lock:
+            stats = {
+                'acquired_count': self.acquired_count,
+                'throttled_count': self.throttled_count,
+            }
+            for scope, count in self.throttled_counts.items():
+                stats[f'throttled_{scope}_count'] = count
+            stats['total_wait_time'] = self.total_wait_time
+            stats['average_wait_time'] = self.average_wait_time
+            stats['max_wait_time'] = self.max_wait_time
+        return stats
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import math
+import time
+import threading
+
+from .const import *
+from .client_events import ClientEvents
+from .message import Message
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .client import Client
+    from .scheduler import Job
+
+class MessageStatus:
+    """Statuses of the sent messages (`data-testid` of the status icon)."""
+    # TODO: Convert to Enum
+    SENDING = 'msg-time'
+    """Waiting to be sent to the server."""
+    DELIVERED = 'msg-check'
+    """Delivered."""
+    READ = 'msg-dblcheck'
+    """Read."""
+
+    ORDER = [SENDING, DELIVERED, READ]
+    """The statuses in the order they are reached."""
+
+class ReceiptTracker:
+    """Watches the statuses of the sent messages in the background, so sending does not wait for the delivery.
+
+    * Runs as a job of the client scheduler, all the tracked messages are checked with one script call per batch (see [`Message.fetch_snapshots`](../message/#message.Message.fetch_snapshots))
+    * The fetched snapshots are cached on the messages, so their `*_w` properties do not query the browser again
+    * Emits `ClientEvents.MESSAGE_DELIVERED` and `ClientEvents.MESSAGE_READ` when a message reaches the status (both if it is read directly)
+    * Emits `ClientEvents.MESSAGE_RECEIPT_TIMEOUT` and stops tracking a message that is not delivered in `timeout` seconds
+    * Delivered messages are tracked for the read receipt until `read_timeout` seconds, then they are dropped without an event
+    * Polls every [`RECEIPT_POLL_INTERVAL`](../constants/#const.RECEIPT_POLL_INTERVAL) seconds while a message is not delivered, every [`RECEIPT_READ_POLL_INTERVAL`](../constants/#const.RECEIPT_READ_POLL_INTERVAL) seconds otherwise
+    * Sleeps while there is no message to track
+
+    !!!warning
+        The status of a message can only be read while its chat is open. The messages of the other chats keep their last known status until they time out.
+
+    Args:
+        client (Client): The client that sends the messages.
+        timeout (float, optional): The seconds to wait for the delivery of a message. Defaults to [`RECEIPT_TIMEOUT`](../constants/#const.RECEIPT_TIMEOUT).
+        read_timeout (float, optional): The seconds to track a message for the read receipt. Defaults to [`RECEIPT_READ_TIMEOUT`](../constants/#const.RECEIPT_READ_TIMEOUT).
+        batch_size (int, optional): The number of messages checked in one script call. Defaults to [`RECEIPT_BATCH_SIZE`](../constants/#const.RECEIPT_BATCH_SIZE).
+    """
+    def __init__(self, client:Client, timeout:float = RECEIPT_TIMEOUT, read_timeout:float = RECEIPT_READ_TIMEOUT, batch_size:int = RECEIPT_BATCH_SIZE):
+        self.client = client
+        self.timeout = timeout
+        self.read_timeout = read_timeout
+        self.batch_size = batch_size
+        self.job:Job = None
+        """The scheduler job that runs [`poll`](./#receipts.ReceiptTracker.poll). Woken when a message is tracked."""
+        self.__messages:dict[str, tuple[Message, float]] = {}
+        """The tracked messages and the time they are tracked from (`time.monotonic()`), by `data_id`."""
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__messages)
+
+    def track(self, message:Message) -> None:
+        """Starts tracking the status of a sent message.
+
+        * Does nothing if the message has no `data_id` (not sent) or it is already read
+
+        Args:
+            message (Message): The sent message.
+        """
+        if message.data_id is None or message.status == MessageStatus.READ:
+            return
+        with self.__lock:
+            self.__messages[message.data_id] = (message, time.monotonic())
+        if self.job is not None:
+            self.job.wake(RECEIPT_POLL_INTERVAL)
+
+    def untrack(self, message:Message) -> None:
+        """Stops tracking the message.
+
+        Args:
+            message (Message): The tracked message.
+        """
+        with self.__lock:
+            self.__messages.pop(message.data_id, None)
+
+    def poll(self) -> float:
+        """Checks the statuses of the tracked messages and emits the events of the changes (the job function).
+
+        Returns:
+            delay (float): [`RECEIPT_POLL_INTERVAL`](../constants/#const.RECEIPT_POLL_INTERVAL) while a message is not delivered, [`RECEIPT_READ_POLL_INTERVAL`](../constants/#const.RECEIPT_READ_POLL_INTERVAL) while the messages wait to be read, or `math.inf` if there is no message to track.
+        """
+        with self.__lock:
+            tracked = list(self.__messages.items())
+        if len(tracked) == 0:
+            return math.inf
+
+        now = time.monotonic()
+        for start in range(0, len(tracked), self.batch_size):
+            batch = tracked[start:start + self.batch_size]
+            try:
+                snapshots = Message.fetch_snapshots(self.client.browser, [data_id for data_id, _ in batch])
+            except Exception as e:
+                self.client.debug_info(f'Unable to check the message statuses: {e}')
+                break
+            for (data_id, (message, tracked_at)), snapshot in zip(batch, snapshots):
+                if snapshot is not None:
+                    message.set_snapshot(snapshot)
+                    if snapshot.status:
+                        self.__update(message, snapshot.status)
+                if message.status == MessageStatus.READ:
+                    self.untrack(message)
+                elif not self.__is_delivered(message):
+                    if now >= tracked_at + self.timeout:
+                        self.untrack(message)
+                        self.client.emit(ClientEvents.MESSAGE_RECEIPT_TIMEOUT, message)
+                elif now >= tracked_at + self.read_timeout:
+                    self.client.debug_info(f'Message is not read in {self.read_timeout}s, not tracked anymore: {message}')
+                    self.untrack(message)
+
+        with self.__lock:
+            messages = [message for message, _ in self.__messages.values()]
+        if len(messages) == 0:
+            return math.inf
+        if all(self.__is_delivered(message) for message in messages):
+            return RECEIPT_READ_POLL_INTERVAL
+        return RECEIPT_POLL_INTERVAL
+
+    @staticmethod
+    def __is_delivered(message:Message) -> bool:
+        """Checks if the last known status of the message is delivered or read."""
+        return message.status in (MessageStatus.DELIVERED, MessageStatus.READ)
+
+    def __update(self, message:Message, status:str) -> None:
+        """Sets the new status of the message and emits the events of the statuses it passed."""
+        if status not in MessageStatus.ORDER:
+            return
+        previous = MessageStatus.ORDER.index(message.status) if message.status in MessageStatus.ORDER else -1
+        current = MessageStatus.ORDER.index(status)
+        if current <= previous:
+            return
+        message.status = status
+        if previous < 1 <= current:
+            self.client.emit(ClientEvents.MESSAGE_DELIVERED, message)
+        if previous < 2 <= current:
+            self.client.emit(ClientEvents.MESSAGE_READ, message)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+import random
+
+from .const import *
+from .errors import TransientSendError
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .task import Task
+
+class RetryPolicy:
+    """Decides if a failed task is retried and when.
+
+    * Only [`TransientSendError`](../errors/#errors.TransientSendError) failures are retried
+    * The delay grows exponentially with the attempts and is jittered, so the failed tasks do not retry all at once
+
+    Args:
+        max_attempts (int, optional): The maximum number of attempts, including the first one. Defaults to [`RETRY_MAX_ATTEMPTS`](../constants/#const.RETRY_MAX_ATTEMPTS).
+        base_delay (float, optional): The delay before the first retry in seconds. Defaults to [`RETRY_BASE_DELAY`](../constants/#const.RETRY_BASE_DELAY).
+        max_delay (float, optional): The maximum delay in seconds. Defaults to [`RETRY_MAX_DELAY`](../constants/#const.RETRY_MAX_DELAY).
+        factor (float, optional): The multiplier of the delay after each attempt. Defaults to [`RETRY_BACKOFF_FACTOR`](../constants/#const.RETRY_BACKOFF_FACTOR).
+        jitter (float, optional): The random part of the delay between `0` and `1`. Defaults to `0.5` (the delay is between 50% and 100%).
+    """
+    def __init__(self,
+            max_attempts:int = RETRY_MAX_ATTEMPTS,
+            base_delay:float = RETRY_BASE_DELAY,
+            max_delay:float = RETRY_MAX_DELAY,
+            factor:float = RETRY_BACKOFF_FACTOR,
+            jitter:float = 0.5,
+        ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+
+    def __str__(self):
+        return f"RetryPolicy({self.max_attempts})({self.base_delay}-{self.max_delay}s)"
+
+    @staticmethod
+    def is_transient(error:Exception) -> bool:
+        """Checks if the error is worth retrying.
+
+        Args:
+            error (Exception): The error of the task.
+
+        Returns:
+            is_transient (bool): True if the error is a `TransientSendError`, False otherwise.
+        """
+        return isinstance(error, TransientSendError)
+
+    def delay(self, attempts:int) -> float:
+        """Returns the jittered delay before the next attempt.
+
+        Args:
+            attempts (int): The number of attempts made so far.
+
+        Returns:
+            delay (float): The delay in seconds.
+        """
+        delay = min(self.max_delay, self.base_delay * self.factor ** max(0, attempts - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def next_delay(self, task:Task, error:Exception) -> float | None:
+        """Returns the delay before retrying the failed task.
+
+        Args:
+            task (Task): The failed task. Its `attempts` are counted.
+            error (Exception): The error of the task.
+
+        Returns:
+            delay (float | None): The delay in seconds. `None` if the task should not be retried.
+        """
+        if not self.is_transient(error) or task.attempts >= self.max_attempts:
+            return None
+        return self.delay(task.attempts)
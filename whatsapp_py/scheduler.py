@@ -0,0 +1,271 @@
+from __future__ import annotations
+import math
+import time
+import logging
+import threading
+from typing import Callable, Self
+
+class Job:
+    """Contains the information about a job of the [`Scheduler`](./#scheduler.Scheduler).
+
+    * If the function returns a number, the next run is that many seconds after the end of the run instead of the `interval`
+    * If it returns `math.inf`, the job sleeps until it is woken (see [`wake`](./#scheduler.Job.wake))
+
+    Args:
+        scheduler (Scheduler): The scheduler that runs the job.
+        func (Callable[[], float | None]): The function to run.
+        interval (float): The interval between the runs in seconds.
+        name (str): The name of the job.
+    """
+    def __init__(self, scheduler:Scheduler, func:Callable[[], float | None], interval:float, name:str):
+        self.scheduler = scheduler
+        self.func = func
+        self.interval = interval
+        self.name = name
+        self.next_run:float = time.monotonic() + interval
+        """The `time.monotonic()` value of the next run."""
+        self.run_count = 0
+        """The number of times the job has run."""
+        self.is_cancelled = False
+        """Whether the job is cancelled or not."""
+        self.wake_at:float = None
+        """The `time.monotonic()` value that the job is woken to run at the latest. `None` if it is not woken."""
+
+    def __str__(self):
+        return f"Job({self.name})({self.interval})"
+
+    def cancel(self) -> None:
+        """Cancels the job. A running job finishes its current run."""
+        self.scheduler.cancel(self)
+
+    def wake(self, delay:float = 0.0) -> None:
+        """Runs the job in `delay` seconds at the latest.
+
+        Args:
+            delay (float, optional): The maximum delay in seconds. Defaults to `0.0` (as soon as possible).
+        """
+        self.scheduler.wake(self, delay)
+
+
+class Backoff:
+    """Grows a delay exponentially up to a maximum until it is reset.
+
+    * Used by the [`Client`](../client/#client.Client) to slow down the update loop while there is nothing to do
+
+    Args:
+        initial (float): The first delay in seconds.
+        maximum (float): The maximum delay in seconds.
+        factor (float): The multiplier of the delay after each call of [`next`](./#scheduler.Backoff.next).
+    """
+    def __init__(self, initial:float, maximum:float, factor:float):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.delay = initial
+        """The delay that [`next`](./#scheduler.Backoff.next) returns next."""
+
+    def __str__(self):
+        return f"Backoff({self.delay})({self.initial}-{self.maximum}s)"
+
+    def next(self) -> float:
+        """Returns the current delay and grows it for the next call.
+
+        Returns:
+            delay (float): The delay in seconds.
+        """
+        delay = self.delay
+        self.delay = min(delay * self.factor, self.maximum)
+        return delay
+
+    def reset(self) -> None:
+        """Sets the delay back to the initial delay."""
+        self.delay = self.initial
+
+
+class Scheduler:
+    """Runs the jobs periodically on a single long-lived thread.
+
+    * Runs are never overlapped, a job that runs long only delays the others
+    * Intervals are drift-corrected: the next run is scheduled from the planned time, not from the end of the run
+    * Missed runs are skipped instead of being run back to back
+    * Exceptions of the jobs are passed to `on_error`, the job keeps running
+
+    Args:
+        name (str, optional): The name of the thread. Defaults to `'whatsapp_py-scheduler'`.
+        on_error (Callable[[Job, Exception], None], optional): Called with the job and the exception when a run raises. Defaults to logging the exception with its traceback.
+    """
+    def __init__(self, name:str = 'whatsapp_py-scheduler', on_error:Callable[[Job, Exception], None] = None):
+        self.name = name
+        self.on_error = on_error
+        self.__jobs: list[Job] = []
+        self.__condition = threading.Condition()
+        self.__thread: threading.Thread = None
+        self.__is_running = False
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the scheduler thread is running or not."""
+        return self.__is_running
+
+    @property
+    def jobs(self) -> list[Job]:
+        """The jobs that are not cancelled."""
+        with self.__condition:
+            return list(self.__jobs)
+
+    def start(self) -> Self:
+        """Starts the scheduler thread. Does nothing if it is already running.
+
+        Returns:
+            scheduler (Scheduler): The scheduler instance.
+        """
+        with self.__condition:
+            if self.__is_running:
+                return self
+            self.__is_running = True
+            self.__thread = threading.Thread(target=self.__run, name=self.name)
+            self.__thread.start()
+        return self
+
+    def stop(self, timeout:float = None) -> None:
+        """Stops the scheduler thread and cancels all the jobs.
+
+        * Waits for the running job to finish, unless it is called from a job
+
+        Args:
+            timeout (float, optional): The maximum time to wait in seconds. Defaults to `None` (no limit).
+        """
+        with self.__condition:
+            self.__is_running = False
+            for job in self.__jobs:
+                job.is_cancelled = True
+            self.__jobs.clear()
+            self.__condition.notify_all()
+        thread = self.__thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def add_job(self, func:Callable[[], float | None], interval:float, delay:float = None, name:str = None) -> Job:
+        """Adds a job that runs every `interval` seconds.
+
+        * If the function returns a number, it is used as the delay before the next run instead of the `interval`
+
+        Args:
+            func (Callable[[], float | None]): The function to run.
+            interval (float): The interval between the runs in seconds.
+            delay (float, optional): The delay before the first run in seconds. Defaults to `interval`.
+            name (str, optional): The name of the job. Defaults to the name of the function.
+
+        Returns:
+            job (Job): The job.
+        """
+        job = Job(self, func, interval, name or getattr(func, '__name__', 'job'))
+        if delay is not None:
+            job.next_run = time.monotonic() + delay
+        with self.__condition:
+            self.__jobs.append(job)
+            self.__condition.notify_all()
+        return job
+
+    def next_run_in(self, exclude:Job = None) -> float:
+        """Returns the seconds until the next run of the jobs.
+
+        Args:
+            exclude (Job, optional): The job to ignore (e.g. the running job). Defaults to None.
+
+        Returns:
+            seconds (float): `0.0` if a job is due, `math.inf` if there is no job.
+        """
+        with self.__condition:
+            next_run = min((job.next_run for job in self.__jobs if job is not exclude), default=math.inf)
+        return max(0.0, next_run - time.monotonic())
+
+    def cancel(self, job:Job) -> None:
+        """Cancels the job.
+
+        Args:
+            job (Job): The job to cancel.
+        """
+        with self.__condition:
+            job.is_cancelled = True
+            if job in self.__jobs:
+                self.__jobs.remove(job)
+            self.__condition.notify_all()
+
+    def wake(self, job:Job, delay:float = 0.0) -> None:
+        """Runs the job in `delay` seconds at the latest.
+
+        * Does nothing if the job is already scheduled to run earlier
+
+        Args:
+            job (Job): The job to run.
+            delay (float, optional): The maximum delay in seconds. Defaults to `0.0` (as soon as possible).
+        """
+        with self.__condition:
+            wake_at = time.monotonic() + max(0.0, delay)
+            job.wake_at = wake_at if job.wake_at is None else min(job.wake_at, wake_at)
+            job.next_run = min(job.next_run, wake_at)
+            self.__condition.notify_all()
+
+    def __next_job(self) -> Job | None:
+        """Waits until a job is due and returns it. Returns `None` when the scheduler is stopped."""
+        with self.__condition:
+            while self.__is_running:
+                if len(self.__jobs) == 0:
+                    self.__condition.wait()
+                    continue
+                job = min(self.__jobs, key=lambda job: job.next_run)
+                delay = job.next_run - time.monotonic()
+                if math.isinf(delay):
+                    # All the jobs sleep until they are woken
+                    self.__condition.wait()
+                    continue
+                if delay > 0:
+                    self.__condition.wait(delay)
+                    continue
+                job.wake_at = None
+                return job
+        return None
+
+    def __report(self, job:Job, error:Exception) -> None:
+        """Passes the exception of a job to `on_error`, or logs it if there is no handler."""
+        if self.on_error is None:
+            logging.getLogger(__name__).exception(f'Error in job {job.name}', exc_info=error)
+            return
+        try:
+            self.on_error(job, error)
+        except Exception:
+            logging.getLogger(__name__).exception(f'Error in the error handler of job {job.name}')
+
+    def __run(self) -> None:
+        """The loop of the scheduler thread."""
+        while True:
+            job = self.__next_job()
+            if job is None:
+                return
+
+            delay = None
+            try:
+                delay = job.func()
+            except Exception as e:
+                self.__report(job, e)
+            job.run_count += 1
+
+            with self.__condition:
+                if job.is_cancelled:
+                    continue
+                now = time.monotonic()
+                if isinstance(delay, (int, float)) and not isinstance(delay, bool):
+                    # The job decides its own delay
+                    job.next_run = now + max(0.0, delay)
+                else:
+                    job.next_run += job.interval
+                    if job.next_run <= now:
+                        if job.interval > 0:
+                            # The run took longer than the interval. Skip the missed runs but keep the phase.
+                            job.next_run += ((now - job.next_run) // job.interval + 1) * job.interval
+                        else:
+                            job.next_run = now
+                if job.wake_at is not None:
+                    # Woken while running
+                    job.next_run = min(job.next_run, job.wake_at)
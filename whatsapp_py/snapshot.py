@@ -0,0 +1,137 @@
+from __future__ import annotations
+import time
+
+from .css import CSS
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .browser import Browser
+
+SNAPSHOT_SCRIPT = """
+const selectors = arguments[0];
+const progress = document.querySelector(arguments[1]);
+return {
+    url: location.href,
+    elements: selectors.map(selector => document.querySelector(selector) !== null),
+    progress: progress ? [progress.getAttribute('value'), progress.getAttribute('max')] : null,
+};
+"""
+"""The script that collects the state of the page in a single `execute_script` call."""
+
+class Snapshot:
+    """Contains the state of the WhatsApp Web page at a moment.
+
+    * The state is fetched with a single `execute_script` call (see [`take`](./#snapshot.Snapshot.take))
+    * Check functions of the [`Client`](../client/#client.Client) read from the snapshot instead of querying the browser one by one
+
+    Attributes:
+        url (str): The url of the page. Empty string if the page is not reachable.
+        elements (dict[str, bool]): Whether an element matching the selector exists, keyed by the selector.
+        progress (tuple[str, str]): The `value` and `max` attributes of the loading progress bar. `None` if not shown.
+        taken_at (float): The `time.monotonic()` value when the snapshot was taken.
+    """
+
+    SELECTORS: list[str] = [
+        CSS.APP,
+        CSS.CONFIRM_POPUP,
+        CSS.CONFIRM_POPUP_OK,
+        CSS.CONFIRM_POPUP_CANCEL,
+        CSS.LOADING_SCREEN,
+        CSS.LINK_WITH_PHONE,
+        CSS.QR_CODE,
+        CSS.QR_REFRESH,
+        CSS.MIDDLE_DRAWER,
+        CSS.INTRO_TITLE,
+        CSS.CONVERSATION_PANEL,
+    ]
+    """The selectors that are checked in every snapshot."""
+
+    def __init__(self, url:str = '', elements:dict[str, bool] = None, progress:tuple[str, str] = None, taken_at:float = None):
+        self.url = url
+        self.elements = elements if elements is not None else {}
+        self.progress = progress
+        self.taken_at = taken_at if taken_at is not None else time.monotonic()
+
+    def __str__(self):
+        found = [selector for selector, exists in self.elements.items() if exists]
+        return f"Snapshot(url={self.url}, elements={len(found)}/{len(self.elements)})"
+
+    @staticmethod
+    def take(browser:Browser) -> Snapshot:
+        """Takes a snapshot of the page with a single `execute_script` call.
+
+        * Returns an empty snapshot if the script cannot be executed (e.g. the window is closed)
+
+        Args:
+            browser (Browser): The browser to take the snapshot from.
+
+        Returns:
+            snapshot (Snapshot): The snapshot of the page.
+        """
+        try:
+            result = browser.execute_script(SNAPSHOT_SCRIPT, Snapshot.SELECTORS, CSS.LOADING_PROGRESS)
+        except:
+            return Snapshot()
+        return Snapshot.from_result(result)
+
+    @staticmethod
+    def from_result(result:dict) -> Snapshot:
+        """Creates a snapshot from the result of the snapshot script.
+
+        * The result of [`DomObserver`](../browser/#browser.dom_observer.DomObserver) has the same shape when it watches [`SELECTORS`](./#snapshot.Snapshot.SELECTORS)
+
+        Args:
+            result (dict): The result with `url`, `elements` and `progress` keys.
+
+        Returns:
+            snapshot (Snapshot): The snapshot of the page.
+        """
+        if not result:
+            return Snapshot()
+        return Snapshot(
+            url=result.get('url') or '',
+            elements=dict(zip(Snapshot.SELECTORS, result.get('elements') or [])),
+            progress=tuple(result['progress']) if result.get('progress') else None,
+        )
+
+    @property
+    def age(self) -> float:
+        """The age of the snapshot in seconds."""
+        return time.monotonic() - self.taken_at
+
+    def has_element(self, css:str) -> bool:
+        """Checks if an element matching the selector existed when the snapshot was taken.
+
+        Args:
+            css (str): The CSS selector. Must be one of [`SELECTORS`](./#snapshot.Snapshot.SELECTORS).
+
+        Returns:
+            has_element (bool): True if the element existed, False otherwise.
+
+        Raises:
+            KeyError: If the selector is not collected by the snapshot.
+        """
+        if css not in Snapshot.SELECTORS:
+            raise KeyError(f'Selector is not collected by the snapshot: {css}')
+        return self.elements.get(css, False)
+
+    @property
+    def loading_percent(self) -> float:
+        """The loading percent of the loading screen.
+
+        * Returns `0.0` when the loading screen is not shown
+
+        Returns:
+            loading_percent (float): Loading percent of the loading screen
+        """
+        if self.progress is None:
+            return 0.0
+        value, max = self.progress
+        if value is None or max is None:
+            return 0.0
+        try:
+            if float(max) == 0:
+                return 0.0
+            return (float(value) / float(max)) * 100
+        except ValueError:
+            return 0.0
@@ -1,8 +1,12 @@
 from __future__ import annotations
-from datetime import datetime
+import heapq
+import itertools
+import threading
+from collections import deque
+from datetime import datetime, timedelta
 from .const import *
 
-from typing import TYPE_CHECKING, Self
+from typing import TYPE_CHECKING, Callable, Self
 if TYPE_CHECKING:
     from .client import Client
     from .message import Message
@@ -21,15 +25,20 @@ class Task:
         client (Client): The client that the task belongs to.
         type (TaskType): The type of the task.
         priority (int): The priority of the task.
-        start_date (datetime): The time that the task was started.
+        start_date (datetime): The time that the task will be started. Defaults to now.
     """
-    def __init__(self, client:Client, type:TaskType, priority:int = 0, start_date:datetime = datetime.now()):
+    def __init__(self, client:Client, type:TaskType, priority:int = 0, start_date:datetime = None):
         self.client = client
         self.type = type
         self.priority = priority
-        self.start_date = start_date
+        self.start_date = start_date if start_date is not None else datetime.now()
         self.in_progress = False
         self.is_done = False
+        self.is_cancelled = False
+        self.attempts = 0
+        """The number of times the task is started."""
+        self.error:Exception = None
+        """The error of the last attempt. `None` if it succeeded."""
     
     def __str__(self):
         return f"Task({self.type})({self.priority})({self.start_date})"
@@ -40,8 +49,34 @@ class Task:
         * Emits `ClientEvents.TASK_STARTED` event.
         """
         self.in_progress = True
+        self.attempts += 1
         self.client.emit(ClientEvents.TASK_STARTED, self)
 
+    def fail(self, error:Exception) -> bool:
+        """Handles the error of the task with the [`RetryPolicy`](../retry/#retry.RetryPolicy) of the client.
+
+        * Transient errors are retried later with a jittered exponential backoff (see [`TaskManager.retry_task`](./#task.TaskManager.retry_task))
+        * Emits `ClientEvents.TASK_RETRYING` event if the task is retried.
+        * Otherwise the task is moved to the [`dead_letters`](./#task.TaskManager.dead_letters) of the task manager.
+
+        Args:
+            error (Exception): The error of the task.
+
+        Returns:
+            is_retried (bool): True if the task is retried, False otherwise.
+        """
+        self.error = error
+        task_manager = self.client.task_manager
+        task_manager.count_failure(error)
+        delay = self.client.retry_policy.next_delay(self, error)
+        if delay is not None:
+            self.in_progress = False
+            task_manager.retry_task(self, datetime.now() + timedelta(seconds=delay))
+            self.client.emit(ClientEvents.TASK_RETRYING, self, delay)
+            return True
+        task_manager.dead_letter(self)
+        return False
+
     def done(self):
         """Marks the task as done.
 
@@ -51,6 +86,24 @@ class Task:
         self.is_done = True
         self.client.emit(ClientEvents.TASK_COMPLETED, self)
 
+    @property
+    def nonce(self) -> str | None:
+        """The nonce that identifies the task in the [`TaskManager`](./#task.TaskManager). `None` if the task has no nonce.
+
+        Returns:
+            nonce (str | None): The nonce of the task.
+        """
+        return None
+
+    @property
+    def group(self) -> str | None:
+        """The key of the tasks that can be started together in a burst (see [`TaskManager.get_task`](./#task.TaskManager.get_task)). `None` if the task is started alone.
+
+        Returns:
+            group (str | None): The group of the task.
+        """
+        return None
+
 
 class MessageTask(Task):
     """Contains the information about a message task.
@@ -59,40 +112,168 @@ class MessageTask(Task):
         client (Client): The client that the task belongs to.
         message (Message): The message to be sent.
         priority (int): The priority of the task.
-        start_date (datetime): The time that the task was started.
+        start_date (datetime): The time that the task will be started. Defaults to now.
     """
-    def __init__(self, client:Client, message:Message, priority:int = 0, start_date:datetime = datetime.now()):
+    def __init__(self, client:Client, message:Message, priority:int = 0, start_date:datetime = None):
         super().__init__(client, TaskType.SEND_MESSAGE, priority, start_date)
         self.message = message
     
-    def start(self):
+    def start(self, check_open:bool = True, wait_delivery:bool = True):
         """Starts the task.
 
         * Emits `ClientEvents.TASK_STARTED` event.
-        * Sends the message. If an error occurs, the error is set to the message.
-        * Emits `ClientEvents.TASK_COMPLETED` event after the message is sent or an error occurs.
+        * Sends the message (see [`Chat._send_message`](../chat/#chat.Chat._send_message) for `check_open` and `wait_delivery`). If an error occurs, it is handled with [`fail`](./#task.Task.fail).
+        * The error is set to the message if the task is not retried.
+        * Emits `ClientEvents.TASK_COMPLETED` event after the message is sent or the task is failed for good.
         """
         super().start()
         try:
-            self.message.chat._send_message(message=self.message)
+            self.message.chat._send_message(message=self.message, check_open=check_open, wait_delivery=wait_delivery)
+            self.error = None
         except Exception as e:
+            if self.fail(e):
+                return
             self.message.error = str(e)
         self.done()
     
     def __str__(self):
         return f"Message{super().__str__()}({self.message})"
 
+    @property
+    def nonce(self) -> str | None:
+        """The nonce of the message.
+
+        Returns:
+            nonce (str | None): The nonce of the message.
+        """
+        return self.message.nonce
+
+    @property
+    def group(self) -> str | None:
+        """The phone number of the chat, so the messages to the same recipient are sent in a burst.
+
+        Returns:
+            group (str | None): The digits of the phone number.
+        """
+        return ''.join(filter(str.isdigit, str(self.message.chat.phone_number))) or None
+
 class TaskManager:
-    """Manages the tasks."""
-    tasks:list[Task] = []
-    """The list of tasks."""
+    """Manages the tasks.
+
+    * Tasks that are not due yet wait in a heap ordered by `start_date`
+    * Due tasks are promoted into a heap ordered by `priority` (higher first), then `start_date`
+    * Adding and getting a task is `O(log n)`, finding a task by its nonce is `O(1)`
+    * Every push gets a new entry token, the entries of removed, re-added or deferred tasks are dropped lazily when they reach the top of a heap
+    * Tasks that failed for good are kept in [`dead_letters`](./#task.TaskManager.dead_letters)
+    """
     current_task:Task = None
     """The current task."""
+    on_task_added:Callable[[Task], None] = None
+    """Called with the task after a task is added. Used by the [`Client`](../client/#client.Client) to wake the update loop."""
+    on_task_released:Callable[[Task], None] = None
+    """Called with the task after it is removed or moved to the dead letters. Used by the [`Client`](../client/#client.Client) to release the resources of the task."""
     
     def __init__(self):
-        self.tasks:list[Task] = []
         self.current_task:Task = None
-    
+        self.on_task_added:Callable[[Task], None] = None
+        self.on_task_released:Callable[[Task], None] = None
+        self.__pending:list[tuple[datetime, int, Task]] = []
+        """The tasks that are not due yet, ordered by `start_date`."""
+        self.__due:list[tuple[int, datetime, int, Task]] = []
+        """The due tasks, ordered by `priority` and `start_date`."""
+        self.__tokens:dict[Task, int] = {}
+        """The token of the current heap entry of each waiting task. The other entries of the task are stale."""
+        self.__tasks_by_nonce:dict[str, Task] = {}
+        self.__counter = itertools.count()
+        self.__lock = threading.RLock()
+        self.dead_letters:deque[Task] = deque(maxlen=DEAD_LETTER_MAX_LENGTH)
+        """The tasks that failed with a permanent error or ran out of attempts, the oldest are dropped after [`DEAD_LETTER_MAX_LENGTH`](../constants/#const.DEAD_LETTER_MAX_LENGTH)."""
+        self.failure_counts:dict[str, int] = {}
+        """The number of failed attempts by error class name (e.g. `TransientSendError`)."""
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__tokens) + (1 if self.current_task is not None and not self.current_task.is_done else 0)
+
+    def __is_live(self, entry:tuple) -> bool:
+        """Checks if the heap entry is the current entry of a task that is still waiting."""
+        task = entry[-1]
+        return self.__tokens.get(task) == entry[-2] and not task.is_done
+
+    def __push(self, task:Task) -> None:
+        """Pushes a new entry of the task into the pending heap, its previous entries become stale."""
+        token = next(self.__counter)
+        self.__tokens[task] = token
+        heapq.heappush(self.__pending, (task.start_date, token, task))
+
+    def __promote(self) -> None:
+        """Moves the tasks with `start_date` before now from the pending heap to the due heap."""
+        now = datetime.now()
+        while len(self.__pending) > 0 and self.__pending[0][0] <= now:
+            entry = heapq.heappop(self.__pending)
+            start_date, token, task = entry
+            if self.__is_live(entry):
+                heapq.heappush(self.__due, (-task.priority, start_date, token, task))
+            else:
+                self.__drop(entry)
+
+    def __prune(self, heap:list) -> None:
+        """Drops the stale entries and the done tasks from the top of the heap."""
+        while len(heap) > 0 and not self.__is_live(heap[0]):
+            self.__drop(heapq.heappop(heap))
+
+    def __drop(self, entry:tuple) -> None:
+        """Forgets the task of a dropped entry if it is its current entry (the task is done). Stale entries are only discarded."""
+        task = entry[-1]
+        if self.__tokens.get(task) == entry[-2]:
+            del self.__tokens[task]
+            self.__forget_nonce(task)
+
+    def __forget_nonce(self, task:Task) -> None:
+        """Removes the task from the nonce index."""
+        nonce = task.nonce
+        if nonce is not None and self.__tasks_by_nonce.get(nonce) is task:
+            del self.__tasks_by_nonce[nonce]
+
+    def __entries(self) -> list[tuple]:
+        """The live entries of both heaps."""
+        return [entry for entry in self.__pending + self.__due if self.__is_live(entry)]
+
+    @property
+    def tasks(self) -> list[Task]:
+        """The tasks that are waiting, sorted by `start_date` (`O(n log n)`, use for inspection only).
+
+        * Returns a copy: appending to it does not add a task, use [`add_task`](./#task.TaskManager.add_task)
+        * Setting it replaces the waiting tasks (the current task is kept), the dropped tasks are removed as with [`remove_task`](./#task.TaskManager.remove_task)
+
+        Returns:
+            tasks (list[Task]): The list of tasks.
+        """
+        with self.__lock:
+            entries = [entry[-1] for entry in self.__entries()]
+            if self.current_task is not None and not self.current_task.is_done:
+                entries.append(self.current_task)
+        return sorted(entries, key=lambda task: task.start_date)
+
+    @tasks.setter
+    def tasks(self, tasks:list[Task]) -> None:
+        with self.__lock:
+            removed = []
+            for task in list(self.__tokens):
+                if task not in tasks:
+                    task.is_cancelled = True
+                    removed.append(task)
+                self.__forget_nonce(task)
+            self.__pending.clear()
+            self.__due.clear()
+            self.__tokens.clear()
+        if self.on_task_released is not None:
+            for task in removed:
+                self.on_task_released(task)
+        for task in tasks:
+            if task is not self.current_task:
+                self.add_task(task)
+
     @property
     def active_tasks(self):
         """Filters the tasks with `start_date` before now and `is_done` is `False` and sorts them by `start_date`.
@@ -100,50 +281,233 @@ class TaskManager:
         Returns:
             active_tasks (list[Task]): The list of active tasks.
         """
-        return sorted([task for task in self.tasks if task.start_date <= datetime.now() and not task.is_done], key=lambda task: task.start_date)
+        with self.__lock:
+            self.__promote()
+            entries = [entry[-1] for entry in self.__due if self.__is_live(entry)]
+        return sorted(entries, key=lambda task: task.start_date)
+
+    @property
+    def has_due_task(self) -> bool:
+        """Checks if there is a task with `start_date` before now that is not done and not in progress.
+
+        Returns:
+            has_due_task (bool): True if there is a due task, False otherwise.
+        """
+        with self.__lock:
+            self.__promote()
+            self.__prune(self.__due)
+            return len(self.__due) > 0
+
+    def has_due_task_in(self, group:str) -> bool:
+        """Checks if there is a due task in the group (`O(n)`).
+
+        Args:
+            group (str): The group of the tasks (see [`Task.group`](./#task.Task.group)).
+
+        Returns:
+            has_due_task (bool): True if there is a due task in the group, False otherwise.
+        """
+        with self.__lock:
+            self.__promote()
+            return any(self.__is_live(entry) and entry[-1].group == group for entry in self.__due)
+
+    def upcoming_tasks(self, count:int) -> list[Task]:
+        """Returns the tasks that will be started next without removing them (`O(n log count)`).
+
+        * The due tasks in the order they are started, then the tasks that are not due yet by `start_date`
+        * The current task is not included
+
+        Args:
+            count (int): The maximum number of tasks.
+
+        Returns:
+            tasks (list[Task]): The upcoming tasks.
+        """
+        with self.__lock:
+            self.__promote()
+            due = heapq.nsmallest(count, [entry for entry in self.__due if self.__is_live(entry)])
+            pending = heapq.nsmallest(count - len(due), [entry for entry in self.__pending if self.__is_live(entry)]) if len(due) < count else []
+        return [entry[-1] for entry in due + pending]
+
+    @property
+    def next_start_date(self) -> datetime | None:
+        """The `start_date` of the task that will be started next.
+
+        Returns:
+            next_start_date (datetime | None): The start date. `None` if there is no task.
+        """
+        with self.__lock:
+            self.__promote()
+            self.__prune(self.__due)
+            if len(self.__due) > 0:
+                return self.__due[0][-1].start_date
+            self.__prune(self.__pending)
+            if len(self.__pending) > 0:
+                return self.__pending[0][0]
+            return None
     
     def add_task(self, task:Task) -> Self:
         """Adds a task to the list of tasks.
 
+        * Adding a waiting task again only moves it to its current `start_date`
+        * Calls [`on_task_added`](./#task.TaskManager.on_task_added)
+
         Args:
             task (Task): The task to be added.
 
         Returns:
             task_manager (TaskManager): The task manager instance.
         """
-        self.tasks.append(task)
+        with self.__lock:
+            task.is_cancelled = False
+            self.__push(task)
+            if task.nonce is not None:
+                self.__tasks_by_nonce[task.nonce] = task
+        if self.on_task_added is not None:
+            self.on_task_added(task)
         return self
 
     def remove_task(self, task:Task) -> Self:
         """Removes a task from the list of tasks.
 
+        * The task is marked as cancelled, its heap entries are dropped lazily
+        * Calls [`on_task_released`](./#task.TaskManager.on_task_released)
+
         Args:
             task (Task): The task to be removed.
 
         Returns:
             task_manager (TaskManager): The task manager instance.
         """
-        self.tasks.remove(task)
+        with self.__lock:
+            if task not in self.__tokens and self.current_task is not task:
+                return self
+            task.is_cancelled = True
+            self.__tokens.pop(task, None)
+            self.__forget_nonce(task)
+            if self.current_task is task:
+                self.current_task = None
+        if self.on_task_released is not None:
+            self.on_task_released(task)
+        return self
+
+    def defer_task(self, task:Task, start_date:datetime = None) -> Self:
+        """Puts the current task back to the waiting tasks if it is not started.
+
+        * Used to defer a throttled task without blocking the others
+        * Does nothing if the task is not the current task or it is started
+        * Does not call [`on_task_added`](./#task.TaskManager.on_task_added)
+
+        Args:
+            task (Task): The task to defer.
+            start_date (datetime, optional): The new `start_date` of the task. Defaults to the current `start_date`.
+
+        Returns:
+            task_manager (TaskManager): The task manager instance.
+        """
+        with self.__lock:
+            if self.current_task is not task or task.in_progress or task.is_done:
+                return self
+            self.current_task = None
+            if start_date is not None:
+                task.start_date = start_date
+            self.__push(task)
+        return self
+
+    def retry_task(self, task:Task, start_date:datetime) -> Self:
+        """Puts the current task back to the waiting tasks to be started again at `start_date`.
+
+        * Does nothing if the task is not the current task
+        * Does not call [`on_task_added`](./#task.TaskManager.on_task_added)
+
+        Args:
+            task (Task): The failed task.
+            start_date (datetime): The time of the next attempt.
+
+        Returns:
+            task_manager (TaskManager): The task manager instance.
+        """
+        with self.__lock:
+            if self.current_task is not task:
+                return self
+            task.in_progress = False
+            return self.defer_task(task, start_date)
+
+    def dead_letter(self, task:Task) -> Self:
+        """Moves a task that failed for good to the [`dead_letters`](./#task.TaskManager.dead_letters).
+
+        * Calls [`on_task_released`](./#task.TaskManager.on_task_released)
+
+        Args:
+            task (Task): The failed task.
+
+        Returns:
+            task_manager (TaskManager): The task manager instance.
+        """
+        with self.__lock:
+            self.dead_letters.append(task)
+        if self.on_task_released is not None:
+            self.on_task_released(task)
         return self
 
-    def get_task(self) -> Task:
+    def count_failure(self, error:Exception) -> None:
+        """Counts a failed attempt in [`failure_counts`](./#task.TaskManager.failure_counts).
+
+        Args:
+            error (Exception): The error of the attempt.
+        """
+        with self.__lock:
+            name = type(error).__name__
+            self.failure_counts[name] = self.failure_counts.get(name, 0) + 1
+
+    def get_task_by_nonce(self, nonce:str) -> Task | None:
+        """Finds a waiting or current task by its nonce.
+
+        Args:
+            nonce (str): The nonce of the task.
+
+        Returns:
+            task (Task | None): The task if found, None otherwise.
+        """
+        with self.__lock:
+            return self.__tasks_by_nonce.get(nonce)
+
+    def get_task(self, group:str = None) -> Task:
         """Gets the next task to be executed.
 
         * If the current task is not done, it returns the current task.
         * If the current task is done, it removes the current task from the list of tasks and returns the next task.
+        * The next task is the due task with the highest `priority`, the earliest `start_date` first
+        * With a `group`, the next task is the first due task in the group (`O(n)`), so a burst can go on
+
+        Args:
+            group (str, optional): The group of the next task (see [`Task.group`](./#task.Task.group)). Defaults to None (any task).
 
         Returns:
             task (Task): The next task to be executed.
         """
-        if self.current_task is not None:
-            if not self.current_task.is_done:
-                return self.current_task
+        with self.__lock:
+            if self.current_task is not None:
+                if not self.current_task.is_done:
+                    return self.current_task
+                else:
+                    self.__forget_nonce(self.current_task)
+                    self.current_task = None
+            self.__promote()
+            self.__prune(self.__due)
+            if group is not None:
+                entries = [entry for entry in self.__due if self.__is_live(entry) and entry[-1].group == group]
+                if len(entries) == 0:
+                    return None
+                entry = min(entries)
+                self.__due.remove(entry)
+                heapq.heapify(self.__due)
+            elif len(self.__due) == 0:
+                return None
             else:
-                self.remove_task(self.current_task)
-                self.current_task = None
-        if len(self.tasks) == 0:
-            return None
-        task = max(self.active_tasks, key=lambda task: task.priority, default=None)
-        self.current_task = task
-        return task
-
+                entry = heapq.heappop(self.__due)
+            task = entry[-1]
+            # The task is not waiting anymore, its other entries are stale
+            del self.__tokens[task]
+            self.current_task = task
+            return task
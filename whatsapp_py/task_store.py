@@ -0,0 +1,276 @@
+from __future__ import annotations
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from .const import *
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .task import MessageTask
+
+class TaskState:
+    """States of the stored tasks."""
+    # TODO: Convert to Enum
+    PENDING = 'pending'
+    """Waiting to be started."""
+    STARTED = 'started'
+    """Started but not completed. The message may have been sent."""
+    DONE = 'done'
+    """Completed successfully."""
+    FAILED = 'failed'
+    """Completed with an error."""
+
+class StoredTask(NamedTuple):
+    """Contains the information about a stored message task.
+
+    Attributes:
+        nonce (str): The nonce of the message. Primary key of the store, stored as text.
+        phone_number (str): The phone number of the chat.
+        content (str): The content of the message.
+        file (str | list[str]): The path or the paths of the files of the message.
+        media (str | list[str]): The path or the paths of the media of the message.
+        priority (int): The priority of the task.
+        start_date (datetime): The time that the task will be started.
+        state (str): The state of the task (see [`TaskState`](./#task_store.TaskState)).
+        message_id (str): The id of the sent message.
+        error (str): The error of the message.
+        captions (list[str]): The captions of the files or media of the message.
+    """
+    nonce: str
+    phone_number: str
+    content: str
+    file: str | list[str]
+    media: str | list[str]
+    priority: int
+    start_date: datetime
+    state: str
+    message_id: str
+    error: str
+    captions: list[str] = None
+
+class TaskStore:
+    """Persists the message tasks in a SQLite database, so they survive a crash or a restart.
+
+    * Uses the WAL journal mode, writes are committed in batches (see [`flush`](./#task_store.TaskStore.flush))
+    * Tasks are keyed by `Message.nonce`, saving a known nonce again does nothing
+    * Starting a task is committed right away, so an interrupted send is never replayed
+    * Completed tasks are deleted after [`TASK_STORE_RETENTION`](../constants/#const.TASK_STORE_RETENTION) seconds (see [`compact`](./#task_store.TaskStore.compact))
+    * Calls after [`close`](./#task_store.TaskStore.close) do nothing (e.g. a send or a task store job that outlives `Client.stop`): writes are ignored, reads find nothing. Such a started task is marked as failed on the next start
+
+    Args:
+        path (str): The path to the database file.
+        batch_size (int, optional): The number of writes that are committed together. Defaults to [`TASK_STORE_BATCH_SIZE`](../constants/#const.TASK_STORE_BATCH_SIZE).
+    """
+    def __init__(self, path:str, batch_size:int = TASK_STORE_BATCH_SIZE):
+        if os.path.dirname(path) != '' and not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.__pending_writes = 0
+        self.__is_closed = False
+        self.__lock = threading.RLock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('PRAGMA synchronous=FULL')
+        self.__connection.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                nonce TEXT PRIMARY KEY,
+                phone_number TEXT NOT NULL,
+                content TEXT NULL,
+                file TEXT NULL,
+                media TEXT NULL,
+                priority INTEGER NOT NULL,
+                start_date REAL NOT NULL,
+                state TEXT NOT NULL,
+                message_id TEXT NULL,
+                error TEXT NULL,
+                updated_at REAL NOT NULL,
+                captions TEXT NULL
+            )
+        ''')
+        columns = [row[1] for row in self.__connection.execute('PRAGMA table_info(tasks)')]
+        if 'captions' not in columns:
+            # Databases created before the captions are supported
+            self.__connection.execute('ALTER TABLE tasks ADD COLUMN captions TEXT NULL')
+        self.__connection.execute('CREATE INDEX IF NOT EXISTS tasks_state_start_date ON tasks (state, start_date)')
+        self.__connection.commit()
+
+    def __write(self, sql:str, *params:Any, flush:bool = False) -> None:
+        """Executes a write and commits it with the batch."""
+        with self.__lock:
+            if self.__is_closed:
+                return
+            self.__connection.execute(sql, params)
+            self.__pending_writes += 1
+            if flush or self.__pending_writes >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Commits the pending writes to the disk."""
+        with self.__lock:
+            if self.__is_closed or self.__pending_writes == 0:
+                return
+            self.__connection.commit()
+            self.__pending_writes = 0
+
+    def close(self) -> None:
+        """Commits the pending writes and closes the database. Does nothing if it is already closed."""
+        with self.__lock:
+            if self.__is_closed:
+                return
+            self.flush()
+            self.__connection.close()
+            self.__is_closed = True
+
+    @property
+    def is_closed(self) -> bool:
+        """Whether the database is closed or not."""
+        return self.__is_closed
+
+    def save(self, task:MessageTask) -> None:
+        """Saves a new task as pending. Does nothing if a task with the same nonce is stored.
+
+        Args:
+            task (MessageTask): The task to save.
+        """
+        message = task.message
+        self.__write(
+            '''
+                INSERT OR IGNORE INTO tasks (nonce, phone_number, content, file, media, priority, start_date, state, updated_at, captions)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            str(message.nonce), message.chat.phone_number, message.content, self.__encode(message.file), self.__encode(message.media),
+            task.priority, task.start_date.timestamp(), TaskState.PENDING, time.time(), self.__encode(message.captions),
+        )
+
+    def update(self, task:MessageTask, state:str = None) -> None:
+        """Updates a stored task from the task.
+
+        * Started tasks are committed right away (see [`TaskState.STARTED`](./#task_store.TaskState.STARTED))
+
+        Args:
+            task (MessageTask): The task to update.
+            state (str, optional): The new state. Defaults to the state of the task.
+        """
+        message = task.message
+        if state is None:
+            if task.is_done:
+                state = TaskState.FAILED if message.error is not None else TaskState.DONE
+            elif task.in_progress:
+                state = TaskState.STARTED
+            else:
+                state = TaskState.PENDING
+        self.__write(
+            '''
+                UPDATE tasks
+                SET state = ?, start_date = ?, priority = ?, message_id = ?, error = ?, updated_at = ?
+                WHERE nonce = ?
+            ''',
+            state, task.start_date.timestamp(), task.priority, message.id, message.error, time.time(), str(message.nonce),
+            flush=state == TaskState.STARTED,
+        )
+
+    def fail(self, nonce:str, error:str) -> None:
+        """Marks a stored task as failed.
+
+        Args:
+            nonce (str): The nonce of the task.
+            error (str): The error of the task.
+        """
+        self.__write(
+            'UPDATE tasks SET state = ?, error = ?, updated_at = ? WHERE nonce = ?',
+            TaskState.FAILED, error, time.time(), str(nonce),
+        )
+
+    def get(self, nonce:str) -> StoredTask | None:
+        """Finds a stored task by its nonce.
+
+        Args:
+            nonce (str): The nonce of the task.
+
+        Returns:
+            stored_task (StoredTask | None): The stored task if found, None otherwise.
+        """
+        with self.__lock:
+            if self.__is_closed:
+                return None
+            row = self.__connection.execute(
+                'SELECT nonce, phone_number, content, file, media, priority, start_date, state, message_id, error, captions FROM tasks WHERE nonce = ?',
+                (str(nonce),),
+            ).fetchone()
+        return self.__to_stored_task(row) if row is not None else None
+
+    def load(self, state:str, before:datetime = None, limit:int = None) -> list[StoredTask]:
+        """Loads the stored tasks in the given state, ordered by `start_date`.
+
+        Args:
+            state (str): The state of the tasks (see [`TaskState`](./#task_store.TaskState)).
+            before (datetime, optional): Only the tasks with `start_date` before it. Defaults to None (all).
+            limit (int, optional): The maximum number of tasks. Defaults to None (no limit).
+
+        Returns:
+            stored_tasks (list[StoredTask]): The stored tasks.
+        """
+        sql = 'SELECT nonce, phone_number, content, file, media, priority, start_date, state, message_id, error, captions FROM tasks WHERE state = ?'
+        params: list[Any] = [state]
+        if before is not None:
+            sql += ' AND start_date <= ?'
+            params.append(before.timestamp())
+        sql += ' ORDER BY start_date'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self.__lock:
+            if self.__is_closed:
+                return []
+            rows = self.__connection.execute(sql, params).fetchall()
+        return [self.__to_stored_task(row) for row in rows]
+
+    def compact(self, retention:float = TASK_STORE_RETENTION) -> int:
+        """Deletes the completed tasks that are older than the retention and shrinks the WAL file.
+
+        Args:
+            retention (float, optional): The seconds to keep the completed tasks, so their nonces are still known. Defaults to [`TASK_STORE_RETENTION`](../constants/#const.TASK_STORE_RETENTION).
+
+        Returns:
+            deleted_count (int): The number of deleted tasks.
+        """
+        with self.__lock:
+            if self.__is_closed:
+                return 0
+            self.flush()
+            cursor = self.__connection.execute(
+                'DELETE FROM tasks WHERE state IN (?, ?) AND updated_at < ?',
+                (TaskState.DONE, TaskState.FAILED, time.time() - retention),
+            )
+            self.__connection.commit()
+            self.__connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            return cursor.rowcount
+
+    @staticmethod
+    def __to_stored_task(row:tuple) -> StoredTask:
+        """Converts a database row to a stored task."""
+        nonce, phone_number, content, file, media, priority, start_date, state, message_id, error, captions = row
+        return StoredTask(
+            nonce, phone_number, content, TaskStore.__decode(file), TaskStore.__decode(media),
+            priority, datetime.fromtimestamp(start_date), state, message_id, error, TaskStore.__decode(captions),
+        )
+
+    @staticmethod
+    def __encode(value:str|list[str]) -> str:
+        """Encodes a list (e.g. the paths of an album) as JSON, a single path is stored as it is."""
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(list(value))
+
+    @staticmethod
+    def __decode(value:str) -> str|list[str]:
+        """Decodes a value encoded by `__encode`. Paths are absolute, so they never start with `[`."""
+        if value is None or not value.startswith('['):
+            return value
+        return json.loads(value)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import time
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+class StepTimer:
+    """Measures the duration of the named steps of an operation (e.g. sending a message).
+
+    * A step that runs more than once is summed
+    * The durations are added to the [`TimingStats`](./#timing.TimingStats) when the timer is given one
+
+    Args:
+        stats (TimingStats, optional): The statistics to add the durations to. Defaults to None.
+    """
+    def __init__(self, stats:TimingStats = None):
+        self.stats = stats
+        self.durations:dict[str, float] = {}
+        """The durations of the steps in seconds, in the order they are started."""
+
+    def __str__(self):
+        steps = ', '.join(f"{name}={duration * 1000:.0f}ms" for name, duration in self.durations.items())
+        return f"StepTimer({steps})"
+
+    @contextmanager
+    def step(self, name:str) -> Iterator[None]:
+        """Measures the duration of the code in the `with` block, even if it raises.
+
+        Args:
+            name (str): The name of the step.
+        """
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started_at)
+
+    def add(self, name:str, duration:float) -> None:
+        """Adds a measured duration.
+
+        Args:
+            name (str): The name of the step.
+            duration (float): The duration in seconds.
+        """
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+        if self.stats is not None:
+            self.stats.add(name, duration)
+
+    @property
+    def total(self) -> float:
+        """The sum of the durations in seconds."""
+        return sum(self.durations.values())
+
+
+class TimingStats:
+    """Aggregates the step durations of many operations, so the slowest steps can be found.
+
+    * Thread-safe
+    """
+    def __init__(self):
+        self.__steps:dict[str, list[float]] = {}
+        self.__lock = threading.Lock()
+
+    def add(self, name:str, duration:float) -> None:
+        """Adds a measured duration of a step.
+
+        Args:
+            name (str): The name of the step.
+            duration (float): The duration in seconds.
+        """
+        with self.__lock:
+            step = self.__steps.setdefault(name, [0, 0.0, 0.0])
+            step[0] += 1
+            step[1] += duration
+            step[2] = max(step[2], duration)
+
+    def clear(self) -> None:
+        """Removes all the durations."""
+        with self.__lock:
+            self.__steps.clear()
+
+    @property
+    def summary(self) -> dict[str, dict[str, float]]:
+        """The statistics of the steps, the step with the largest total first.
+
+        Returns:
+            summary (dict[str, dict[str, float]]): `count`, `total`, `average` and `max` durations in seconds by step name.
+        """
+        with self.__lock:
+            steps = {name: list(step) for name, step in self.__steps.items()}
+        return {
+            name: {'count': count, 'total': total, 'average': total / count, 'max': max}
+            for name, (count, total, max) in sorted(steps.items(), key=lambda item: item[1][1], reverse=True)
+        }
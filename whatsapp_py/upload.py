@@ -0,0 +1,134 @@
+from __future__ import annotations
+import os
+import threading
+from typing import NamedTuple
+
+from .const import *
+
+UPLOAD_PROGRESS_SCRIPT = """
+const [id, selector, statusSelector] = arguments;
+const row = document.querySelector(`[data-testid="${CSS.escape(id)}"]`);
+if (row === null) return null;
+const progress = row.querySelector(selector);
+const status = row.querySelector(statusSelector);
+return {
+    active: progress !== null,
+    value: progress === null ? null : (progress.getAttribute('aria-valuenow') ?? progress.getAttribute('value')),
+    max: progress === null ? null : (progress.getAttribute('aria-valuemax') ?? progress.getAttribute('max')),
+    status: status === null ? null : status.getAttribute('data-testid'),
+};
+"""
+"""Returns the upload progress indicator and the status `data-testid` of a message row in a single `execute_script` call. `null` if the row is not in the page.
+
+* `active` is `false` both before the indicator is rendered and after the upload, the caller tells them apart
+"""
+
+class UploadProgress(NamedTuple):
+    """The progress of the upload of a file or media message (see [`ClientEvents.UPLOAD_PROGRESS`](../client_events/#client_events.ClientEvents.UPLOAD_PROGRESS))."""
+    total_bytes:int
+    """The size of the uploaded files in bytes."""
+    percent:float
+    """The progress between `0` and `100`. `None` if the indicator does not show a value."""
+    elapsed:float
+    """The seconds since the send button is clicked."""
+
+    @property
+    def sent_bytes(self) -> int:
+        """The estimated number of uploaded bytes. `0` if the percent is not known."""
+        if self.percent is None:
+            return 0
+        return int(self.total_bytes * self.percent / 100)
+
+    @property
+    def bytes_per_second(self) -> float:
+        """The average upload bandwidth so far. `0.0` if the percent is not known."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.sent_bytes / self.elapsed
+
+    @staticmethod
+    def from_result(result:dict, total_bytes:int, elapsed:float) -> UploadProgress:
+        """Creates the progress from the result of the upload progress script.
+
+        Args:
+            result (dict): The result with `value` and `max` keys.
+            total_bytes (int): The size of the uploaded files in bytes.
+            elapsed (float): The seconds since the send button is clicked.
+
+        Returns:
+            progress (UploadProgress): The progress of the upload.
+        """
+        try:
+            percent = min(100.0, float(result['value']) / float(result['max'] or 100) * 100)
+        except (TypeError, ValueError, ZeroDivisionError):
+            percent = None
+        return UploadProgress(total_bytes, percent, elapsed)
+
+def file_size(paths:list[str]) -> int:
+    """Returns the total size of the files in bytes. Missing files are counted as `0`.
+
+    Args:
+        paths (list[str]): The paths to the files.
+
+    Returns:
+        size (int): The total size in bytes.
+    """
+    size = 0
+    for path in paths:
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    return size
+
+class ThroughputEstimator:
+    """Estimates the upload throughput from the completed uploads, so the upload timeouts scale with the file size.
+
+    * The throughput is an exponentially weighted moving average of the uploads
+    * Thread-safe
+
+    Args:
+        initial (float, optional): The throughput before the first upload in bytes per second. Defaults to [`UPLOAD_INITIAL_THROUGHPUT`](../constants/#const.UPLOAD_INITIAL_THROUGHPUT).
+        alpha (float, optional): The weight of the last upload between `0` and `1`. Defaults to [`UPLOAD_THROUGHPUT_ALPHA`](../constants/#const.UPLOAD_THROUGHPUT_ALPHA).
+    """
+    def __init__(self, initial:float = UPLOAD_INITIAL_THROUGHPUT, alpha:float = UPLOAD_THROUGHPUT_ALPHA):
+        self.alpha = alpha
+        self.samples = 0
+        """The number of the completed uploads."""
+        self.__bytes_per_second = initial
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return f"ThroughputEstimator({self.bytes_per_second / 1024:.0f}KB/s)({self.samples} samples)"
+
+    @property
+    def bytes_per_second(self) -> float:
+        """The estimated upload throughput in bytes per second."""
+        return self.__bytes_per_second
+
+    def add(self, size:int, seconds:float) -> None:
+        """Adds a completed upload to the estimate.
+
+        * Ignores the uploads smaller than [`UPLOAD_MIN_SAMPLE_SIZE`](../constants/#const.UPLOAD_MIN_SAMPLE_SIZE), their duration is mostly the fixed overhead of sending
+
+        Args:
+            size (int): The uploaded bytes.
+            seconds (float): The duration of the upload in seconds.
+        """
+        if size < UPLOAD_MIN_SAMPLE_SIZE or seconds <= 0:
+            return
+        with self.__lock:
+            self.__bytes_per_second += self.alpha * (size / seconds - self.__bytes_per_second)
+            self.samples += 1
+
+    def timeout_for(self, size:int) -> float:
+        """Returns the seconds to wait for an upload of the given size.
+
+        Args:
+            size (int): The bytes to upload.
+
+        Returns:
+            timeout (float): [`UPLOAD_MIN_TIMEOUT`](../constants/#const.UPLOAD_MIN_TIMEOUT) plus [`UPLOAD_TIMEOUT_FACTOR`](../constants/#const.UPLOAD_TIMEOUT_FACTOR) times the expected duration, [`UPLOAD_MAX_TIMEOUT`](../constants/#const.UPLOAD_MAX_TIMEOUT) at most.
+        """
+        expected = size / max(self.bytes_per_second, 1.0)
+        return min(UPLOAD_MAX_TIMEOUT, UPLOAD_MIN_TIMEOUT + UPLOAD_TIMEOUT_FACTOR * expected)